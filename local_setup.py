@@ -9,6 +9,7 @@ This script sets up the complete CAD-to-3D generation pipeline using:
 
 import os
 import json
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -37,6 +38,14 @@ class Local3DPipelineSetup:
             directory.mkdir(parents=True, exist_ok=True)
             print(f"✓ Created directory: {directory}")
     
+    def copy_pipeline_modules(self):
+        """Copy the shared pipeline package used by the generated services"""
+        source = self.project_root / "open_source_pipeline" / "pipeline"
+        target = self.setup_dir / "pipeline"
+        shutil.copytree(source, target, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+        print(f"✓ Copied pipeline modules")
+    
     def create_requirements_txt(self):
         """Create requirements.txt for Python dependencies"""
         requirements = [
@@ -45,6 +54,8 @@ class Local3DPipelineSetup:
             "opencv-python==4.8.1.78",
             "numpy==1.24.3",
             "pillow==10.0.1",
+            "pymupdf==1.23.8",
+            "ezdxf==1.3.0",
             "python-opencascade==7.7.0",
             "requests==2.31.0",
             "gunicorn==21.2.0",
@@ -52,7 +63,8 @@ class Local3DPipelineSetup:
             "pydantic==2.4.2",
             "uvicorn==0.23.2",
             "fastapi==0.104.1",
-            "aiofiles==23.2.1"
+            "aiofiles==23.2.1",
+            "aiohttp==3.9.1"
         ]
         
         req_file = self.setup_dir / "requirements.txt"
@@ -67,19 +79,37 @@ import os
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 import subprocess
 import tempfile
+import time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import uuid
 
+from pipeline.parallel import ProcessPool, default_workers, run_ordered
+from pipeline.occt_worker import get_draw_pool, spawn_convert
+from pipeline.pdf_raster import DEFAULT_DPI, iter_pdf_pages
+from pipeline.pdf_vector import iter_pdf_drawings
+from pipeline.dxf_reader import read_dxf
+
 app = Flask(__name__)
 CORS(app)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Persistent DRAWEXE interpreters (DRAWEXE_WORKERS per process, recycled after
+# DRAWEXE_MAX_JOBS jobs or DRAWEXE_MAX_RSS_MB); 0 spawns DRAWEXE per file
+DRAWEXE_PERSISTENT = os.getenv("DRAWEXE_PERSISTENT", "1") != "0"
+DRAWEXE_TIMEOUT = float(os.getenv("DRAWEXE_TIMEOUT", "300"))
+
+PDF_DPI = int(os.getenv("PDF_DPI", str(DEFAULT_DPI)))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "0")) or None
+# "auto" extracts vector geometry and rasterizes only pages without any,
+# "vector" never rasterizes, "raster" always does
+PDF_MODE = os.getenv("PDF_MODE", "auto")
+
 class CADProcessor:
     def __init__(self):
         self.upload_dir = Path("uploads")
@@ -103,55 +133,105 @@ class CADProcessor:
         
         return {"valid": True, "format": extension, "size_mb": file_size_mb}
     
-    def process_pdf(self, file_path: str) -> Dict[str, Any]:
+    def process_file(self, file_path: str) -> Dict[str, Any]:
+        """Validate a single file and run the converter for its type"""
+        file_path = Path(file_path)
+        
+        validation = self.validate_cad_file(str(file_path))
+        if not validation["valid"]:
+            return {"success": False, "error": validation["error"]}
+        
+        extension = file_path.suffix.lower()
+        
+        if extension == '.pdf':
+            return self.process_pdf(str(file_path))
+        elif extension == '.dxf':
+            return self.process_dxf(str(file_path))
+        elif extension == '.dwg':
+            return self.process_dwg(str(file_path))
+        elif extension in ['.step', '.stp', '.iges', '.igs']:
+            return self.process_step(str(file_path))
+        return {"success": False, "error": "Unsupported format"}
+    
+    def process_files(self, files: List[str], pool: Optional[ProcessPool] = None,
+                      max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Convert files concurrently on pool, keeping input order and per-file timing"""
+        outcomes = run_ordered(process_single_file, files, pool=pool, max_in_flight=max_workers)
+        
+        results = []
+        for file_path, outcome in zip(files, outcomes):
+            result = outcome["value"] or {"success": False, "error": outcome["error"]}
+            results.append({"file": str(file_path), "processing_time": outcome["elapsed"], **result})
+        return results
+    
+    def iter_pdf_pages(self, file_path: str, dpi: Optional[int] = None,
+                       pages: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield rendered pages in order, each into a directory owned by this call"""
+        job_dir = self.temp_dir / f"pdf_{uuid.uuid4().hex}"
+        yield from iter_pdf_pages(file_path, str(job_dir), dpi=dpi or PDF_DPI, pages=pages,
+                                  max_workers=PDF_RENDER_WORKERS)
+    
+    def process_pdf(self, file_path: str, dpi: Optional[int] = None,
+                    pages: Optional[str] = None, mode: Optional[str] = None) -> Dict[str, Any]:
         """Process PDF files (architectural drawings)"""
+        mode = mode or PDF_MODE
         try:
-            # Convert PDF to images for processing
-            import fitz  # PyMuPDF
-            
-            doc = fitz.open(file_path)
-            images = []
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap()
-                img_path = self.temp_dir / f"page_{page_num}.png"
-                pix.save(str(img_path))
-                images.append(str(img_path))
-            
-            doc.close()
+            if mode == "raster":
+                # Convert PDF to images for processing
+                rendered = [dict(page, mode="raster")
+                            for page in self.iter_pdf_pages(file_path, dpi=dpi, pages=pages)]
+            else:
+                job_dir = self.temp_dir / f"pdf_{uuid.uuid4().hex}"
+                rendered = list(iter_pdf_drawings(file_path, str(job_dir), pages=pages,
+                                                  dpi=dpi or PDF_DPI,
+                                                  raster_fallback=(mode == "auto")))
             
             return {
                 "success": True,
-                "images": images,
-                "pages": len(doc),
+                "vectors": [page["vectors"] for page in rendered if page["mode"] == "vector"],
+                "images": [page["image"] for page in rendered if page["mode"] == "raster"],
+                "pages": len(rendered),
+                "page_modes": [page["mode"] for page in rendered],
+                "dpi": dpi or PDF_DPI,
                 "type": "pdf"
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def process_dxf(self, file_path: str) -> Dict[str, Any]:
+        """Read DXF modelspace in-process into flat vertex/entity arrays"""
+        try:
+            geometry = read_dxf(file_path)
+            output_file = self.output_dir / f"{uuid.uuid4()}.npz"
+            geometry.save(output_file)
+            
+            return {
+                "success": True,
+                "output_file": str(output_file),
+                **geometry.summary(),
+                "type": "dxf"
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def process_dwg(self, file_path: str) -> Dict[str, Any]:
         """Process DWG files using OpenCascade"""
         try:
             # Use OpenCascade's DRAWEXE for DWG processing
             output_file = self.output_dir / f"{uuid.uuid4()}.step"
             
-            cmd = [
-                "DRAWEXE",
-                "-c", f"read {file_path}; write {output_file}; exit"
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                return {
-                    "success": True,
-                    "output_file": str(output_file),
-                    "type": "dwg"
-                }
+            if DRAWEXE_PERSISTENT:
+                get_draw_pool().convert(file_path, output_file, timeout=DRAWEXE_TIMEOUT)
             else:
-                return {"success": False, "error": result.stderr}
+                spawn_convert(file_path, output_file, timeout=DRAWEXE_TIMEOUT)
+            
+            return {
+                "success": True,
+                "output_file": str(output_file),
+                "type": "dwg"
+            }
         except Exception as e:
+            # DrawCommandError / DrawTimeoutError carry the DRAWEXE message
             return {"success": False, "error": str(e)}
     
     def process_step(self, file_path: str) -> Dict[str, Any]:
@@ -197,6 +277,14 @@ class CADProcessor:
 
 processor = CADProcessor()
 
+# Worker processes for per-file conversion; 1 disables the pool
+CAD_PARALLEL_WORKERS = int(os.getenv("CAD_PARALLEL_WORKERS", str(default_workers())))
+cad_pool = ProcessPool(CAD_PARALLEL_WORKERS) if CAD_PARALLEL_WORKERS > 1 else None
+
+def process_single_file(file_path: str) -> Dict[str, Any]:
+    # Module-level so it can be pickled into pool workers
+    return processor.process_file(file_path)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "service": "cad-processor"})
@@ -211,34 +299,15 @@ def process_cad():
         if not files:
             return jsonify({"error": "No files provided"}), 400
         
-        results = []
-        for file_url in files:
-            file_path = Path(file_url)
-            
-            # Validate file
-            validation = processor.validate_cad_file(str(file_path))
-            if not validation["valid"]:
-                results.append({"file": str(file_path), "error": validation["error"]})
-                continue
-            
-            # Process based on file type
-            extension = file_path.suffix.lower()
-            
-            if extension == '.pdf':
-                result = processor.process_pdf(str(file_path))
-            elif extension in ['.dwg', '.dxf']:
-                result = processor.process_dwg(str(file_path))
-            elif extension in ['.step', '.stp', '.iges', '.igs']:
-                result = processor.process_step(str(file_path))
-            else:
-                result = {"success": False, "error": "Unsupported format"}
-            
-            results.append({"file": str(file_path), **result})
+        started = time.perf_counter()
+        pool = cad_pool if data.get("parallel", True) else None
+        results = processor.process_files(files, pool=pool, max_workers=data.get("max_workers"))
         
         return jsonify({
             "success": True,
             "model_id": model_id,
-            "results": results
+            "results": results,
+            "processing_time": time.perf_counter() - started
         })
         
     except Exception as e:
@@ -269,95 +338,233 @@ if __name__ == '__main__':
     def create_hunyuan3d_client(self):
         """Create Hunyuan3D client wrapper"""
         client_code = '''
+import asyncio
 import os
 import json
 import requests
+import secrets
+import threading
 import time
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, List, Optional
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Connections kept alive per client; concurrent calls beyond this wait for a free one
+POOL_SIZE = int(os.getenv('HUNYUAN3D_POOL_SIZE', '8'))
+MAX_RETRIES = int(os.getenv('HUNYUAN3D_MAX_RETRIES', '3'))
+RETRY_BACKOFF = float(os.getenv('HUNYUAN3D_RETRY_BACKOFF', '0.5'))
+# Job ids followed per /events stream when waiting on a batch
+EVENTS_BATCH_SIZE = 100
+# Requests in flight per AsyncHunyuan3DClient
+MAX_CONCURRENCY = int(os.getenv('HUNYUAN3D_MAX_CONCURRENCY', '64'))
+# /events streams open at once per AsyncHunyuan3DClient, on their own connections
+MAX_EVENT_STREAMS = int(os.getenv('HUNYUAN3D_MAX_EVENT_STREAMS', '4'))
+# Retried with backoff; 429 is left to the submit loops, which honour Retry-After
+RETRY_STATUSES = (502, 503, 504)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+def build_payload(input_files: list,
+                  model_id: str,
+                  output_format: str = 'glb',
+                  quality: str = 'high',
+                  options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """/generate request body shared by the sync and async clients"""
+    options = options or {}
+    
+    return {
+        "model_id": model_id,
+        "input_files": input_files,
+        "output_format": output_format,
+        "quality": quality,
+        "options": {
+            "mesh_resolution": options.get("mesh_resolution", "high"),
+            "texture_quality": options.get("texture_quality", "high"),
+            "coordinate_system": options.get("coordinate_system", "right_handed"),
+            "unit_scale": options.get("unit_scale", "millimeters"),
+            **options
+        }
+    }
+
+def final_result(status: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a terminal job status into the generate_3d_model result shape"""
+    if status.get("status") == "completed" and status.get("result"):
+        return {"success": True, "job_id": status.get("job_id"), "trace_id": status.get("trace_id"),
+                "status": "completed", **status["result"]}
+    if status.get("status") == "failed":
+        return {"success": False, "job_id": status.get("job_id"), "trace_id": status.get("trace_id"),
+                "status": "failed", "error": status.get("error")}
+    return status
+
+def trace_headers(trace_id: Optional[str]) -> Dict[str, str]:
+    """W3C traceparent that makes the server record its spans under trace_id (32 hex chars)"""
+    if not trace_id:
+        return {}
+    return {"traceparent": f"00-{trace_id}-{secrets.token_hex(8)}-01"}
+
+def submit_retryable(payload: Dict[str, Any], use_local: bool) -> bool:
+    """
+    Whether a failed /generate POST may be sent again: only when the server
+    dedupes it onto the first attempt's job (local, cached, not profiled)
+    """
+    options = payload.get("options") or {}
+    return use_local and options.get("use_cache", True) is not False and not options.get("profile")
+
+def is_settled(status: Dict[str, Any]) -> bool:
+    return not status.get("success", True) or status.get("status") in TERMINAL_STATUSES
+
+class SSEParser:
+    """Line-at-a-time parser for /events; feed() returns (event, payload) per frame"""
+    
+    def __init__(self):
+        self.event, self.data = None, []
+    
+    def feed(self, line: str):
+        if line == "":
+            frame = None
+            if self.event == "end":
+                frame = ("end", None)
+            elif self.data and self.event in ("status", "error"):
+                frame = (self.event, json.loads("\\n".join(self.data)))
+            self.event, self.data = None, []
+            return frame
+        if line.startswith("event:"):
+            self.event = line[6:].strip()
+        elif line.startswith("data:"):
+            self.data.append(line[5:].lstrip())
+        return None
 
 class Hunyuan3DClient:
-    def __init__(self, api_key: str = None, base_url: str = None, use_local: bool = True):
+    def __init__(self, api_key: str = None, base_url: str = None, use_local: bool = True,
+                 pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES):
         self.api_key = api_key or os.getenv('HUNYUAN3D_API_KEY')
         self.base_url = base_url or (
             'http://localhost:8080' if use_local else 'https://api.hunyuan3d.com'
         )
         self.use_local = use_local
+        self.pool_size = pool_size
+        self.max_retries = max_retries
         self.logger = logging.getLogger(__name__)
+        self.session = self._create_session(pool_size, max_retries)
+    
+    def _create_session(self, pool_size: int, max_retries: int) -> requests.Session:
+        """Keep-alive session with bounded connections and retry/backoff for reads"""
+        
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            # A retried POST can create a second job; _submit decides when that is safe
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.use_local and self.api_key:
+            session.headers["Authorization"] = f"Bearer {self.api_key}"
+        return session
+    
+    def close(self):
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def generate_3d_model(self, 
                          input_files: list,
                          model_id: str,
                          output_format: str = 'glb',
                          quality: str = 'high',
-                         options: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Generate 3D model using Hunyuan3D"""
+                         options: Dict[str, Any] = None,
+                         wait: bool = True,
+                         timeout: float = 3600,
+                         trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate 3D model using Hunyuan3D.
         
-        options = options or {}
+        trace_id joins the job to an existing trace (e.g. the one its CAD
+        conversion ran under); the result's trace_id names its timeline.
+        options["compression"] = "meshopt" (or "quantize") asks for a
+        compressed GLB, which needs a loader with EXT_meshopt_compression
+        (or KHR_mesh_quantization) support; plain GLB is the default.
+        """
         
-        payload = {
-            "model_id": model_id,
-            "input_files": input_files,
-            "output_format": output_format,
-            "quality": quality,
-            "options": {
-                "mesh_resolution": options.get("mesh_resolution", "high"),
-                "texture_quality": options.get("texture_quality", "high"),
-                "coordinate_system": options.get("coordinate_system", "right_handed"),
-                "unit_scale": options.get("unit_scale", "millimeters"),
-                **options
-            }
-        }
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        payload = build_payload(input_files, model_id, output_format, quality, options)
         
         try:
             if self.use_local:
-                return self._generate_local(payload)
+                return self._generate_local(payload, wait=wait, timeout=timeout, trace_id=trace_id)
             else:
-                return self._generate_remote(payload, headers)
+                return self._generate_remote(payload)
         except Exception as e:
             self.logger.error(f"Generation failed: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def _generate_local(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate 3D model using local Hunyuan3D instance"""
+    def _submit(self, payload: Dict[str, Any], deadline: Optional[float] = None,
+                trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue one generation; the server answers at once with a job id.
         
-        # Simulate local processing
-        endpoint = f"{self.base_url}/generate"
+        Until deadline (time.monotonic()), a full server queue (429) is
+        retried after its Retry-After rather than reported as a failure.
+        Connection errors and 502/503/504 are retried with backoff only when
+        submit_retryable(): otherwise a lost response may hide a created job.
+        """
         
+        retryable = submit_retryable(payload, self.use_local)
+        attempt = 0
         try:
-            response = requests.post(endpoint, json=payload, timeout=600)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            # Simulate processing time
-            time.sleep(30)  # Replace with actual processing
-            
-            return {
-                "success": True,
-                "model_url": f"{self.base_url}/models/{payload['model_id']}/model.glb",
-                "processing_time": 30,
-                "vertices": 10000,
-                "faces": 5000,
-                "texture_size": "1024x1024"
-            }
-            
+            while True:
+                try:
+                    response = self.session.post(f"{self.base_url}/generate", json=payload,
+                                                 headers=trace_headers(trace_id), timeout=(10, 60))
+                except requests.exceptions.ConnectionError:
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    response = None
+                if response is None or (response.status_code in RETRY_STATUSES and retryable
+                                        and attempt < self.max_retries):
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    attempt += 1
+                    continue
+                if response.status_code == 429 and deadline is not None and time.monotonic() < deadline:
+                    time.sleep(float(response.headers.get("Retry-After") or 1))
+                    continue
+                response.raise_for_status()
+                return response.json()
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Local generation failed: {str(e)}"}
     
-    def _generate_remote(self, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    def _generate_local(self, payload: Dict[str, Any], wait: bool = True,
+                        timeout: float = 3600, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate 3D model using local Hunyuan3D instance"""
+        
+        submitted = self._submit(payload, trace_id=trace_id)
+        if not wait or not submitted.get("job_id") or is_settled(submitted):
+            return final_result(submitted)
+        
+        return final_result(self.wait_for_completion(submitted["job_id"], timeout=timeout))
+    
+    def _generate_remote(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Generate 3D model using remote API"""
         
         endpoint = f"{self.base_url}/v1/generate"
         
         try:
-            response = requests.post(endpoint, json=payload, headers=headers, timeout=600)
+            response = self.session.post(endpoint, json=payload, timeout=600)
             response.raise_for_status()
             
             return response.json()
@@ -365,33 +572,544 @@ class Hunyuan3DClient:
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Remote generation failed: {str(e)}"}
     
+    def generate_batch(self,
+                       jobs: List[Dict[str, Any]],
+                       wait: bool = True,
+                       timeout: float = 3600,
+                       on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Submit many generations at once and wait on them together.
+        
+        Each entry of jobs holds generate_3d_model arguments. Submissions run
+        pool_size at a time over the shared keep-alive connections and back
+        off while the server queue is full; waiting uses one /events stream
+        per EVENTS_BATCH_SIZE jobs. Results come back in the order of jobs.
+        """
+        
+        deadline = time.monotonic() + timeout
+        payloads = [build_payload(**job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            submitted = list(executor.map(lambda payload: self._submit(payload, deadline), payloads))
+        if not wait:
+            return submitted
+        
+        pending = [s["job_id"] for s in submitted
+                   if s.get("success") and s.get("job_id") and s.get("status") not in TERMINAL_STATUSES]
+        remaining = max(0.0, deadline - time.monotonic())
+        finals = self.wait_for_jobs(pending, timeout=remaining, on_progress=on_progress) if pending else {}
+        return [final_result(finals.get(s.get("job_id"), s)) for s in submitted]
+    
     def check_status(self, model_id: str) -> Dict[str, Any]:
         """Check generation status"""
         
         endpoint = f"{self.base_url}/status/{model_id}"
-        headers = {"Authorization": f"Bearer {self.api_key}"} if not self.use_local else {}
         
         try:
-            response = requests.get(endpoint, headers=headers)
+            response = self.session.get(endpoint, timeout=(10, 30))
             response.raise_for_status()
             return response.json()
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def download_model(self, model_url: str, output_path: str) -> bool:
-        """Download generated 3D model"""
+    def get_timeline(self, job_id: str) -> Dict[str, Any]:
+        """Span waterfall of a job's trace (request, queue, stages, polls, downloads)"""
         
         try:
-            response = requests.get(model_url, stream=True)
+            response = self.session.get(f"{self.base_url}/jobs/{job_id}/timeline", timeout=(10, 60))
+            return response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {"success": False, "error": str(e)}
+    
+    def download_profile(self, job_id: str, output_path: str) -> bool:
+        """
+        Save a profiled job's collapsed stack samples (generate with
+        options={"profile": True}, or any job that ran unusually long).
+        """
+        
+        try:
+            response = self.session.get(f"{self.base_url}/jobs/{job_id}/profile", timeout=(10, 60))
+            if response.status_code == 404:
+                self.logger.warning(f"No profile recorded for job {job_id}")
+                return False
             response.raise_for_status()
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(output_path).write_bytes(response.content)
+            return True
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error downloading profile of job {job_id}: {str(e)}")
+            return False
+    
+    def stream_status(self, job_ids: List[str], timeout: Optional[float] = None,
+                      deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield status snapshots pushed by the server's /events stream, until
+        it ends or time.monotonic() passes deadline.
+        """
+        
+        if len(job_ids) == 1:
+            endpoint = f"{self.base_url}/events/{job_ids[0]}"
+            params = None
+        else:
+            endpoint = f"{self.base_url}/events"
+            params = {"job_ids": ",".join(job_ids)}
+        headers = {"Accept": "text/event-stream"}
+        
+        # Read timeout only bounds the gap between frames; the server sends
+        # keep-alive comments well inside it. A silent server still cannot
+        # hold the caller past its deadline.
+        read_timeout = timeout or 60
+        if deadline is not None:
+            read_timeout = max(0.1, min(read_timeout, deadline - time.monotonic()))
+        with self.session.get(endpoint, params=params, headers=headers, stream=True,
+                              timeout=(10, read_timeout)) as response:
+            response.raise_for_status()
+            parser = SSEParser()
+            for line in response.iter_lines(decode_unicode=True):
+                # Checked on every line, keep-alive comments included, so a
+                # job that sits in the queue cannot outlast the deadline
+                if deadline is not None and time.monotonic() > deadline:
+                    return
+                frame = parser.feed(line) if line is not None else None
+                if frame is None:
+                    continue
+                event, payload = frame
+                if event == "end":
+                    return
+                yield payload
+    
+    def wait_for_jobs(self,
+                      job_ids: List[str],
+                      timeout: float = 3600,
+                      on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      poll_interval: float = 1.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait for several jobs at once; returns {job_id: final status}.
+        
+        Jobs are followed over /events streams (EVENTS_BATCH_SIZE ids each,
+        at most pool_size streams at a time). Anything a stream did not
+        settle is polled with exponential backoff until the deadline.
+        """
+        
+        deadline = time.monotonic() + timeout
+        job_ids = list(dict.fromkeys(job_ids))
+        final: Dict[str, Dict[str, Any]] = {}
+        lock = threading.Lock()
+        
+        def record(job_id: str, status: Dict[str, Any]):
+            if on_progress:
+                on_progress(status)
+            if is_settled(status):
+                with lock:
+                    final[job_id] = status
+        
+        def follow(group: List[str]):
+            try:
+                for status in self.stream_status(group, timeout=60, deadline=deadline):
+                    record(status.get("job_id"), status)
+            except requests.exceptions.RequestException as e:
+                if time.monotonic() < deadline:
+                    self.logger.warning(f"Event stream unavailable, falling back to polling: {str(e)}")
+        
+        groups = [job_ids[i:i + EVENTS_BATCH_SIZE] for i in range(0, len(job_ids), EVENTS_BATCH_SIZE)]
+        if len(groups) == 1:
+            follow(groups[0])
+        elif groups:
+            with ThreadPoolExecutor(max_workers=min(len(groups), self.pool_size)) as executor:
+                list(executor.map(follow, groups))
+        
+        pending = [job_id for job_id in job_ids if job_id not in final]
+        interval = poll_interval
+        while pending and time.monotonic() < deadline:
+            for job_id in pending:
+                record(job_id, {"job_id": job_id, **self.check_status(job_id)})
+            pending = [job_id for job_id in pending if job_id not in final]
+            if pending:
+                time.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+                interval = min(interval * 2, 30.0)
+        
+        for job_id in pending:
+            final[job_id] = {"success": False, "job_id": job_id, "error": "Timed out waiting for job"}
+        return {job_id: final[job_id] for job_id in job_ids}
+    
+    def wait_for_completion(self,
+                            job_id: str,
+                            timeout: float = 3600,
+                            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                            poll_interval: float = 1.0) -> Dict[str, Any]:
+        """Wait for a job over one streaming connection, polling only as a fallback"""
+        
+        return self.wait_for_jobs([job_id], timeout=timeout, on_progress=on_progress,
+                                  poll_interval=poll_interval)[job_id]
+    
+    def download_model(self, model_url: str, output_path: str, chunk_size: int = 1024 * 1024) -> bool:
+        """
+        Download a generated 3D model.
+        
+        Skips the transfer when the local copy still matches the server's
+        ETag, and resumes an interrupted download from its .part file.
+        """
+        
+        output_path = Path(output_path)
+        partial_path = output_path.with_name(output_path.name + ".part")
+        etag_path = output_path.with_name(output_path.name + ".etag")
+        partial_etag_path = partial_path.with_name(partial_path.name + ".etag")
+        
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            for _ in range(2):
+                headers = {}
+                offset = 0
+                if output_path.exists() and etag_path.exists():
+                    headers["If-None-Match"] = etag_path.read_text().strip()
+                if partial_path.exists() and partial_etag_path.exists():
+                    # If-Range: the server sends the whole file if it changed since
+                    offset = partial_path.stat().st_size
+                    headers["Range"] = f"bytes={offset}-"
+                    headers["If-Range"] = partial_etag_path.read_text().strip()
+                
+                with self.session.get(model_url, headers=headers, stream=True, timeout=(10, 300)) as response:
+                    if response.status_code == 304:
+                        self.logger.info(f"{output_path} is up to date")
+                        return True
+                    if response.status_code == 416:
+                        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                        if total.isdigit() and int(total) == offset:
+                            break  # the partial file is already complete
+                        partial_path.unlink()
+                        continue
+                    response.raise_for_status()
+                    
+                    resumed = (response.status_code == 206
+                               and response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"))
+                    etag = response.headers.get("ETag")
+                    if etag:
+                        partial_etag_path.write_text(etag)
+                    elif partial_etag_path.exists():
+                        partial_etag_path.unlink()
+                    
+                    with open(partial_path, "ab" if resumed else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                break
+            
+            os.replace(partial_path, output_path)
+            if partial_etag_path.exists():
+                os.replace(partial_etag_path, etag_path)
+            elif etag_path.exists():
+                etag_path.unlink()
             
-            output_path = Path(output_path)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Download failed: {str(e)}")
+            return False
+
+class AsyncHunyuan3DClient:
+    """
+    asyncio counterpart of Hunyuan3DClient for high fan-out workloads.
+    
+    One aiohttp session per client with at most pool_size connections; a
+    semaphore caps the requests in flight, so thousands of concurrent
+    generate_3d_model() calls share a bounded number of sockets. Waiting
+    for a single job polls with exponential backoff; as_completed() follows
+    whole groups of jobs over /events streams instead. Streams live in a
+    second session of max_streams connections, so long-lived streams never
+    hold the sockets that submits and polls need; a group that finds every
+    stream slot taken polls its jobs instead of waiting for one.
+    """
+    
+    def __init__(self, api_key: str = None, base_url: str = None, use_local: bool = True,
+                 max_concurrency: int = MAX_CONCURRENCY, pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES, max_streams: int = MAX_EVENT_STREAMS):
+        if aiohttp is None:
+            raise ImportError("AsyncHunyuan3DClient requires aiohttp (pip install aiohttp)")
+        self.api_key = api_key or os.getenv('HUNYUAN3D_API_KEY')
+        self.base_url = base_url or (
+            'http://localhost:8080' if use_local else 'https://api.hunyuan3d.com'
+        )
+        self.use_local = use_local
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_streams = max_streams
+        self._stream_slots = asyncio.Semaphore(max_streams)
+        self._session = None
+        self._stream_session = None
+    
+    def _new_session(self, limit: int) -> "aiohttp.ClientSession":
+        headers = {}
+        if not self.use_local and self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=limit, keepalive_timeout=30),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+        )
+    
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            self._session = self._new_session(self.pool_size)
+        return self._session
+    
+    def _get_stream_session(self) -> "aiohttp.ClientSession":
+        if self._stream_session is None or self._stream_session.closed:
+            self._stream_session = self._new_session(self.max_streams)
+        return self._stream_session
+    
+    async def close(self):
+        for session in (self._session, self._stream_session):
+            if session is not None:
+                await session.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _request_json(self, method: str, url: str, deadline: Optional[float] = None,
+                            retryable: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        One JSON request under the semaphore. With retryable, connection
+        errors and 502/503/504 are retried with exponential backoff. A 429
+        waits for its Retry-After; until deadline when one is given,
+        otherwise within the normal retry budget.
+        """
+        
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    async with self._get_session().request(method, url, **kwargs) as response:
+                        retry_after = response.headers.get("Retry-After")
+                        if response.status == 429 and (
+                                attempt < self.max_retries
+                                or (deadline is not None and time.monotonic() < deadline)):
+                            delay = float(retry_after) if retry_after else RETRY_BACKOFF * 2 ** attempt
+                        elif response.status in RETRY_STATUSES and retryable and attempt < self.max_retries:
+                            delay = RETRY_BACKOFF * 2 ** attempt
+                        else:
+                            response.raise_for_status()
+                            return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = RETRY_BACKOFF * 2 ** attempt
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    async def _submit(self, payload: Dict[str, Any], deadline: Optional[float] = None,
+                      trace_id: Optional[str] = None) -> Dict[str, Any]:
+        path = "/generate" if self.use_local else "/v1/generate"
+        try:
+            return await self._request_json("POST", f"{self.base_url}{path}", deadline=deadline,
+                                            retryable=submit_retryable(payload, self.use_local),
+                                            json=payload, headers=trace_headers(trace_id))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {"success": False, "error": f"Generation request failed: {str(e)}"}
+    
+    async def check_status(self, model_id: str) -> Dict[str, Any]:
+        """Check generation status"""
+        
+        try:
+            return await self._request_json("GET", f"{self.base_url}/status/{model_id}")
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    async def wait_for_completion(self, job_id: str, timeout: float = 3600,
+                                  poll_interval: float = 1.0) -> Dict[str, Any]:
+        """Poll one job with exponential backoff (capped at 30 s) until it settles"""
+        
+        deadline = time.monotonic() + timeout
+        interval = poll_interval
+        while True:
+            status = {"job_id": job_id, **await self.check_status(job_id)}
+            if is_settled(status):
+                return status
+            if time.monotonic() >= deadline:
+                return {"success": False, "job_id": job_id, "error": "Timed out waiting for job"}
+            await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+            interval = min(interval * 2, 30.0)
+    
+    async def generate_3d_model(self,
+                                input_files: list,
+                                model_id: str,
+                                output_format: str = 'glb',
+                                quality: str = 'high',
+                                options: Dict[str, Any] = None,
+                                wait: bool = True,
+                                timeout: float = 3600,
+                                trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate 3D model using Hunyuan3D"""
+        
+        submitted = await self._submit(build_payload(input_files, model_id, output_format, quality, options),
+                                       trace_id=trace_id)
+        if not wait or not submitted.get("job_id") or is_settled(submitted):
+            return final_result(submitted)
+        return final_result(await self.wait_for_completion(submitted["job_id"], timeout=timeout))
+    
+    async def stream_status(self, job_ids: List[str],
+                            deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield status snapshots pushed by the server's /events stream, until
+        it ends or time.monotonic() passes deadline. Waits for one of the
+        max_streams stream slots first.
+        """
+        
+        params = {"job_ids": ",".join(job_ids)}
+        headers = {"Accept": "text/event-stream"}
+        timeout = None
+        if deadline is not None:
+            # A silent server still cannot hold the caller past its deadline
+            timeout = aiohttp.ClientTimeout(sock_read=max(0.1, min(60.0, deadline - time.monotonic())))
+        # Streams hold a connection for their whole life, so they use their own
+        # session rather than the sockets short requests are queued on
+        async with self._stream_slots:
+            async with self._get_stream_session().get(f"{self.base_url}/events", params=params,
+                                                      headers=headers, timeout=timeout) as response:
+                response.raise_for_status()
+                parser = SSEParser()
+                async for raw in response.content:
+                    # Keep-alive comments count too, so a queued job cannot outlast the deadline
+                    if deadline is not None and time.monotonic() > deadline:
+                        return
+                    frame = parser.feed(raw.decode("utf-8").rstrip("\\r\\n"))
+                    if frame is None:
+                        continue
+                    event, payload = frame
+                    if event == "end":
+                        return
+                    yield payload
+    
+    async def _follow(self, job_ids: List[str], deadline: float) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield each job's final status once: streamed, then polled for
+        stragglers (or polled outright while every stream slot is in use)
+        """
+        
+        pending = set(job_ids)
+        try:
+            if not self._stream_slots.locked():
+                async for status in self.stream_status(job_ids, deadline):
+                    if status.get("job_id") in pending and is_settled(status):
+                        pending.discard(status["job_id"])
+                        yield status
+                    if not pending:
+                        break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if time.monotonic() < deadline:
+                self.logger.warning(f"Event stream unavailable, falling back to polling: {str(e)}")
+        
+        waits = [self.wait_for_completion(job_id, timeout=max(0.0, deadline - time.monotonic()))
+                 for job_id in pending]
+        for waiter in asyncio.as_completed(waits):
+            yield await waiter
+    
+    async def as_completed(self, jobs: List[Dict[str, Any]],
+                           timeout: float = 3600) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Submit generate_3d_model argument dicts and yield each result as its
+        job finishes (not in submission order). Every result carries "index",
+        the position of its job in jobs.
+        """
+        
+        deadline = time.monotonic() + timeout
+        results: "asyncio.Queue" = asyncio.Queue()
+        
+        async def run_group(indices: List[int]):
+            try:
+                submitted = await asyncio.gather(
+                    *(self._submit(build_payload(**jobs[i]), deadline) for i in indices))
+                waiting = {}
+                for index, status in zip(indices, submitted):
+                    if status.get("job_id") and not is_settled(status):
+                        waiting[status["job_id"]] = index
+                    else:
+                        await results.put((index, status))
+                async for status in self._follow(list(waiting), deadline):
+                    await results.put((waiting.pop(status["job_id"]), status))
+                for job_id, index in waiting.items():
+                    await results.put((index, {"success": False, "job_id": job_id,
+                                               "error": "Timed out waiting for job"}))
+            except Exception as e:
+                # Keep the consumer's count right even if a whole group fails
+                for index in indices:
+                    await results.put((index, {"success": False, "error": str(e)}))
+        
+        groups = [list(range(start, min(start + EVENTS_BATCH_SIZE, len(jobs))))
+                  for start in range(0, len(jobs), EVENTS_BATCH_SIZE)]
+        tasks = [asyncio.ensure_future(run_group(group)) for group in groups]
+        try:
+            delivered = set()
+            while len(delivered) < len(jobs):
+                index, status = await results.get()
+                if index in delivered:
+                    continue
+                delivered.add(index)
+                yield {**final_result(status), "index": index}
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def download_model(self, model_url: str, output_path: str,
+                             chunk_size: int = 1024 * 1024) -> bool:
+        """
+        Stream a generated 3D model to disk, with the same ETag skip and
+        .part resume behaviour as Hunyuan3DClient.download_model
+        """
+        
+        output_path = Path(output_path)
+        partial_path = output_path.with_name(output_path.name + ".part")
+        etag_path = output_path.with_name(output_path.name + ".etag")
+        partial_etag_path = partial_path.with_name(partial_path.name + ".etag")
+        
+        try:
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # At most one retry, after the connection and semaphore slot are released
+            for _ in range(2):
+                headers = {}
+                offset = 0
+                if output_path.exists() and etag_path.exists():
+                    headers["If-None-Match"] = etag_path.read_text().strip()
+                if partial_path.exists() and partial_etag_path.exists():
+                    offset = partial_path.stat().st_size
+                    headers["Range"] = f"bytes={offset}-"
+                    headers["If-Range"] = partial_etag_path.read_text().strip()
+                
+                async with self._semaphore:
+                    async with self._get_session().get(model_url, headers=headers) as response:
+                        if response.status == 304:
+                            return True
+                        if response.status == 416:
+                            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                            if total.isdigit() and int(total) == offset:
+                                break  # the partial file is already complete
+                            partial_path.unlink()
+                            continue
+                        response.raise_for_status()
+                        
+                        resumed = (response.status == 206
+                                   and response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"))
+                        etag = response.headers.get("ETag")
+                        if etag:
+                            partial_etag_path.write_text(etag)
+                        elif partial_etag_path.exists():
+                            partial_etag_path.unlink()
+                        
+                        with open(partial_path, "ab" if resumed else "wb") as f:
+                            async for chunk in response.content.iter_chunked(chunk_size):
+                                # File writes go to a thread so a slow disk never stalls the loop
+                                await asyncio.to_thread(f.write, chunk)
+                break
             
+            os.replace(partial_path, output_path)
+            if partial_etag_path.exists():
+                os.replace(partial_etag_path, etag_path)
+            elif etag_path.exists():
+                etag_path.unlink()
             return True
             
         except Exception as e:
@@ -576,6 +1294,7 @@ echo "   Test processing: curl -X POST http://localhost:5000/process-cad -H 'Con
         print("=" * 60)
         
         self.create_directories()
+        self.copy_pipeline_modules()
         self.create_requirements_txt()
         self.create_cad_processor()
         self.create_hunyuan3d_client()
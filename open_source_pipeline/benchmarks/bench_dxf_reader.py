@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming DXF ingestion against loading the whole document.
+
+Generates a DXF with --entities modelspace entities (lines, polylines, arcs,
+circles spread over a few layers) unless --dxf is given. Each reader runs in
+a fresh child process so peak RSS is measured per reader.
+
+    python benchmarks/bench_dxf_reader.py --entities 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.dxf_reader import DEFAULT_FLATTEN_DISTANCE, read_dxf
+
+
+def make_dxf(path, entities, seed=0):
+    import ezdxf
+    rng = random.Random(seed)
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    layers = ['WALLS', 'DOORS', 'WINDOWS', 'GRID', 'FURNITURE']
+    for i in range(entities):
+        x, y = rng.uniform(0, 50000), rng.uniform(0, 50000)
+        attribs = {'layer': layers[i % len(layers)]}
+        choice = i % 4
+        if choice == 0:
+            msp.add_line((x, y), (x + rng.uniform(-500, 500), y + rng.uniform(-500, 500)), dxfattribs=attribs)
+        elif choice == 1:
+            msp.add_lwpolyline([(x, y), (x + 300, y), (x + 300, y + 200), (x, y + 200)], close=True,
+                               dxfattribs=attribs)
+        elif choice == 2:
+            msp.add_arc((x, y), 90, 0, 90, dxfattribs=attribs)
+        else:
+            msp.add_circle((x, y), 25, dxfattribs=attribs)
+    doc.saveas(path)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_streaming(path):
+    started = time.perf_counter()
+    geometry = read_dxf(path)
+    elapsed = time.perf_counter() - started
+    return {'reader': 'streaming', 'entities': geometry.entity_count,
+            'vertices': geometry.vertex_count, 'total_s': elapsed}
+
+
+def run_full_load(path):
+    # Baseline: ezdxf.readfile plus a Python list of vertex tuples per entity
+    import ezdxf
+    from ezdxf import path as ezpath
+    started = time.perf_counter()
+    doc = ezdxf.readfile(path)
+    entities = []
+    for entity in doc.modelspace():
+        try:
+            entities.append([tuple(v) for v in ezpath.make_path(entity).flattening(DEFAULT_FLATTEN_DISTANCE)])
+        except TypeError:
+            continue
+    elapsed = time.perf_counter() - started
+    return {'reader': 'full-load', 'entities': len(entities),
+            'vertices': sum(len(e) for e in entities), 'total_s': elapsed}
+
+
+def measure(reader, path):
+    result = reader(path)
+    result['entities_per_s'] = round(result['entities'] / result['total_s']) if result['total_s'] else None
+    result['total_s'] = round(result['total_s'], 3)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dxf', help='existing DXF to benchmark (default: generate one)')
+    parser.add_argument('--entities', type=int, default=50000)
+    parser.add_argument('--skip-full-load', action='store_true', help='only run the streaming reader')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.dxf
+        if not path:
+            path = os.path.join(tmp, 'drawing.dxf')
+            make_dxf(path, args.entities)
+        size_mb = os.path.getsize(path) / 1e6
+
+        readers = [run_streaming] if args.skip_full_load else [run_streaming, run_full_load]
+        results = []
+        for reader in readers:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(measure, reader, path).result())
+
+    report = {'dxf': args.dxf or f"generated ({args.entities} entities)", 'dxf_mb': round(size_mb, 1),
+              'results': results}
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Load-test the cad_processor and hunyuan3d HTTP APIs.
+
+Both services are started from a scratch working directory, either as
+threads of this process (--mode inprocess, the default) or as child
+processes on localhost (--mode subprocess), or they are already running
+elsewhere (--hunyuan-url / --cad-url). Scenarios are then driven at each
+requested concurrency for a fixed duration:
+
+    generate     POST /generate with a fresh seed each time (cache miss)
+    generate-hit POST /generate with one payload (result cache hit)
+    status       GET /status/<job_id> of a finished job
+    process-cad  POST /process-cad converting an STL (parse + weld)
+    models       GET /models/<job_id>.glb, whole body
+    end-to-end   POST /generate, then poll /status until the job settles
+
+The simulated processing time is set by --workload. 'instant' removes the
+demo sleeps, so only real work is measured (LOD generation and GLB
+encoding, mesh conversion). 'demo' keeps the services' defaults.
+--env KEY=VALUE sets any other service setting (e.g. TRACE_EXPORTER=none).
+
+Each result has p50/p95/p99 latency, throughput, status codes and service
+RSS. --save writes them as a JSON baseline. --compare checks a run against
+a saved one and exits non-zero when p95 or throughput regressed by more
+than --tolerance.
+
+    python benchmarks/bench_http_api.py --concurrency 1 8 32 --duration 10 --save base.json
+    python benchmarks/bench_http_api.py --concurrency 1 8 32 --duration 10 --compare base.json
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from pipeline.mesh import uv_sphere
+
+SERVICES = {'hunyuan3d': ROOT / 'hunyuan3d' / 'app.py', 'cad_processor': ROOT / 'cad_processor' / 'app.py'}
+
+# Service settings per fake workload
+WORKLOADS = {
+    'instant': {'SIMULATED_STEP_SECONDS': '0', 'SIMULATED_CONVERT_SECONDS': '0'},
+    'fast': {'SIMULATED_STEP_SECONDS': '0.05', 'SIMULATED_CONVERT_SECONDS': '0.1'},
+    'demo': {}
+}
+# Keep admission control out of the way unless a run sets it explicitly
+DEFAULT_ENV = {'MAX_CONCURRENT_JOBS': '8', 'MAX_QUEUED_JOBS': '10000', 'CAD_MAX_QUEUED_JOBS': '10000'}
+SCENARIOS = ('generate', 'generate-hit', 'status', 'process-cad', 'models', 'end-to-end')
+DEFAULT_SCENARIOS = ('generate', 'generate-hit', 'status', 'process-cad', 'models')
+
+
+def load_app(service):
+    spec = importlib.util.spec_from_file_location(f"{service}_app", SERVICES[service])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def serve_in_thread(app):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def serve_forever(service, port):
+    """--serve entry point of a subprocess-mode service"""
+    from werkzeug.serving import make_server
+    make_server('127.0.0.1', port, load_app(service), threaded=True).serve_forever()
+
+
+def free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not become healthy")
+
+
+def rss_mb(pid=None):
+    """(current, peak) resident set size of pid (default: this process) in MB"""
+    try:
+        fields = {}
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                fields[name] = value
+        return (round(int(fields['VmRSS'].split()[0]) / 1024, 1),
+                round(int(fields['VmHWM'].split()[0]) / 1024, 1))
+    except (OSError, KeyError):
+        if pid is None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            return None, round(peak, 1)
+        return None, None
+
+
+class Services:
+    """The two services under test and how to measure their memory"""
+
+    def __init__(self, mode, workdir, env, hunyuan_url=None, cad_url=None):
+        self.mode = mode
+        self.urls = {}
+        self.pids = {}
+        self._children = []
+        self._servers = []
+        if mode == 'external':
+            self.urls = {'hunyuan3d': hunyuan_url, 'cad_processor': cad_url}
+            return
+
+        os.environ.update(env)
+        if mode == 'inprocess':
+            # The services create their models/jobs/uploads directories relative to the cwd
+            os.chdir(workdir)
+            for service in SERVICES:
+                server, url = serve_in_thread(load_app(service))
+                self._servers.append(server)
+                self.urls[service] = url
+                self.pids[service] = os.getpid()
+        else:
+            for service in SERVICES:
+                port = free_port()
+                child = subprocess.Popen([sys.executable, __file__, '--serve', service, '--port', str(port)],
+                                         cwd=workdir, env={**os.environ, **env},
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                self._children.append(child)
+                self.urls[service] = f"http://127.0.0.1:{port}"
+                self.pids[service] = child.pid
+        for url in self.urls.values():
+            wait_healthy(url)
+
+    def memory(self):
+        if self.mode == 'inprocess':
+            current, peak = rss_mb()
+            return {'process': {'rss_mb': current, 'peak_rss_mb': peak}}
+        memory = {}
+        for service, pid in self.pids.items():
+            current, peak = rss_mb(pid)
+            memory[service] = {'rss_mb': current, 'peak_rss_mb': peak}
+        return memory
+
+    def close(self):
+        for server in self._servers:
+            server.shutdown()
+        for child in self._children:
+            child.terminate()
+            child.wait(timeout=10)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def wait_for_job(session, url, job_id, timeout=600, interval=0.05):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = session.get(f"{url}/status/{job_id}", timeout=30).json()
+        if status.get('status') in ('completed', 'failed') or not status.get('success', True):
+            return status
+        time.sleep(interval)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+def drain(services, timeout=600):
+    """Wait until neither service has queued or running jobs; returns the seconds waited"""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        busy = False
+        for url in services.urls.values():
+            stats = requests.get(f"{url}/status", timeout=30).json()
+            busy = busy or stats.get('active_workers') or stats.get('queue_depth')
+        if not busy:
+            break
+        time.sleep(0.1)
+    return round(time.monotonic() - started, 3)
+
+
+def generate_payload(input_file, seed):
+    return {'input_files': [input_file], 'model_id': f"bench-{seed}", 'quality': 'high',
+            'options': {'seed': seed}}
+
+
+class Fixtures:
+    """Inputs and one finished job shared by the scenarios"""
+
+    def __init__(self, services, workdir):
+        self.input_file = str(Path(workdir) / 'bench.stl')
+        uv_sphere(64, 32).save(self.input_file)
+        self.hunyuan = services.urls['hunyuan3d']
+        self.cad = services.urls['cad_processor']
+        self.run_id = f"{time.time():.0f}-{os.getpid()}"
+        session = requests.Session()
+        # Completed once up front, so generate-hit really hits the cache
+        response = session.post(f"{self.hunyuan}/generate", timeout=60,
+                                json=generate_payload(self.input_file, f"{self.run_id}-fixed")).json()
+        self.job = wait_for_job(session, self.hunyuan, response['job_id'])
+        self.job_id = response['job_id']
+        self.model_path = '/models/' + self.job['result']['model_url'].split('/models/', 1)[1]
+        # /process-cad only reads local files from its upload directory
+        with open(self.input_file, 'rb') as f:
+            self.upload_id = session.post(f"{self.cad}/upload", params={'filename': 'bench.stl'},
+                                          data=f, timeout=60).json()['content_id']
+
+
+def make_request(scenario, fixtures):
+    """request(session, n) -> (status, response bytes) for one iteration of scenario"""
+    hunyuan, cad = fixtures.hunyuan, fixtures.cad
+
+    def generate(session, n):
+        payload = generate_payload(fixtures.input_file, f"{fixtures.run_id}-{n}")
+        response = session.post(f"{hunyuan}/generate", json=payload, timeout=60)
+        return response.status_code, len(response.content)
+
+    def generate_hit(session, n):
+        payload = generate_payload(fixtures.input_file, f"{fixtures.run_id}-fixed")
+        response = session.post(f"{hunyuan}/generate", json=payload, timeout=60)
+        return response.status_code, len(response.content)
+
+    def status(session, n):
+        response = session.get(f"{hunyuan}/status/{fixtures.job_id}", timeout=60)
+        return response.status_code, len(response.content)
+
+    def process_cad(session, n):
+        response = session.post(f"{cad}/process-cad", timeout=600,
+                                json={'files': [fixtures.upload_id], 'model_id': f"bench-{n}",
+                                      'parallel': False})
+        return response.status_code, len(response.content)
+
+    def models(session, n):
+        size = 0
+        with session.get(f"{hunyuan}{fixtures.model_path}", stream=True, timeout=60) as response:
+            for chunk in response.iter_content(1024 * 1024):
+                size += len(chunk)
+        return response.status_code, size
+
+    def end_to_end(session, n):
+        payload = generate_payload(fixtures.input_file, f"{fixtures.run_id}-e2e-{n}")
+        response = session.post(f"{hunyuan}/generate", json=payload, timeout=60)
+        if response.status_code != 200:
+            return response.status_code, len(response.content)
+        final = wait_for_job(session, hunyuan, response.json()['job_id'])
+        return (200 if final.get('status') == 'completed' else 500), len(response.content)
+
+    return {'generate': generate, 'generate-hit': generate_hit, 'status': status,
+            'process-cad': process_cad, 'models': models, 'end-to-end': end_to_end}[scenario]
+
+
+def drive(request, concurrency, duration, max_requests=None):
+    """Run request from concurrency threads until duration (or max_requests) is used up"""
+    counter = itertools.count()
+    stop = time.monotonic() + duration
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    transferred = [0]
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < stop:
+            n = next(counter)
+            if max_requests is not None and n >= max_requests:
+                break
+            started = time.perf_counter()
+            try:
+                status, size = request(session, n)
+            except Exception as e:
+                status, size = type(e).__name__, 0
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                transferred[0] += size
+        session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith('2'))
+    return {
+        'requests': len(latencies),
+        'errors': len(latencies) - ok,
+        'status_codes': statuses,
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(ok / wall, 2) if wall else None,
+        'transfer_mb_s': round(transferred[0] / wall / 1e6, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p95': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'max': round(latencies[-1] * 1000, 2) if latencies else None,
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None
+        }
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print per-case deltas against baseline; returns the cases that regressed"""
+    previous = {(r['scenario'], r['concurrency']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        base = previous.get((result['scenario'], result['concurrency']))
+        if base is None:
+            continue
+        p95, base_p95 = result['latency_ms']['p95'], base['latency_ms']['p95']
+        rps, base_rps = result['throughput_rps'], base['throughput_rps']
+        p95_change = (p95 / base_p95 - 1) if p95 and base_p95 else 0.0
+        rps_change = (rps / base_rps - 1) if rps is not None and base_rps else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        print(f"{result['scenario']:>13} c={result['concurrency']:<4} "
+              f"p95 {base_p95} -> {p95} ms ({p95_change:+.0%})  "
+              f"rps {base_rps} -> {rps} ({rps_change:+.0%})" + ('  REGRESSED' if regressed else ''),
+              file=sys.stderr)
+        if regressed:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(DEFAULT_SCENARIOS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario and concurrency')
+    parser.add_argument('--max-requests', type=int, help='stop a case early after this many requests')
+    parser.add_argument('--mode', choices=('inprocess', 'subprocess'), default='inprocess')
+    parser.add_argument('--workload', choices=sorted(WORKLOADS), default='instant')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='service setting, repeatable (e.g. TRACE_EXPORTER=none)')
+    parser.add_argument('--hunyuan-url', help='benchmark a running hunyuan3d instead of starting one')
+    parser.add_argument('--cad-url', help='benchmark a running cad_processor instead of starting one')
+    parser.add_argument('--workdir', help='service working directory (default: a temporary one)')
+    parser.add_argument('--save', help='write results as a JSON baseline to this file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p95 increase / throughput drop (default 0.2)')
+    parser.add_argument('--serve', choices=sorted(SERVICES), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_forever(args.serve, args.port)
+        return
+
+    # The in-process services chdir into the workdir
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    cwd = os.getcwd()
+
+    env = {**DEFAULT_ENV, **WORKLOADS[args.workload]}
+    env.update(item.split('=', 1) for item in args.env)
+    external = bool(args.hunyuan_url or args.cad_url)
+    if external and not (args.hunyuan_url and args.cad_url):
+        parser.error('--hunyuan-url and --cad-url go together')
+
+    tmp = None if args.workdir else tempfile.TemporaryDirectory(prefix='bench-http-')
+    workdir = os.path.abspath(args.workdir or tmp.name)
+    os.makedirs(workdir, exist_ok=True)
+    services = Services('external' if external else args.mode, workdir, env,
+                        hunyuan_url=args.hunyuan_url, cad_url=args.cad_url)
+    results = []
+    try:
+        fixtures = Fixtures(services, workdir)
+        for scenario in args.scenarios:
+            request = make_request(scenario, fixtures)
+            for concurrency in args.concurrency:
+                result = {'scenario': scenario, 'concurrency': concurrency,
+                          **drive(request, concurrency, args.duration, args.max_requests),
+                          'memory': services.memory()}
+                # Jobs queued by this case would otherwise slow down the next one
+                result['drain_s'] = drain(services)
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    finally:
+        services.close()
+        os.chdir(cwd)
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'mode': 'external' if external else args.mode,
+            'workload': args.workload,
+            'env': env,
+            'duration': args.duration
+        },
+        'results': results
+    }
+    print(json.dumps(report, indent=2))
+    if save_path:
+        Path(save_path).write_text(json.dumps(report, indent=2))
+    if compare_path:
+        regressions = compare(results, json.loads(Path(compare_path).read_text()), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark mesh loading across file sizes and formats.
+
+For each triangle count a sphere is written as binary STL, ASCII STL and OBJ,
+then loaded with pipeline.mesh.load_mesh and with a per-line reference
+parser (split every line in Python). Each load runs in a fresh child process
+so peak RSS is per load.
+
+    python benchmarks/bench_mesh_io.py --triangles 10000 100000 1000000
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.mesh import Mesh, load_mesh, uv_sphere
+
+
+def write_ascii_stl(mesh, path):
+    triangles = mesh.vertices[mesh.faces]
+    normals = mesh.face_normals()
+    with open(path, 'w') as f:
+        f.write('solid bench\n')
+        rows = np.hstack([normals, triangles.reshape(-1, 9)])
+        np.savetxt(f, rows, fmt=('facet normal %.6e %.6e %.6e\n outer loop\n'
+                                 '  vertex %.6e %.6e %.6e\n  vertex %.6e %.6e %.6e\n  vertex %.6e %.6e %.6e\n'
+                                 ' endloop\nendfacet'))
+        f.write('endsolid bench\n')
+
+
+def reference_load(path):
+    # What a straightforward parser does: split and convert every line
+    vertices, faces = [], []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] in ('v', 'vertex'):
+                vertices.append([float(x) for x in parts[1:4]])
+            elif parts[0] == 'f':
+                faces.append([int(p.split('/')[0]) - 1 for p in parts[1:4]])
+    if not faces:
+        faces = [[i, i + 1, i + 2] for i in range(0, len(vertices), 3)]
+    return Mesh(vertices, faces)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure(loader, path):
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    mesh = reference_load(path) if loader == 'reference' else load_mesh(path)
+    elapsed = time.perf_counter() - started
+    return {'faces': mesh.face_count, 'total_s': round(elapsed, 3),
+            'faces_per_s': round(mesh.face_count / elapsed) if elapsed else None,
+            'peak_rss_delta_mb': round(peak_rss_mb() - baseline, 1),
+            'mesh_mb': round(mesh.nbytes / 1e6, 1)}
+
+
+def run_case(loader, path):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(measure, loader, path).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--triangles', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--skip-reference', action='store_true', help='only time load_mesh')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for triangles in args.triangles:
+            segments = max(4, int(math.sqrt(triangles)))
+            mesh = uv_sphere(segments, max(2, triangles // (2 * segments)))
+            files = {
+                'stl-binary': os.path.join(tmp, 'mesh.stl'),
+                'stl-ascii': os.path.join(tmp, 'mesh_ascii.stl'),
+                'obj': os.path.join(tmp, 'mesh.obj')
+            }
+            mesh.save(files['stl-binary'])
+            write_ascii_stl(mesh, files['stl-ascii'])
+            Mesh(mesh.vertices, mesh.faces).save(files['obj'])
+
+            for file_format, path in files.items():
+                loaders = ['load_mesh'] if args.skip_reference or file_format == 'stl-binary' \
+                    else ['load_mesh', 'reference']
+                for loader in loaders:
+                    result = run_case(loader, path)
+                    result.update({'format': file_format, 'loader': loader,
+                                   'file_mb': round(os.path.getsize(path) / 1e6, 1)})
+                    results.append(result)
+                    print(json.dumps(result), file=sys.stderr)
+
+    print(json.dumps({'results': results}, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps({'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
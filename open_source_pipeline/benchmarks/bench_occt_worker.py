@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark persistent DRAWEXE workers against spawning DRAWEXE per file.
+
+Uses the real DRAWEXE when it is on PATH, otherwise the fake_drawexe.tcl
+stand-in (start-up cost via FAKE_DRAWEXE_STARTUP_MS, per-file cost via
+FAKE_DRAWEXE_WORK_MS).
+
+    python benchmarks/bench_occt_worker.py --files 50 --workers 2
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.occt_worker import DrawWorkerPool, spawn_convert
+
+
+def resolve_command(command):
+    if command:
+        return command.split()
+    if shutil.which('DRAWEXE'):
+        return ['DRAWEXE']
+    return ['tclsh', str(Path(__file__).with_name('fake_drawexe.tcl'))]
+
+
+def summarize(name, latencies, total):
+    return {
+        'mode': name,
+        'files': len(latencies),
+        'total_s': round(total, 3),
+        'files_per_s': round(len(latencies) / total, 2) if total else None,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p95_ms': round(sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000, 2)
+    }
+
+
+def run_spawn(command, inputs, out_dir, workers):
+    def convert(path):
+        started = time.perf_counter()
+        spawn_convert(path, out_dir / f"{path.stem}.step", command=command, timeout=300)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(convert, inputs))
+    return summarize('spawn-per-file', latencies, time.perf_counter() - started)
+
+
+def run_pool(command, inputs, out_dir, workers, max_jobs):
+    pool = DrawWorkerPool(size=workers, command=command, max_jobs=max_jobs)
+
+    def convert(path):
+        return pool.convert(path, out_dir / f"{path.stem}.step", timeout=300)['elapsed']
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(convert, inputs))
+    total = time.perf_counter() - started
+    pool.shutdown()
+    summary = summarize('persistent-pool', latencies, total)
+    summary['recycled'] = pool.recycled
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-jobs', type=int, default=200, help='recycle workers after N jobs')
+    parser.add_argument('--command', help='converter command (default: DRAWEXE or the tclsh stand-in)')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    command = resolve_command(args.command)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs = []
+        for i in range(args.files):
+            path = tmp / f"drawing_{i}.dwg"
+            path.write_bytes(b'\0' * 4096)
+            inputs.append(path)
+        out_dir = tmp / 'out'
+        out_dir.mkdir()
+
+        results = [
+            run_spawn(command, inputs, out_dir, args.workers),
+            run_pool(command, inputs, out_dir, args.workers, args.max_jobs)
+        ]
+
+    speedup = results[0]['total_s'] / results[1]['total_s'] if results[1]['total_s'] else None
+    report = {'command': command, 'workers': args.workers, 'results': results,
+              'speedup': round(speedup, 2) if speedup else None}
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark vector extraction against rasterization on a multi-page drawing set.
+
+Generates a synthetic architectural PDF (grid lines, walls as polylines,
+door swings as arcs) unless --pdf is given, then runs each path in a fresh
+child process so peak RSS is measured per mode.
+
+    python benchmarks/bench_pdf_vector.py --pages 20 --paths 2000 --dpi 150
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.pdf_raster import _open_pdf, iter_pdf_pages
+from pipeline.pdf_vector import iter_pdf_drawings
+
+
+def make_drawing_set(path, pages, paths_per_page, seed=0):
+    fitz, doc = _open_pdf(None)
+    rng = random.Random(seed)
+    for _ in range(pages):
+        page = doc.new_page(width=1684, height=1191)  # A1 landscape
+        shape = page.new_shape()
+        for i in range(paths_per_page):
+            x, y = rng.uniform(20, 1600), rng.uniform(20, 1100)
+            choice = i % 3
+            if choice == 0:
+                shape.draw_line((x, y), (x + rng.uniform(-60, 60), y + rng.uniform(-60, 60)))
+            elif choice == 1:
+                shape.draw_polyline([(x, y), (x + 40, y), (x + 40, y + 25), (x + 80, y + 25)])
+            else:
+                shape.draw_sector((x, y), (x + 30, y), 90)
+            shape.finish(width=0.5, color=(0, 0, 0))
+        shape.commit()
+    doc.save(path)
+    doc.close()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def dir_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def run_mode(mode, pdf_path, out_dir, dpi):
+    # Runs in a child process so ru_maxrss reflects this mode only
+    started = time.perf_counter()
+    if mode == 'raster':
+        pages = list(iter_pdf_pages(pdf_path, out_dir, dpi=dpi, max_workers=1))
+    else:
+        pages = list(iter_pdf_drawings(pdf_path, out_dir, dpi=dpi))
+    elapsed = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'pages': len(pages),
+        'vector_pages': sum(1 for p in pages if p.get('mode') == 'vector'),
+        'total_s': round(elapsed, 3),
+        'ms_per_page': round(elapsed * 1000 / max(1, len(pages)), 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'output_mb': round(dir_bytes(out_dir) / 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf', help='existing PDF to benchmark (default: generate one)')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--paths', type=int, default=2000, help='paths per generated page')
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix='bench_pdf_'))
+    try:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = str(tmp / 'drawings.pdf')
+            make_drawing_set(pdf_path, args.pages, args.paths)
+
+        results = []
+        for mode in ('raster', 'vector'):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_mode, mode, pdf_path, str(tmp / mode), args.dpi).result())
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    raster, vector = results
+    report = {
+        'pdf': args.pdf or f"generated ({args.pages} pages x {args.paths} paths)",
+        'pdf_mb': round(os.path.getsize(pdf_path) / 1e6, 2) if args.pdf else None,
+        'dpi': args.dpi,
+        'results': results,
+        'speedup': round(raster['total_s'] / vector['total_s'], 2) if vector['total_s'] else None
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Fixtures and options for the pytest-benchmark geometry suite
+(test_geometry_kernels.py).
+
+Every input is synthetic and generated on first use into one session
+temp directory, so the suite runs offline. Sizes come from the command line:
+
+    pytest benchmarks/test_geometry_kernels.py --bench-triangles 10k 100k 1m 10m
+"""
+
+import functools
+import math
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench_dxf_reader import make_dxf
+from bench_mesh_io import write_ascii_stl
+from bench_pdf_vector import make_drawing_set
+from pipeline.mesh import Mesh, uv_sphere
+
+# Text meshes above this size run to gigabytes on disk
+TEXT_FORMAT_MAX_TRIANGLES = 2_000_000
+
+
+def parse_count(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = str(text).strip().lower()
+    scale = {'k': 10 ** 3, 'm': 10 ** 6}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def count_label(count):
+    for suffix, scale in (('m', 10 ** 6), ('k', 10 ** 3)):
+        if count >= scale and count % scale == 0:
+            return f"{count // scale}{suffix}"
+    return str(count)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('geometry benchmarks')
+    group.addoption('--bench-triangles', nargs='+', default=['10k', '100k', '1m'],
+                    help='mesh sizes for parsing, welding, encoding and hashing (up to 10m)')
+    group.addoption('--bench-decimate-triangles', nargs='+', default=['10k', '50k'],
+                    help='mesh sizes for QEM decimation (its collapse loop is Python)')
+    group.addoption('--bench-dxf-entities', nargs='+', default=['10k', '100k'])
+    group.addoption('--bench-pdf-pages', nargs='+', default=['4', '16'],
+                    help='pages of 2000 vector paths each')
+    group.addoption('--bench-no-memory', action='store_true',
+                    help='skip the tracemalloc pass that records peak memory')
+
+
+def pytest_generate_tests(metafunc):
+    options = {
+        'triangles': '--bench-triangles',
+        'decimate_triangles': '--bench-decimate-triangles',
+        'dxf_entities': '--bench-dxf-entities',
+        'pdf_pages': '--bench-pdf-pages'
+    }
+    for name, option in options.items():
+        if name in metafunc.fixturenames:
+            counts = [parse_count(c) for c in metafunc.config.getoption(option)]
+            metafunc.parametrize(name, counts, ids=[count_label(c) for c in counts])
+
+
+class Assets:
+    """Synthetic inputs, generated once per session and size"""
+
+    def __init__(self, root):
+        self.root = root
+
+    @functools.lru_cache(maxsize=None)
+    def sphere(self, triangles):
+        segments = max(4, int(math.sqrt(triangles)))
+        return uv_sphere(segments, max(2, triangles // (2 * segments)))
+
+    @functools.lru_cache(maxsize=None)
+    def soup(self, triangles):
+        """The sphere as an unwelded triangle soup, as STL exporters write it"""
+        mesh = self.sphere(triangles)
+        corners = mesh.vertices[mesh.faces].reshape(-1, 3)
+        return Mesh(corners, np.arange(len(corners), dtype=np.int32).reshape(-1, 3))
+
+    @functools.lru_cache(maxsize=None)
+    def mesh_file(self, triangles, file_format):
+        if file_format != 'stl-binary' and triangles > TEXT_FORMAT_MAX_TRIANGLES:
+            pytest.skip(f"{file_format} capped at {count_label(TEXT_FORMAT_MAX_TRIANGLES)} triangles")
+        mesh = self.sphere(triangles)
+        path = self.root / f"sphere_{triangles}_{file_format}.{'obj' if file_format == 'obj' else 'stl'}"
+        if file_format == 'stl-ascii':
+            write_ascii_stl(mesh, path)
+        else:
+            Mesh(mesh.vertices, mesh.faces).save(str(path))
+        return str(path)
+
+    @functools.lru_cache(maxsize=None)
+    def dxf(self, entities):
+        path = self.root / f"drawing_{entities}.dxf"
+        make_dxf(str(path), entities)
+        return str(path)
+
+    @functools.lru_cache(maxsize=None)
+    def pdf(self, pages, paths_per_page=2000):
+        path = self.root / f"drawing_set_{pages}.pdf"
+        make_drawing_set(str(path), pages, paths_per_page)
+        return str(path)
+
+
+@pytest.fixture(scope='session')
+def assets(tmp_path_factory):
+    return Assets(tmp_path_factory.mktemp('geometry-assets'))
+
+
+def peak_memory_mb(fn, *args):
+    """Peak Python + numpy heap allocated by one call of fn"""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1e6, 2)
+
+
+@pytest.fixture
+def measure(benchmark, request):
+    """
+    measure(fn, *args, rounds=None, **info): benchmark fn(*args) and record
+    its peak memory (from a separate, untimed tracemalloc run) plus info in
+    the benchmark's extra_info. rounds pins the round count for slow kernels;
+    otherwise pytest-benchmark calibrates it.
+    """
+    def run(fn, *args, rounds=None, **info):
+        benchmark.extra_info.update(info)
+        if not request.config.getoption('--bench-no-memory'):
+            benchmark.extra_info['peak_mb'] = peak_memory_mb(fn, *args)
+        if rounds is None:
+            return benchmark(fn, *args)
+        return benchmark.pedantic(fn, args, rounds=rounds, iterations=1)
+    return run
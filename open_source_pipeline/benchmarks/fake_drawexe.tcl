@@ -0,0 +1,35 @@
+# Stand-in for OpenCascade DRAWEXE used by the benchmarks when OCCT is not
+# installed: pays a configurable start-up cost (library load), then
+# implements `read`/`write` as a copy with a configurable per-file cost.
+#
+#   tclsh fake_drawexe.tcl            persistent mode, commands on stdin
+#   tclsh fake_drawexe.tcl -c SCRIPT  one-shot mode, like `DRAWEXE -c`
+
+set startup_ms [expr {[info exists env(FAKE_DRAWEXE_STARTUP_MS)] ? $env(FAKE_DRAWEXE_STARTUP_MS) : 300}]
+set work_ms [expr {[info exists env(FAKE_DRAWEXE_WORK_MS)] ? $env(FAKE_DRAWEXE_WORK_MS) : 20}]
+after $startup_ms
+
+set ::current ""
+rename read _tcl_read
+proc read {path} {
+    if {![file exists $path]} { error "cannot read $path" }
+    set ::current $path
+}
+proc write {path} {
+    after $::work_ms
+    file copy -force $::current $path
+}
+
+if {[lindex $argv 0] eq "-c"} {
+    eval [lindex $argv 1]
+}
+
+fconfigure stdout -buffering line
+set buffer ""
+while {[gets stdin line] >= 0} {
+    append buffer $line "\n"
+    if {[info complete $buffer]} {
+        if {[catch {uplevel #0 $buffer} err]} { puts "error: $err" }
+        set buffer ""
+    }
+}
@@ -0,0 +1,93 @@
+"""
+Micro-benchmarks of the geometry kernels behind process_cad_file and the
+hunyuan3d model writer: parsing (STL/OBJ, DXF, vector PDF), welding, QEM
+decimation, GLB encoding and content hashing.
+
+Run with pytest-benchmark (see conftest.py for the size options):
+
+    pytest benchmarks/test_geometry_kernels.py --benchmark-autosave
+    pytest benchmarks/test_geometry_kernels.py --benchmark-compare
+
+Each benchmark's extra_info carries the input size and the peak heap of one
+call (tracemalloc, measured outside the timed rounds).
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from pipeline.decimate import decimate
+from pipeline.dxf_reader import read_dxf
+from pipeline.glb_codec import COMPRESSION_MODES, uncompressed_size, write_compressed_glb
+from pipeline.hashing import hash_file
+from pipeline.mesh import load_mesh
+from pipeline.mesh_ops import weld
+from pipeline.pdf_vector import iter_pdf_drawings
+
+MESH_FORMATS = ('stl-binary', 'stl-ascii', 'obj')
+
+
+def rounds_for(triangles):
+    """Fixed round counts for sizes where calibration would take minutes"""
+    if triangles >= 5_000_000:
+        return 1
+    if triangles >= 1_000_000:
+        return 3
+    return None
+
+
+@pytest.mark.parametrize('file_format', MESH_FORMATS)
+def test_parse_mesh(measure, assets, triangles, file_format):
+    path = assets.mesh_file(triangles, file_format)
+    mesh = measure(load_mesh, path, rounds=rounds_for(triangles),
+                   triangles=triangles, file_mb=round(os.path.getsize(path) / 1e6, 1))
+    assert mesh.face_count == assets.sphere(triangles).face_count
+
+
+def test_parse_dxf(measure, assets, dxf_entities):
+    path = assets.dxf(dxf_entities)
+    geometry = measure(read_dxf, path, rounds=3, entities=dxf_entities,
+                       file_mb=round(os.path.getsize(path) / 1e6, 1))
+    assert geometry.entity_count == dxf_entities
+
+
+def test_parse_pdf_vectors(measure, assets, pdf_pages, tmp_path):
+    path = assets.pdf(pdf_pages)
+
+    def extract():
+        return list(iter_pdf_drawings(path, str(tmp_path), raster_fallback=False))
+
+    pages = measure(extract, rounds=3, pages=pdf_pages)
+    assert all(page['mode'] == 'vector' for page in pages)
+
+
+def test_weld(measure, assets, triangles):
+    soup = assets.soup(triangles)
+    welded, report = measure(weld, soup, rounds=rounds_for(triangles),
+                             triangles=triangles, vertices_in=soup.vertex_count)
+    assert welded.vertex_count < soup.vertex_count
+
+
+def test_decimate(measure, assets, decimate_triangles):
+    mesh = assets.sphere(decimate_triangles)
+    result = measure(decimate, mesh, 0.5, rounds=1, triangles=decimate_triangles)
+    assert result.face_count <= mesh.face_count // 2
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_MODES)
+def test_encode_glb(measure, assets, triangles, compression, tmp_path):
+    mesh = assets.sphere(triangles)
+    path = str(tmp_path / 'model.glb')
+    report = measure(write_compressed_glb, mesh, path, compression, rounds=rounds_for(triangles),
+                     triangles=triangles, raw_mb=round(uncompressed_size(mesh) / 1e6, 1))
+    assert report['size'] > 0
+
+
+def test_hash_file(measure, assets, triangles):
+    path = assets.mesh_file(triangles, 'stl-binary')
+    size = os.path.getsize(path)
+    digest = measure(hash_file, path, rounds=rounds_for(triangles), file_mb=round(size / 1e6, 1))
+    assert len(digest.hexdigest()) == 64
+
@@ -1,13 +1,39 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import os
-import json
+import sys
+import hashlib
 import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-import tempfile
-import subprocess
+from werkzeug.formparser import parse_form_data
 from werkzeug.utils import secure_filename
 
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Shared pipeline modules live next to the service directories
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.hashing import digest_inputs, is_remote, within_dirs
+from pipeline.singleflight import SingleFlight
+from pipeline.parallel import ProcessPool, default_workers, in_pool_worker, run_ordered
+from pipeline.scheduler import WorkerPool, QueueFullError
+from pipeline.job_store import create_job_store
+from pipeline.events import JobEvents, stream_job_events
+from pipeline.dxf_reader import read_dxf
+from pipeline.mesh import MESH_FORMATS, Mesh, load_mesh
+from pipeline.mesh_ops import weld
+from pipeline.uploads import UploadTooLarge, UploadWriter, copy_stream, find_upload
+from pipeline.metrics import observe_request, observe_stage, pool_observer, render as render_metrics, stage
+from pipeline.tracing import Tracer, create_span_exporter, parse_traceparent
+
 app = Flask(__name__)
 CORS(app)
 
@@ -16,49 +42,357 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
+SERVICE_NAME = 'cad_processor'
 UPLOAD_FOLDER = 'uploads'
 PROCESSED_FOLDER = 'processed'
+JOBS_FOLDER = 'jobs'
+# Local input paths are only read from these directories; URLs and upload ids go elsewhere
+CAD_INPUT_DIRS = [d for d in os.getenv('CAD_INPUT_DIRS', UPLOAD_FOLDER).split(os.pathsep) if d]
 ALLOWED_EXTENSIONS = {'pdf', 'dwg', 'dxf', 'step', 'stp', 'iges', 'igs', 'stl', 'obj'}
+CAD_PARALLEL_WORKERS = int(os.getenv('CAD_PARALLEL_WORKERS', str(default_workers())))
+CAD_MAX_CONCURRENT_JOBS = int(os.getenv('CAD_MAX_CONCURRENT_JOBS', os.getenv('MAX_CONCURRENT_JOBS', '5')))
+CAD_MAX_QUEUED_JOBS = int(os.getenv('CAD_MAX_QUEUED_JOBS', str(CAD_MAX_CONCURRENT_JOBS * 4)))
+JOB_STORE = os.getenv('JOB_STORE', 'sqlite')
+CAD_JOB_DB_PATH = os.getenv('CAD_JOB_DB_PATH', os.path.join(JOBS_FOLDER, 'cad_jobs.db'))
+JOB_PROGRESS_FLUSH_INTERVAL = float(os.getenv('JOB_PROGRESS_FLUSH_INTERVAL', '1.0'))
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '1.0'))
+EVENTS_MAX_DURATION = float(os.getenv('EVENTS_MAX_DURATION', '3600'))
+# Each open /events stream holds a server thread; keep well below gunicorn's threads
+EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', '8'))
+# Weld coincident vertices of converted meshes; tolerance 0 = 1e-6 of the bbox diagonal
+MESH_WELD = os.getenv('MESH_WELD', '1') != '0'
+MESH_WELD_TOLERANCE = float(os.getenv('MESH_WELD_TOLERANCE', '0')) or None
+# Per-file upload limit (same 50 MB as validate_cad_file); multipart framing gets a little slack
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+MULTIPART_OVERHEAD = 64 * 1024
+# Stand-in duration of the (not yet implemented) OpenCascade conversion; benchmarks set 0
+SIMULATED_CONVERT_SECONDS = float(os.getenv('SIMULATED_CONVERT_SECONDS', '2'))
+# Spans: jsonl (TRACE_FILE, read back by hunyuan3d's /jobs/<id>/timeline), otlp or none
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'jsonl')
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(JOBS_FOLDER, 'traces.jsonl'))
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT')
+TRACE_OTLP_TOKEN = os.getenv('TRACE_OTLP_TOKEN')
+TRACE_FILE_MAX_BYTES = int(os.getenv('TRACE_FILE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Polling routes are traced when the caller sends a traceparent, otherwise sampled
+POLLING_ROUTES = {'/status', '/status/<job_id>', '/result/<job_id>', '/events/<job_id>'}
+TRACE_POLL_SAMPLE_RATE = float(os.getenv('TRACE_POLL_SAMPLE_RATE', '0.01'))
+UNTRACED_PATHS = {'/health', '/metrics'}
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+os.makedirs(JOBS_FOLDER, exist_ok=True)
+
+# Identical /process-cad requests in flight share a single conversion
+cad_flight = SingleFlight()
+
+# Per-file conversions fan out onto worker processes (created on first use)
+cad_pool = ProcessPool(CAD_PARALLEL_WORKERS) if CAD_PARALLEL_WORKERS > 1 else None
+
+# Asynchronous /process-cad jobs: bounded executor + persistent job store
+job_pool = WorkerPool(CAD_MAX_CONCURRENT_JOBS, CAD_MAX_QUEUED_JOBS, name='cad-job',
+                      on_change=pool_observer(SERVICE_NAME))
+job_store = create_job_store(JOB_STORE, CAD_JOB_DB_PATH, flush_interval=JOB_PROGRESS_FLUSH_INTERVAL)
+# Pool workers import this module too; only the serving process recovers jobs
+if not in_pool_worker(__name__):
+    interrupted = job_store.recover_interrupted()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} interrupted CAD job(s) as failed")
+job_events = JobEvents()
+event_stream_slots = threading.BoundedSemaphore(EVENTS_MAX_STREAMS)
+
+# Request and conversion spans, continued from the caller's traceparent header
+tracer = Tracer(SERVICE_NAME, create_span_exporter(TRACE_EXPORTER, TRACE_FILE, TRACE_OTLP_ENDPOINT,
+                                                    TRACE_FILE_MAX_BYTES, TRACE_OTLP_TOKEN))
+
+@contextmanager
+def traced_stage(name, context=None, **attributes):
+    """Time a processing stage as both a metric and a span"""
+    with stage(SERVICE_NAME, name), tracer.span(name, context, **attributes):
+        yield
 
 def allowed_file(filename):
     return '.' in filename and            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def output_path_for(filepath, output_format):
+    """
+    processed_<stem>_<input digest>.<format>: inputs that share a file name
+    (a/part.dxf, b/part.dxf) in one parallel batch get separate outputs
+    """
+    digest = hashlib.sha256(str(filepath).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(PROCESSED_FOLDER, f"processed_{Path(filepath).stem}_{digest}.{output_format}")
+
+@contextmanager
+def atomic_output(path):
+    """Yield a temporary sibling of path that replaces it once fully written"""
+    root, extension = os.path.splitext(path)
+    tmp_path = f"{root}.{uuid.uuid4().hex[:8]}.tmp{extension}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def process_dxf_file(filepath, output_format='obj'):
+    """Read DXF modelspace in-process and write its entities as polylines"""
+    geometry = read_dxf(filepath)
+    output_path = output_path_for(filepath, 'npz' if output_format == 'npz' else 'obj')
+    with atomic_output(output_path) as tmp_path:
+        if output_format == 'npz':
+            geometry.save(tmp_path)
+        else:
+            geometry.write_obj(tmp_path)
+    
+    return {
+        'success': True,
+        'processed_file': output_path,
+        'vertices': geometry.vertex_count,
+        'faces': 0,
+        'entities': geometry.entity_count,
+        'layers': len(geometry.layers),
+        'size': os.path.getsize(output_path)
+    }
+
 def process_cad_file(filepath, output_format='obj'):
     """Process CAD file using OpenCascade"""
     try:
-        # This is a placeholder for OpenCascade processing
-        # In real implementation, use python-opencascade
+        if not is_remote(filepath) and os.path.basename(filepath) == filepath:
+            # A bare file name refers to the upload directory
+            filepath = os.path.join(UPLOAD_FOLDER, filepath)
+        if not is_remote(filepath) and not within_dirs(filepath, CAD_INPUT_DIRS):
+            return {'success': False, 'error': 'Input path is outside the allowed input directories'}
+        
+        # URLs are not downloaded yet: whatever their type, they take the simulated conversion
+        local = not is_remote(filepath)
+        extension = Path(filepath).suffix.lower().lstrip('.')
+        if local and extension == 'dxf':
+            return process_dxf_file(filepath, output_format)
+        
+        output_path = output_path_for(filepath, output_format)
         
-        output_path = os.path.join(PROCESSED_FOLDER, 
-                                 f"processed_{Path(filepath).stem}.{output_format}")
+        if local and extension in MESH_FORMATS:
+            # Already a mesh: convert between formats
+            mesh = load_mesh(filepath)
+        else:
+            # This is a placeholder for OpenCascade processing
+            # In real implementation, use python-opencascade
+            time.sleep(SIMULATED_CONVERT_SECONDS)
+            mesh = Mesh.empty()
         
-        # Simulate processing
-        import time
-        time.sleep(2)
+        weld_report = None
+        if MESH_WELD and mesh.face_count:
+            mesh, weld_report = weld(mesh, tolerance=MESH_WELD_TOLERANCE)
         
-        # Create dummy output file for demo
-        with open(output_path, 'w') as f:
-            f.write("# Processed CAD file\n")
-            f.write("# OpenCascade processing placeholder\n")
+        with atomic_output(output_path) as tmp_path:
+            mesh.save(tmp_path, output_format)
         
         return {
             'success': True,
             'processed_file': output_path,
-            'vertices': 1000,
-            'faces': 500,
-            'size': os.path.getsize(output_path)
+            'vertices': mesh.vertex_count,
+            'faces': mesh.face_count,
+            'size': os.path.getsize(output_path),
+            'weld': weld_report
         }
     except Exception as e:
         logger.error(f"Error processing CAD file: {str(e)}")
         return {'success': False, 'error': str(e)}
 
+class CADJob:
+    def __init__(self, job_id, input_data, dedupe_key=None):
+        self.id = job_id
+        self.input_data = input_data
+        self.dedupe_key = dedupe_key
+        self.status = 'pending'
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.completed_at = None
+        self._files_done = 0
+    
+    def to_record(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'input_data': self.input_data,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
+            'dedupe_key': self.dedupe_key
+        }
+    
+    def update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        job_store.update(self.id, **fields)
+        job_events.publish(self.id)
+    
+    def set_progress(self, progress):
+        self.progress = progress
+        job_store.set_progress(self.id, progress)
+        job_events.publish(self.id)
+    
+    def start(self):
+        """Queue the job on the worker pool (raises QueueFullError when saturated)"""
+        self.update(status='queued')
+        job_pool.submit(self.run)
+    
+    def _file_done(self, index, outcome):
+        self._files_done += 1
+        self.set_progress(int(100 * self._files_done / len(self.input_data['files'])))
+    
+    def run(self):
+        self.update(status='processing', started_at=time.time())
+        trace = self.input_data.get('trace')
+        tracer.record('queue', self.created_at, self.started_at - self.created_at, trace)
+        with tracer.span('job', trace, job_id=self.id) as span:
+            self.process(span.context())
+    
+    def process(self, trace):
+        try:
+            outcome = process_cad_files(self.input_data['files'],
+                                        parallel=self.input_data.get('parallel', True),
+                                        max_workers=self.input_data.get('max_workers'),
+                                        on_file_done=self._file_done,
+                                        trace=trace)
+            result = {**outcome, 'model_id': self.input_data.get('model_id', 'unknown')}
+            self.update(status='completed', result=result, completed_at=time.time(), progress=100)
+        except Exception as e:
+            logger.error(f"CAD job {self.id} failed: {str(e)}")
+            self.update(status='failed', error=str(e), completed_at=time.time())
+
+def submit_cad_job(data, key):
+    data['trace'] = request_trace()
+    job = CADJob(str(uuid.uuid4()), data, dedupe_key=key)
+    existing_id = job_store.create_or_attach(job.to_record())
+    if existing_id:
+        existing = job_store.get(existing_id)
+        return jsonify({
+            'success': True,
+            'job_id': existing_id,
+            'status': existing['status'] if existing else 'queued',
+            'coalesced': True,
+            'message': 'Attached to identical in-flight job'
+        }), 202
+    
+    try:
+        job.start()
+    except QueueFullError as e:
+        # Requests may already have attached to this id; give them a final state, not a 404
+        job.update(status='failed', error=f"rejected: {str(e)}", completed_at=time.time())
+        logger.warning(f"Rejected CAD job {job.id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'queue_depth': job_pool.queue_depth()
+        }), 429, {'Retry-After': str(e.retry_after)}
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'queue_depth': job_pool.queue_depth(),
+        'status_url': f"/status/{job.id}",
+        'message': 'CAD processing queued'
+    }), 202
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request.path in UNTRACED_PATHS:
+        return
+    # Continue the caller's trace (W3C traceparent) or start one
+    trace_id, parent_id = parse_traceparent(request.headers.get('traceparent'))
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if route in POLLING_ROUTES and trace_id is None and random.random() >= TRACE_POLL_SAMPLE_RATE:
+        return
+    g.span = tracer.start_span(f"{request.method} {route}", trace_id, parent_id, path=request.path)
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed bodies (/events) are timed up to the first byte
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.get('request_started', time.perf_counter())
+    observe_request(SERVICE_NAME, request.method, route, response.status_code,
+                    time.perf_counter() - started,
+                    bytes_in=request.content_length, bytes_out=response.content_length)
+    span = g.get('span')
+    if span is not None:
+        span.attributes['status'] = response.status_code
+        response.headers['X-Trace-Id'] = span.trace_id
+        response.call_on_close(lambda: tracer.end_span(span))
+    return response
+
+def request_trace():
+    """Trace context of the current request's span"""
+    span = g.get('span')
+    return span.context() if span is not None else None
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'service': 'cad_processor'})
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    rendered = render_metrics()
+    if rendered is None:
+        return jsonify({'success': False, 'error': 'prometheus_client is not installed'}), 503
+    body, content_type = rendered
+    return Response(body, content_type=content_type)
+
+def process_cad_files(files, parallel=True, max_workers=None, on_file_done=None, trace=None):
+    """Convert every file of a /process-cad request, keeping input order"""
+    started = time.perf_counter()
+    # In real implementation, download file from URL
+    # For now, simulate processing
+    pool = cad_pool if parallel else None
+    with traced_stage('validate', trace):
+        # Content ids returned by /upload resolve to the stored file
+        paths = [find_upload(UPLOAD_FOLDER, f, ALLOWED_EXTENSIONS) or f for f in files]
+    outcomes = run_ordered(process_cad_file, paths, pool=pool, max_in_flight=max_workers,
+                           on_result=on_file_done)
+    
+    processed_files = []
+    failed_files = []
+    for file_url, outcome in zip(files, outcomes):
+        # Conversions may run in worker processes; their wall time is measured there
+        observe_stage(SERVICE_NAME, 'convert', outcome['elapsed'])
+        tracer.record('convert', outcome.get('started_at', time.time() - outcome['elapsed']),
+                      outcome['elapsed'], trace, file=str(file_url), error=outcome['error'] or '')
+        result = outcome['value'] or {'success': False, 'error': outcome['error']}
+        if result['success']:
+            processed_files.append({
+                'original_url': file_url,
+                'processed_path': result['processed_file'],
+                'processing_time': outcome['elapsed'],
+                'metadata': {
+                    'vertices': result['vertices'],
+                    'faces': result['faces'],
+                    'size': result['size']
+                }
+            })
+        else:
+            failed_files.append({
+                'original_url': file_url,
+                'error': result['error'],
+                'processing_time': outcome['elapsed']
+            })
+    
+    return {
+        'processed_files': processed_files,
+        'failed_files': failed_files,
+        'timing': {
+            'total': time.perf_counter() - started,
+            'parallel': pool is not None,
+            'workers': min(max_workers or CAD_PARALLEL_WORKERS, CAD_PARALLEL_WORKERS) if pool else 1
+        }
+    }
+
 @app.route('/process-cad', methods=['POST'])
 def process_cad():
     try:
@@ -69,31 +403,150 @@ def process_cad():
         if not files:
             return jsonify({'success': False, 'error': 'No files provided'})
         
-        processed_files = []
-        for file_url in files:
-            # In real implementation, download file from URL
-            # For now, simulate processing
-            result = process_cad_file(file_url)
-            if result['success']:
-                processed_files.append({
-                    'original_url': file_url,
-                    'processed_path': result['processed_file'],
-                    'metadata': {
-                        'vertices': result['vertices'],
-                        'faces': result['faces'],
-                        'size': result['size']
-                    }
-                })
+        parallel = bool(data.get('parallel', True))
+        max_workers = data.get('max_workers')
+        
+        key = digest_inputs(files, {'output_format': 'obj'}, CAD_INPUT_DIRS)
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            return submit_cad_job(data, key)
+        
+        outcome, coalesced = cad_flight.do(key, process_cad_files, files,
+                                           parallel=parallel, max_workers=max_workers,
+                                           trace=request_trace())
+        if coalesced:
+            logger.info(f"Coalesced /process-cad for model {model_id} into an in-flight conversion")
         
         return jsonify({
             'success': True,
-            'processed_files': processed_files,
-            'model_id': model_id
+            **outcome,
+            'model_id': model_id,
+            'coalesced': coalesced
         })
     except Exception as e:
         logger.error(f"Error in process_cad: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+def upload_response(upload, filename):
+    if upload['duplicate']:
+        logger.info(f"Upload {filename} matches stored content {upload['content_id']}")
+    return jsonify({'success': True, 'filename': filename, **upload}), 201
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    """
+    Stream a CAD file into UPLOAD_FOLDER, hashing it on the way in.
+    
+    Accepts multipart/form-data (field 'file') or a raw body with the name in
+    ?filename= or X-Filename. Returns the content id that /process-cad takes
+    in place of a file URL.
+    """
+    limit = MAX_UPLOAD_BYTES
+    if request.content_length and request.content_length > limit + MULTIPART_OVERHEAD:
+        return jsonify({'success': False, 'error': str(UploadTooLarge(limit))}), 413
+    
+    writers = []
+    try:
+        if request.mimetype == 'multipart/form-data':
+            def stream_factory(total_content_length, content_type, filename, content_length=None):
+                if not allowed_file(filename or ''):
+                    raise ValueError(f"Unsupported file type: {filename}")
+                writer = UploadWriter(UPLOAD_FOLDER, max_bytes=limit)
+                writers.append(writer)
+                return writer
+            
+            with traced_stage('upload', request_trace()):
+                _, _, files = parse_form_data(request.environ, stream_factory=stream_factory, silent=False)
+            storage = files.get('file')
+            if storage is None:
+                return jsonify({'success': False, 'error': "No 'file' field in upload"}), 400
+            filename = secure_filename(storage.filename)
+            writer = storage.stream
+        else:
+            filename = secure_filename(request.args.get('filename') or request.headers.get('X-Filename', ''))
+            if not allowed_file(filename):
+                return jsonify({'success': False, 'error': f"Unsupported file type: {filename or 'unnamed'}"}), 400
+            writer = UploadWriter(UPLOAD_FOLDER, max_bytes=limit)
+            writers.append(writer)
+            with traced_stage('upload', request_trace()):
+                copy_stream(request.stream, writer)
+        
+        upload = writer.finish(os.path.splitext(filename)[1])
+        return upload_response(upload, filename)
+    except UploadTooLarge as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Upload failed: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        for writer in writers:
+            writer.discard()
+
+@app.route('/status', methods=['GET'])
+def get_queue_status():
+    return jsonify({
+        'success': True,
+        'service': 'cad_processor',
+        **job_pool.stats()
+    })
+
+def job_snapshot(job_id):
+    """Status payload shared by /status/<job_id> and /events"""
+    job = job_store.get(job_id)
+    if not job:
+        return None
+    
+    return {
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'completed_at': job['completed_at']
+    }
+
+@app.route('/status/<job_id>', methods=['GET'])
+def get_status(job_id):
+    snapshot = job_snapshot(job_id)
+    if not snapshot:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify(snapshot)
+
+@app.route('/result/<job_id>', methods=['GET'])
+def get_result(job_id):
+    snapshot = job_snapshot(job_id)
+    if not snapshot:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    if snapshot['status'] == 'failed':
+        return jsonify({'success': False, 'job_id': job_id, 'error': snapshot['error']}), 500
+    if snapshot['status'] != 'completed':
+        # Not ready yet; same shape as /status so clients can keep waiting
+        return jsonify(snapshot), 202
+    
+    return jsonify({'success': True, 'job_id': job_id, **snapshot['result']})
+
+@app.route('/events/<job_id>', methods=['GET'])
+def job_events_stream(job_id):
+    """Push status/progress changes for one CAD job as Server-Sent Events"""
+    if not event_stream_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'Too many event streams open; poll /status/<job_id> instead'}), 503
+    
+    stream = stream_job_events([job_id], job_snapshot, job_events,
+                               poll_interval=EVENTS_POLL_INTERVAL,
+                               max_duration=EVENTS_MAX_DURATION)
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs even if the client leaves before the first frame
+    response.call_on_close(event_stream_slots.release)
+    return response
+
 @app.route('/recommendations', methods=['POST'])
 def get_recommendations():
     try:
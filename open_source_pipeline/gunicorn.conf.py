@@ -0,0 +1,39 @@
+"""
+gunicorn settings shared by cad_processor and hunyuan3d:
+
+    gunicorn -c gunicorn.conf.py --chdir cad_processor app:app
+
+Each service runs exactly one worker process. Job admission
+(MAX_CONCURRENT_JOBS / MAX_QUEUED_JOBS in WorkerPool), request coalescing
+and event wake-ups all live in that process, so a second worker would
+double the configured limits and split /status queue_depth between
+processes. Concurrent requests are served by the worker's threads instead;
+scale out by running more containers behind nginx, each with its own limits.
+
+When PROMETHEUS_MULTIPROC_DIR is set, the master empties it before the
+worker starts and drops an exited worker's live gauges (pipeline.metrics),
+so a restarted worker does not keep reporting its predecessor's queue.
+"""
+
+import glob
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = 1
+# Threads keep slow uploads and /events streams from blocking the worker
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+accesslog = '-'
+
+
+def on_starting(server):
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    from pipeline.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
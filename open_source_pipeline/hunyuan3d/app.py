@@ -1,13 +1,41 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import os
-import json
+import sys
+import hmac
+import io
 import logging
+import random
+import mimetypes
+import tempfile
 import time
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
-import subprocess
 import threading
+from werkzeug.utils import safe_join
+from werkzeug.wsgi import wrap_file
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Shared pipeline modules live next to the service directories
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.scheduler import WorkerPool, QueueFullError
+from pipeline.job_store import create_job_store
+from pipeline.events import JobEvents, stream_job_events
+from pipeline.result_cache import ResultCache, compute_cache_key
+from pipeline.hashing import file_etag
+from pipeline.mesh import uv_sphere
+from pipeline.decimate import build_lods
+from pipeline.glb_codec import COMPRESSION_MODES, write_compressed_glb
+from pipeline.profiler import PROFILE_FILENAME, JobProfiler
+from pipeline.metrics import observe_request, pool_observer, register_cache, render as render_metrics, stage
+from pipeline.tracing import (JsonlExporter, Tracer, create_span_exporter, from_otlp, parse_traceparent,
+                              waterfall)
 
 app = Flask(__name__)
 CORS(app)
@@ -17,19 +45,163 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
+SERVICE_NAME = 'hunyuan3d'
 MODELS_DIR = 'models'
 JOBS_DIR = 'jobs'
+CACHE_DIR = os.path.join(MODELS_DIR, 'cache')
+PUBLIC_URL = os.getenv('HUNYUAN3D_URL', 'http://localhost:8080')
+MODEL_EXTENSIONS = {'glb', 'gltf', 'obj', 'stl', 'fbx'}
+# Only input files under these directories are read (to hash them for the cache key)
+INPUT_DIRS = [d for d in os.getenv('INPUT_DIRS', os.pathsep.join(['uploads', 'processed'])).split(os.pathsep) if d]
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+mimetypes.add_type('model/gltf-binary', '.glb')
+
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '5'))
+MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', str(MAX_CONCURRENT_JOBS * 4)))
+JOB_STORE = os.getenv('JOB_STORE', 'sqlite')
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', os.path.join(JOBS_DIR, 'jobs.db'))
+JOB_PROGRESS_FLUSH_INTERVAL = float(os.getenv('JOB_PROGRESS_FLUSH_INTERVAL', '1.0'))
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '1.0'))
+EVENTS_MAX_DURATION = float(os.getenv('EVENTS_MAX_DURATION', '3600'))
+# Each open /events stream holds a server thread; keep well below gunicorn's threads
+EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', '8'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+# (segments, rings) of the full-resolution placeholder mesh
+PLACEHOLDER_RESOLUTION = (128, 64)
+# Decimated levels of detail written next to every model as <name>_lod<N>.glb
+MODEL_LOD_RATIOS = [float(r) for r in os.getenv('MODEL_LOD_RATIOS', '0.5,0.25,0.1').split(',') if r.strip()]
+# Level returned by default for options.mesh_resolution (or quality)
+RESOLUTION_LODS = {'high': 0, 'medium': 1, 'low': 2}
+# Seconds per simulated generation step (10 steps per job); benchmarks set 0
+SIMULATED_STEP_SECONDS = float(os.getenv('SIMULATED_STEP_SECONDS', '1'))
+# GLB encoding when a request sets no options.compression: none, quantize
+# (KHR_mesh_quantization) or meshopt (quantized + EXT_meshopt_compression).
+# Both compressed modes mark their extensions required, which loaders without
+# them cannot open, so compression is opt-in per request by default.
+MODEL_COMPRESSION = os.getenv('MODEL_COMPRESSION', 'none')
+# Spans: jsonl (TRACE_FILE, shared with cad_processor), otlp (TRACE_OTLP_ENDPOINT) or none
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'jsonl')
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(JOBS_DIR, 'traces.jsonl'))
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT')
+TRACE_OTLP_TOKEN = os.getenv('TRACE_OTLP_TOKEN')
+TRACE_FILE_MAX_BYTES = int(os.getenv('TRACE_FILE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Polling routes are traced when the caller sends a traceparent, otherwise sampled
+POLLING_ROUTES = {'/status', '/status/<job_id>', '/events', '/events/<job_id>', '/cache/stats'}
+TRACE_POLL_SAMPLE_RATE = float(os.getenv('TRACE_POLL_SAMPLE_RATE', '0.01'))
+# /v1/traces stand-in collector: disabled unless a shared bearer token is configured
+TRACE_COLLECTOR_TOKEN = os.getenv('TRACE_COLLECTOR_TOKEN')
+TRACE_COLLECTOR_MAX_BYTES = int(os.getenv('TRACE_COLLECTOR_MAX_BYTES', str(4 * 1024 * 1024)))
+UNTRACED_PATHS = {'/health', '/metrics', '/v1/traces'}
+# Stack sampling: options.profile profiles a whole job; any job still running after
+# PROFILE_SLOW_FACTOR x the average job duration (at least PROFILE_SLOW_MIN_SECONDS)
+# is profiled from then on. PROFILE_SLOW_FACTOR=0 turns the automatic mode off.
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+PROFILE_SLOW_FACTOR = float(os.getenv('PROFILE_SLOW_FACTOR', '10'))
+PROFILE_SLOW_MIN_SECONDS = float(os.getenv('PROFILE_SLOW_MIN_SECONDS', '30'))
+
+mimetypes.add_type('text/plain', os.path.splitext(PROFILE_FILENAME)[1])
 
 os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(JOBS_DIR, exist_ok=True)
 
-# Job storage
-jobs = {}
+# Job storage, shared by every worker process through JOBS_DIR
+job_store = create_job_store(JOB_STORE, JOB_DB_PATH, flush_interval=JOB_PROGRESS_FLUSH_INTERVAL)
+interrupted = job_store.recover_interrupted()
+if interrupted:
+    logger.warning(f"Marked {interrupted} interrupted job(s) as failed")
+
+# Wakes /events streams as soon as a job in this process changes
+job_events = JobEvents()
+event_stream_slots = threading.BoundedSemaphore(EVENTS_MAX_STREAMS)
+
+# Fixed-size pool so a burst of uploads queues up instead of oversubscribing
+job_pool = WorkerPool(MAX_CONCURRENT_JOBS, MAX_QUEUED_JOBS, name='hunyuan3d-job',
+                      on_change=pool_observer(SERVICE_NAME))
+
+# Generated models keyed by input bytes + options, LRU-evicted to a size budget
+result_cache = ResultCache(CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+register_cache(SERVICE_NAME, result_cache)
+
+# Request and job-stage spans; /jobs/<id>/timeline reads them back from TRACE_FILE,
+# which /v1/traces also appends to when this service stands in as the collector
+tracer = Tracer(SERVICE_NAME, create_span_exporter(TRACE_EXPORTER, TRACE_FILE, TRACE_OTLP_ENDPOINT,
+                                                    TRACE_FILE_MAX_BYTES, TRACE_OTLP_TOKEN))
+trace_store = JsonlExporter(TRACE_FILE, TRACE_FILE_MAX_BYTES)
+
+@contextmanager
+def traced_stage(name, context=None, **attributes):
+    """Time a processing stage as both a metric and a span"""
+    with stage(SERVICE_NAME, name), tracer.span(name, context, **attributes):
+        yield
+
+def model_url(filename, lod=0):
+    url = f"{PUBLIC_URL}/models/{filename}"
+    return f"{url}?lod={lod}" if lod else url
+
+def lod_filename(filename, lod):
+    if not lod:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_lod{lod}{ext}"
+
+_placeholder_lods = None
+_placeholder_models = {}
+_placeholder_lock = threading.Lock()
+
+def placeholder_models(compression):
+    """
+    The placeholder mesh's levels of detail as encoded GLB bytes, with their
+    sizes and encoding reports. The geometry is the same for every job, so
+    the QEM pass runs once per process and each compression mode is encoded
+    once; jobs only write the bytes out.
+    """
+    global _placeholder_lods
+    with _placeholder_lock:
+        if _placeholder_lods is None:
+            _placeholder_lods = build_lods(uv_sphere(*PLACEHOLDER_RESOLUTION), MODEL_LOD_RATIOS)
+        if compression not in _placeholder_models:
+            models = []
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for level, mesh in enumerate(_placeholder_lods):
+                    path = os.path.join(tmp_dir, lod_filename('placeholder.glb', level))
+                    encoding = write_compressed_glb(mesh, path, compression)
+                    with open(path, 'rb') as f:
+                        models.append({'data': f.read(), 'vertices': mesh.vertex_count,
+                                       'faces': mesh.face_count, 'encoding': encoding})
+            _placeholder_models[compression] = models
+        return _placeholder_models[compression]
+
+def warm_placeholders():
+    """Build the default placeholder models before the first job asks for them"""
+    started = time.perf_counter()
+    try:
+        placeholder_models(MODEL_COMPRESSION)
+        logger.info(f"Placeholder models ready in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Could not build placeholder models: {str(e)}")
+
+# The QEM pass behind the placeholder LODs takes seconds; do it now, not in the first job
+threading.Thread(target=warm_placeholders, name='placeholder-warmup', daemon=True).start()
+
+def slow_job_threshold():
+    """Seconds after which a running job gets profiled anyway, or None"""
+    if PROFILE_SLOW_FACTOR <= 0:
+        return None
+    usual = job_pool.stats()['avg_duration'] or 0
+    return max(PROFILE_SLOW_MIN_SECONDS, PROFILE_SLOW_FACTOR * usual)
+
+def requested_lod(data):
+    options = data.get('options') or {}
+    level = RESOLUTION_LODS.get(options.get('mesh_resolution') or data.get('quality'), 0)
+    return min(level, len(MODEL_LOD_RATIOS))
 
 class Job:
-    def __init__(self, job_id, input_data):
+    def __init__(self, job_id, input_data, cache_key=None, dedupe_key=None):
         self.id = job_id
         self.input_data = input_data
+        self.cache_key = cache_key
+        self.dedupe_key = dedupe_key
         self.status = 'pending'
         self.progress = 0
         self.result = None
@@ -38,104 +210,448 @@ class Job:
         self.started_at = None
         self.completed_at = None
     
+    def to_record(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'input_data': self.input_data,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
+            'dedupe_key': self.dedupe_key
+        }
+    
+    def update(self, **fields):
+        """Apply fields to the job and persist them to the job store"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        job_store.update(self.id, **fields)
+        job_events.publish(self.id)
+    
+    def set_progress(self, progress):
+        # Buffered by the store; flushed in batches rather than per update
+        self.progress = progress
+        job_store.set_progress(self.id, progress)
+        job_events.publish(self.id)
+    
+    def complete_from_cache(self, entry):
+        """Finish instantly with a cached model instead of running"""
+        now = time.time()
+        result = dict(entry['result'] or {})
+        result['model_url'] = model_url(f"cache/{entry['filename']}", result.get('lod', 0))
+        result['processing_time'] = 0
+        result['cache_hit'] = True
+        self.status = 'completed'
+        self.progress = 100
+        self.result = result
+        self.started_at = now
+        self.completed_at = now
+    
     def start(self):
-        self.status = 'processing'
-        self.started_at = time.time()
-        self.progress = 10
-        
-        # Simulate processing
-        def process():
-            try:
-                # This is where actual Hunyuan3D processing would happen
-                # For demo, we'll simulate the process
-                
+        """Queue the job on the worker pool (raises QueueFullError when saturated)"""
+        self.update(status='queued')
+        job_pool.submit(self.run)
+    
+    def run(self):
+        self.update(status='processing', started_at=time.time(), progress=10)
+        trace = self.input_data.get('trace')
+        tracer.record('queue', self.created_at, self.started_at - self.created_at, trace)
+        options = self.input_data.get('options') or {}
+        profiler = JobProfiler(os.path.join(JOBS_DIR, self.id), enabled=bool(options.get('profile')),
+                               slow_after=slow_job_threshold(), interval=PROFILE_INTERVAL)
+        with tracer.span('job', trace, job_id=self.id), profiler:
+            self.process()
+        if profiler.report:
+            profile = {**profiler.report, 'url': f"{PUBLIC_URL}/jobs/{self.id}/profile"}
+            self.update(result={**(self.result or {}), 'profile': profile})
+    
+    def process(self):
+        try:
+            # This is where actual Hunyuan3D processing would happen
+            # For demo, we'll simulate the process
+            
+            # Placeholder output plus its decimated levels of detail, normally
+            # built at start-up; a cold process waits here, outside the stages
+            options = self.input_data.get('options') or {}
+            models = placeholder_models(options.get('compression') or MODEL_COMPRESSION)
+            
+            with traced_stage('generate'):
                 for i in range(10):
-                    time.sleep(1)
-                    self.progress = 10 + (i * 8)
+                    time.sleep(SIMULATED_STEP_SECONDS)
+                    self.set_progress(10 + (i * 8))
                     logger.info(f"Job {self.id} progress: {self.progress}%")
-                
-                # Create dummy output
-                output_file = os.path.join(MODELS_DIR, f"{self.id}.glb")
-                with open(output_file, 'w') as f:
-                    f.write("dummy 3d model data")
-                
-                self.result = {
-                    'model_url': f"http://localhost:8080/models/{self.id}.glb",
-                    'vertices': 5000,
-                    'faces': 2500,
-                    'texture_size': '1024x1024',
-                    'processing_time': time.time() - self.started_at,
-                    'metadata': {
-                        'format': 'glb',
-                        'quality': 'high',
-                        'texture': True
-                    }
+            
+            filename = f"{self.id}.glb"
+            lods = []
+            lod_files = {}
+            encodings = [model['encoding'] for model in models]
+            with traced_stage('write'):
+                for level, model in enumerate(models):
+                    path = os.path.join(MODELS_DIR, lod_filename(filename, level))
+                    with open(path, 'wb') as f:
+                        f.write(model['data'])
+                    lods.append({'lod': level, 'vertices': model['vertices'], 'faces': model['faces'],
+                                 'size': len(model['data'])})
+                    if level:
+                        lod_files[f"lod{level}"] = path
+            output_file = os.path.join(MODELS_DIR, filename)
+            selected = lods[requested_lod(self.input_data)]
+            
+            result = {
+                'model_url': model_url(filename, selected['lod']),
+                'lod': selected['lod'],
+                'vertices': selected['vertices'],
+                'faces': selected['faces'],
+                'size': selected['size'],
+                'lods': lods,
+                'texture_size': '1024x1024',
+                'processing_time': time.time() - self.started_at,
+                'metadata': {
+                    'format': 'glb',
+                    'quality': 'high',
+                    'texture': True,
+                    'compression': encodings[0]['compression'],
+                    'compression_ratio': round(sum(e['raw_size'] for e in encodings)
+                                               / sum(e['size'] for e in encodings), 2),
+                    'encode_time': round(sum(e['encode_time'] for e in encodings), 4)
                 }
-                
-                self.status = 'completed'
-                self.completed_at = time.time()
-                self.progress = 100
-                
-            except Exception as e:
-                self.status = 'failed'
-                self.error = str(e)
-                self.progress = 0
-        
-        threading.Thread(target=process).start()
+            }
+            
+            if self.cache_key:
+                try:
+                    result_cache.put(self.cache_key, output_file, result, variants=lod_files)
+                except Exception as e:
+                    logger.warning(f"Could not cache result of job {self.id}: {str(e)}")
+            
+            self.update(status='completed', result=result, completed_at=time.time(), progress=100)
+            
+        except Exception as e:
+            self.update(status='failed', error=str(e), progress=0)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request.path in UNTRACED_PATHS:
+        return
+    # Continue the caller's trace (W3C traceparent) or start one
+    trace_id, parent_id = parse_traceparent(request.headers.get('traceparent'))
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if route in POLLING_ROUTES and trace_id is None and random.random() >= TRACE_POLL_SAMPLE_RATE:
+        return
+    g.trace_incoming = trace_id is not None
+    g.span = tracer.start_span(f"{request.method} {route}", trace_id, parent_id, path=request.path)
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed bodies (downloads, /events) are timed up to the first byte
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.get('request_started', time.perf_counter())
+    observe_request(SERVICE_NAME, request.method, route, response.status_code,
+                    time.perf_counter() - started,
+                    bytes_in=request.content_length, bytes_out=response.content_length)
+    span = g.get('span')
+    if span is not None:
+        span.attributes['status'] = response.status_code
+        response.headers['X-Trace-Id'] = span.trace_id
+        # The span closes once the whole body is sent, so downloads count in full
+        response.call_on_close(lambda: tracer.end_span(span))
+    return response
+
+def request_trace():
+    """Trace context of the current request's span"""
+    span = g.get('span')
+    return span.context() if span is not None else None
+
+def join_job_trace(job_id):
+    """Move an untraced request about a job (status poll, download) into the job's trace"""
+    span = g.get('span')
+    if span is None or g.get('trace_incoming'):
+        return
+    job = job_store.get(job_id)
+    trace = ((job or {}).get('input_data') or {}).get('trace')
+    if trace:
+        span.trace_id, span.parent_id = trace['trace_id'], trace['span_id']
 
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'service': 'hunyuan3d'})
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    rendered = render_metrics()
+    if rendered is None:
+        return jsonify({'success': False, 'error': 'prometheus_client is not installed'}), 503
+    body, content_type = rendered
+    return Response(body, content_type=content_type)
+
+@app.route('/v1/traces', methods=['POST'])
+def receive_traces():
+    """OTLP/HTTP JSON receiver: a local stand-in collector writing to TRACE_FILE"""
+    if not TRACE_COLLECTOR_TOKEN:
+        return jsonify({'success': False, 'error': 'Trace collector is disabled'}), 404
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied.encode(), TRACE_COLLECTOR_TOKEN.encode()):
+        return jsonify({'success': False, 'error': 'Invalid collector token'}), 401
+    if request.content_length is None or request.content_length > TRACE_COLLECTOR_MAX_BYTES:
+        return jsonify({'success': False, 'error': f"Trace export must declare a length of at most "
+                                                   f"{TRACE_COLLECTOR_MAX_BYTES} bytes"}), 413
+    try:
+        trace_store.export_many(from_otlp(request.get_json(force=True) or {}))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f"Invalid OTLP payload: {str(e)}"}), 400
+    return jsonify({})
+
+@app.route('/jobs/<job_id>/timeline', methods=['GET'])
+def get_job_timeline(job_id):
+    """Waterfall of every span recorded for the trace of one model's job"""
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    trace = (job['input_data'] or {}).get('trace')
+    if not trace:
+        return jsonify({'success': False, 'error': 'Job has no trace'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'trace_id': trace['trace_id'],
+        **waterfall(trace_store.read_trace(trace['trace_id']))
+    })
+
+@app.route('/jobs/<job_id>/profile', methods=['GET'])
+def download_job_profile(job_id):
+    """Collapsed stack samples of a profiled job, for flamegraph.pl or speedscope"""
+    file_path = safe_join(JOBS_DIR, job_id, PROFILE_FILENAME)
+    if not file_path or not os.path.isfile(file_path):
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    
+    join_job_trace(job_id)
+    return send_model(file_path)
+
 @app.route('/generate', methods=['POST'])
 def generate_3d():
     try:
-        data = request.get_json()
-        
-        # Validate input
-        if not data.get('input_files'):
-            return jsonify({'success': False, 'error': 'No input files provided'})
+        with traced_stage('validate', request_trace()):
+            data = request.get_json()
+            
+            # Validate input
+            if not data.get('input_files'):
+                return jsonify({'success': False, 'error': 'No input files provided'})
+            
+            # Resolve the encoding up front so it is part of the cache key
+            options = data.get('options') or {}
+            compression = options.get('compression') or MODEL_COMPRESSION
+            if compression not in COMPRESSION_MODES:
+                return jsonify({'success': False, 'error': f"Unknown compression: {compression}"}), 400
+            data['options'] = {**options, 'compression': compression}
+            
+            content_key = compute_cache_key(data['input_files'], data, INPUT_DIRS)
         
         job_id = str(uuid.uuid4())
-        job = Job(job_id, data)
-        jobs[job_id] = job
+        options = data.get('options') or {}
+        # A profiled job has to actually run: no cached result, no sharing an in-flight job
+        profile = bool(options.get('profile'))
+        use_cache = options.get('use_cache', True) and not profile
+        cache_key = content_key if use_cache else None
+        # Job stages join this request's trace, whichever worker runs them
+        data['trace'] = request_trace()
+        job = Job(job_id, data, cache_key=cache_key, dedupe_key=None if profile else content_key)
+        
+        cached = result_cache.get(cache_key) if cache_key else None
+        if cached:
+            job.complete_from_cache(cached)
+            job_store.create(job.to_record())
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'trace_id': g.span.trace_id,
+                'status': job.status,
+                'cached': True,
+                'result': job.result,
+                'message': '3D model served from cache'
+            })
+        
+        # Identical request already in flight: share its job, not a worker slot
+        existing_id = job_store.create_or_attach(job.to_record())
+        if existing_id:
+            existing = job_store.get(existing_id)
+            logger.info(f"Coalesced request into in-flight job {existing_id}")
+            return jsonify({
+                'success': True,
+                'job_id': existing_id,
+                'status': existing['status'] if existing else 'queued',
+                'coalesced': True,
+                'message': 'Attached to identical in-flight job'
+            })
         
-        job.start()
+        try:
+            job.start()
+        except QueueFullError as e:
+            # Requests may already have attached to this id; give them a final state, not a 404
+            job.update(status='failed', error=f"rejected: {str(e)}", completed_at=time.time())
+            logger.warning(f"Rejected job {job_id}: {str(e)}")
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'queue_depth': job_pool.queue_depth()
+            }), 429, {'Retry-After': str(e.retry_after)}
         
         return jsonify({
             'success': True,
             'job_id': job_id,
-            'status': 'started',
-            'message': '3D generation started'
+            'trace_id': g.span.trace_id,
+            'status': job.status,
+            'queue_depth': job_pool.queue_depth(),
+            'message': '3D generation queued'
         })
     except Exception as e:
         logger.error(f"Error in generate_3d: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/status/<job_id>', methods=['GET'])
-def get_status(job_id):
-    job = jobs.get(job_id)
+@app.route('/status', methods=['GET'])
+def get_queue_status():
+    return jsonify({
+        'success': True,
+        'service': 'hunyuan3d',
+        **job_pool.stats(),
+        'cache': result_cache.stats()
+    })
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({'success': True, **result_cache.stats()})
+
+def job_snapshot(job_id):
+    """Status payload shared by /status/<job_id> and /events"""
+    job = job_store.get(job_id)
     if not job:
-        return jsonify({'success': False, 'error': 'Job not found'})
+        return None
     
-    return jsonify({
+    return {
         'success': True,
         'job_id': job_id,
-        'status': job.status,
-        'progress': job.progress,
-        'result': job.result,
-        'error': job.error,
-        'created_at': job.created_at,
-        'started_at': job.started_at,
-        'completed_at': job.completed_at
+        'trace_id': ((job['input_data'] or {}).get('trace') or {}).get('trace_id'),
+        'status': job['status'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'completed_at': job['completed_at']
+    }
+
+@app.route('/status/<job_id>', methods=['GET'])
+def get_status(job_id):
+    snapshot = job_snapshot(job_id)
+    if not snapshot:
+        return jsonify({'success': False, 'error': 'Job not found'})
+    
+    join_job_trace(job_id)
+    return jsonify(snapshot)
+
+def event_stream_response(job_ids):
+    if not event_stream_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'Too many event streams open; poll /status/<job_id> instead'}), 503
+    
+    stream = stream_job_events(job_ids, job_snapshot, job_events,
+                               poll_interval=EVENTS_POLL_INTERVAL,
+                               max_duration=EVENTS_MAX_DURATION)
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
+    # Runs even if the client leaves before the first frame
+    response.call_on_close(event_stream_slots.release)
+    return response
+
+@app.route('/events/<job_id>', methods=['GET'])
+def job_events_stream(job_id):
+    """Push status/progress changes for one job as Server-Sent Events"""
+    return event_stream_response([job_id])
+
+@app.route('/events', methods=['GET'])
+def multi_job_events_stream():
+    """Push changes for several jobs: /events?job_ids=a,b,c"""
+    job_ids = [job_id for job_id in request.args.get('job_ids', '').split(',') if job_id]
+    if not job_ids:
+        return jsonify({'success': False, 'error': 'No job ids provided'}), 400
+    
+    return event_stream_response(job_ids)
+
+class ClosingFile(io.BufferedReader):
+    """Binary file that calls on_close once closed; direct_passthrough bodies skip call_on_close"""
+    
+    def __init__(self, path, on_close=None):
+        super().__init__(io.FileIO(path, 'rb'))
+        self.on_close = on_close
+    
+    def close(self):
+        if not self.closed and self.on_close is not None:
+            self.on_close()
+        super().close()
+
+def read_span(f, length):
+    """Yield length bytes from f's current position, then close it"""
+    try:
+        while length > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+def send_model(file_path):
+    """
+    Serve a model file with a content-hash ETag, If-None-Match and single
+    byte ranges (If-Range aware). Anything that runs to the end of the file,
+    i.e. full downloads and resumes, goes through wsgi.file_wrapper, which
+    gunicorn serves with os.sendfile.
+    """
+    etag = file_etag(file_path)
+    size = os.path.getsize(file_path)
+    headers = {'ETag': f'"{etag}"', 'Accept-Ranges': 'bytes', 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    
+    start, stop, status = 0, size, 200
+    byte_range = request.range
+    # A stale If-Range validator means the client gets the whole new file
+    if byte_range and len(byte_range.ranges) == 1 and (
+            'If-Range' not in request.headers or request.if_range.etag == etag):
+        span = byte_range.range_for_length(size)
+        if span is None:
+            headers['Content-Range'] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+        start, stop = span
+        status = 206
+        headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+    
+    # The request span ends when the server closes the file, i.e. after the last byte
+    span = g.get('span')
+    f = ClosingFile(file_path, on_close=(lambda: tracer.end_span(span)) if span is not None else None)
+    f.seek(start)
+    body = wrap_file(request.environ, f, DOWNLOAD_CHUNK_SIZE) if stop == size else read_span(f, stop - start)
+    response = Response(body, status=status, headers=headers, direct_passthrough=True,
+                        mimetype=mimetypes.guess_type(file_path)[0] or 'application/octet-stream')
+    response.content_length = stop - start
+    return response
 
-@app.route('/models/<filename>', methods=['GET'])
+@app.route('/models/<path:filename>', methods=['GET'])
 def download_model(filename):
     try:
-        file_path = os.path.join(MODELS_DIR, filename)
-        if os.path.exists(file_path):
-            return send_file(file_path)
+        # ?lod=N serves the Nth decimated level instead of the full model
+        lod = request.args.get('lod', default=0, type=int)
+        # safe_join rejects traversal outside MODELS_DIR (e.g. ../jobs/jobs.db)
+        file_path = safe_join(MODELS_DIR, lod_filename(filename, lod))
+        is_model = filename.rsplit('.', 1)[-1].lower() in MODEL_EXTENSIONS
+        if file_path and is_model and os.path.isfile(file_path):
+            join_job_trace(Path(filename).stem)
+            return send_model(file_path)
         else:
             return jsonify({'success': False, 'error': 'File not found'}), 404
     except Exception as e:
@@ -0,0 +1,4 @@
+"""
+Shared building blocks for the open-source pipeline services
+(cad_processor and hunyuan3d)
+"""
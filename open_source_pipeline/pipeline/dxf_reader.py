@@ -0,0 +1,235 @@
+"""
+Streaming DXF reader producing struct-of-arrays geometry.
+
+Modelspace entities are read one at a time with ezdxf's iterdxf add-on, so
+the document is never loaded as a whole, and each entity is reduced straight
+into flat typed buffers (array('d') / array('i')) before it is dropped. The
+result is a handful of NumPy arrays instead of millions of entity objects:
+
+    vertices         float64 (N, 3)  WCS coordinates (float64 keeps precision
+                                     for drawings far from the origin)
+    entity_offsets   int64 (E + 1,)  entity i owns vertices[offsets[i]:offsets[i + 1]]
+    entity_types     uint8 (E,)      index into ENTITY_TYPES
+    entity_layers    int32 (E,)      index into layers
+    entity_closed    bool (E,)
+
+Curves (arcs, circles, ellipses, splines, bulged polylines) are flattened to
+polylines within flatten_distance drawing units.
+"""
+
+import logging
+import math
+from array import array
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ('POINT', 'LINE', 'LWPOLYLINE', 'POLYLINE', 'ARC', 'CIRCLE', 'ELLIPSE', 'SPLINE', '3DFACE')
+_TYPE_CODES = {name: code for code, name in enumerate(ENTITY_TYPES)}
+
+DEFAULT_FLATTEN_DISTANCE = 0.01
+
+
+class DXFGeometry:
+    def __init__(self, vertices, entity_offsets, entity_types, entity_layers, entity_closed,
+                 layers, skipped=None):
+        self.vertices = vertices
+        self.entity_offsets = entity_offsets
+        self.entity_types = entity_types
+        self.entity_layers = entity_layers
+        self.entity_closed = entity_closed
+        self.layers = layers
+        self.skipped = skipped or {}
+
+    @property
+    def entity_count(self):
+        return len(self.entity_types)
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    def bounds(self):
+        if not len(self.vertices):
+            return None
+        return self.vertices.min(axis=0).tolist(), self.vertices.max(axis=0).tolist()
+
+    def type_counts(self):
+        counts = np.bincount(self.entity_types, minlength=len(ENTITY_TYPES))
+        return {name: int(n) for name, n in zip(ENTITY_TYPES, counts) if n}
+
+    def summary(self):
+        return {
+            'entities': self.entity_count,
+            'vertices': self.vertex_count,
+            'layers': len(self.layers),
+            'entity_types': self.type_counts(),
+            'bounds': self.bounds(),
+            'skipped': dict(self.skipped)
+        }
+
+    def save(self, path):
+        np.savez(path, vertices=self.vertices, entity_offsets=self.entity_offsets,
+                 entity_types=self.entity_types, entity_layers=self.entity_layers,
+                 entity_closed=self.entity_closed, layers=np.asarray(self.layers, dtype=str))
+        return path
+
+    def write_obj(self, path):
+        """Write the entities as OBJ polylines ('l' elements)"""
+        with open(path, 'w') as f:
+            f.write(f"# {self.entity_count} entities, {self.vertex_count} vertices\n")
+            np.savetxt(f, self.vertices, fmt='v %.6f %.6f %.6f')
+            offsets = self.entity_offsets
+            for i in range(self.entity_count):
+                start, end = int(offsets[i]), int(offsets[i + 1])
+                if end - start < 2:
+                    continue
+                indices = list(range(start + 1, end + 1))
+                if self.entity_closed[i]:
+                    indices.append(start + 1)
+                f.write('l ' + ' '.join(map(str, indices)) + '\n')
+        return path
+
+
+class _Builder:
+    """Flat append-only buffers; no per-vertex Python objects are kept"""
+
+    def __init__(self):
+        self.coords = array('d')
+        self.offsets = array('q', [0])
+        self.types = array('B')
+        self.layers = array('i')
+        self.closed = array('B')
+        self.layer_ids = {}
+        self.skipped = {}
+
+    def add(self, dxftype, layer, points, closed=False):
+        # Materialise the whole entity before touching the shared buffers, so a
+        # generator that raises partway (e.g. flattening()) leaves them aligned
+        if isinstance(points, np.ndarray):
+            data = np.ascontiguousarray(points, dtype=np.float64).tobytes()
+            count = len(points)
+        else:
+            data = array('d')
+            count = 0
+            for point in points:
+                data.extend((point[0], point[1], point[2] if len(point) > 2 else 0.0))
+                count += 1
+        if not count:
+            return
+        if isinstance(data, bytes):
+            self.coords.frombytes(data)
+        else:
+            self.coords.extend(data)
+        layer_id = self.layer_ids.get(layer)
+        if layer_id is None:
+            layer_id = self.layer_ids[layer] = len(self.layer_ids)
+        self.offsets.append(self.offsets[-1] + count)
+        self.types.append(_TYPE_CODES[dxftype])
+        self.layers.append(layer_id)
+        self.closed.append(1 if closed else 0)
+
+    def skip(self, dxftype):
+        self.skipped[dxftype] = self.skipped.get(dxftype, 0) + 1
+
+    def build(self):
+        # frombuffer wraps the array storage without copying it
+        return DXFGeometry(
+            vertices=np.frombuffer(self.coords, dtype=np.float64).reshape(-1, 3),
+            entity_offsets=np.frombuffer(self.offsets, dtype=np.int64),
+            entity_types=np.frombuffer(self.types, dtype=np.uint8),
+            entity_layers=np.frombuffer(self.layers, dtype=np.int32),
+            entity_closed=np.frombuffer(self.closed, dtype=np.uint8).astype(bool),
+            layers=sorted(self.layer_ids, key=self.layer_ids.get),
+            skipped=self.skipped)
+
+
+def _ocs_to_wcs(entity, points):
+    extrusion = entity.dxf.extrusion
+    if extrusion[0] == 0 and extrusion[1] == 0 and extrusion[2] > 0:
+        return points
+    ocs = entity.ocs()
+    return points @ np.array([ocs.ux, ocs.uy, ocs.uz])
+
+
+def _arc_points(entity, start_angle, end_angle, flatten_distance):
+    """Flatten an ARC/CIRCLE in one NumPy evaluation"""
+    center = entity.dxf.center
+    radius = entity.dxf.radius
+    sweep = (end_angle - start_angle) % 360.0 or 360.0
+    if flatten_distance < radius:
+        step = math.degrees(2.0 * math.acos(1.0 - flatten_distance / radius))
+    else:
+        step = 90.0
+    count = max(4 if sweep == 360.0 else 1, math.ceil(sweep / step))
+    angles = np.radians(np.linspace(start_angle, start_angle + sweep, count + 1))
+    points = np.empty((count + 1, 3))
+    points[:, 0] = center[0] + radius * np.cos(angles)
+    points[:, 1] = center[1] + radius * np.sin(angles)
+    points[:, 2] = center[2]
+    return _ocs_to_wcs(entity, points)
+
+
+def _entity_points(entity, dxftype, flatten_distance):
+    """Return (points, closed) for a supported entity"""
+    if dxftype == 'LINE':
+        return (entity.dxf.start, entity.dxf.end), False
+    if dxftype == 'POINT':
+        return (entity.dxf.location,), False
+    if dxftype == 'LWPOLYLINE':
+        closed = entity.closed
+        if entity.has_arc:
+            from ezdxf import path as ezpath
+            return ezpath.make_path(entity).flattening(flatten_distance), False
+        points = np.empty((len(entity), 3))
+        points[:, :2] = entity.get_points('xy')
+        points[:, 2] = entity.dxf.elevation
+        return _ocs_to_wcs(entity, points), closed
+    if dxftype == 'POLYLINE':
+        return entity.points_in_wcs(), entity.is_closed
+    if dxftype == '3DFACE':
+        return entity.wcs_vertices(close=False), True
+    if dxftype == 'CIRCLE':
+        return _arc_points(entity, 0.0, 360.0, flatten_distance), False
+    if dxftype == 'ARC':
+        return _arc_points(entity, entity.dxf.start_angle, entity.dxf.end_angle, flatten_distance), False
+    # ELLIPSE, SPLINE
+    return entity.flattening(flatten_distance), False
+
+
+def iter_modelspace(path):
+    """Yield modelspace entities lazily; binary DXF falls back to a full load"""
+    with open(path, 'rb') as f:
+        binary = f.read(22) == b'AutoCAD Binary DXF\r\n\x1a\x00'
+
+    if binary:
+        import ezdxf
+        logger.info(f"{path} is binary DXF; loading the full document")
+        yield from ezdxf.readfile(path).modelspace()
+        return
+
+    from ezdxf.addons import iterdxf
+    doc = iterdxf.opendxf(path)
+    try:
+        yield from doc.modelspace()
+    finally:
+        doc.close()
+
+
+def read_dxf(path, flatten_distance=DEFAULT_FLATTEN_DISTANCE, entity_types=None):
+    """Stream the modelspace of a DXF file into a DXFGeometry"""
+    wanted = set(entity_types or ENTITY_TYPES)
+    builder = _Builder()
+    for entity in iter_modelspace(path):
+        dxftype = entity.dxftype()
+        if dxftype not in wanted or dxftype not in _TYPE_CODES:
+            builder.skip(dxftype)
+            continue
+        try:
+            points, closed = _entity_points(entity, dxftype, flatten_distance)
+            builder.add(dxftype, entity.dxf.layer, points, closed)
+        except Exception as e:
+            logger.debug(f"Skipping {dxftype} {entity.dxf.handle}: {str(e)}")
+            builder.skip(dxftype)
+    return builder.build()
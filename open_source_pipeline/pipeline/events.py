@@ -0,0 +1,112 @@
+"""
+Server-Sent Events support for job progress.
+
+JobEvents wakes streams in the same process as soon as a job they watch
+changes; an update to one job never wakes streams following other jobs.
+Streams also re-read the job store on a short interval, so jobs running in
+another process are still picked up (after their progress flush).
+
+Every open stream holds a server thread, so the services cap how many run
+at once (EVENTS_MAX_STREAMS) and answer 503 past the cap; clients then fall
+back to polling /status.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+class JobEvents:
+    """In-process change notifier; a job update wakes only the streams watching that job"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watchers = {}  # job_id -> set of threading.Event
+
+    def publish(self, job_id):
+        with self._lock:
+            for event in self._watchers.get(job_id, ()):
+                event.set()
+
+    @contextmanager
+    def watch(self, job_ids):
+        """Yield an Event that the next publish() of any of job_ids sets, until the block ends"""
+        event = threading.Event()
+        job_ids = list(job_ids)
+        with self._lock:
+            for job_id in job_ids:
+                self._watchers.setdefault(job_id, set()).add(event)
+        try:
+            yield event
+        finally:
+            with self._lock:
+                for job_id in job_ids:
+                    watchers = self._watchers.get(job_id)
+                    if watchers is not None:
+                        watchers.discard(event)
+                        if not watchers:
+                            del self._watchers[job_id]
+
+
+def format_sse(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else json.dumps(data)
+    for line in payload.splitlines() or ['']:
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_job_events(job_ids, load_snapshot, notifier, poll_interval=1.0,
+                      heartbeat_interval=15.0, max_duration=None):
+    """
+    Yield SSE frames for each status/progress change of the given jobs.
+
+    load_snapshot(job_id) returns the /status payload for a job or None.
+    The stream ends once every job has reached a terminal status.
+    """
+    last_sent = {}
+    remaining = list(dict.fromkeys(job_ids))
+    started = time.time()
+    last_write = started
+
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+    while remaining:
+        # Watch before reading, so an update that races the reads still wakes us
+        with notifier.watch(remaining) as changed:
+            for job_id in list(remaining):
+                snapshot = load_snapshot(job_id)
+                if snapshot is None:
+                    remaining.remove(job_id)
+                    yield format_sse({'success': False, 'job_id': job_id, 'error': 'Job not found'}, event='error')
+                    last_write = time.time()
+                    continue
+
+                state = (snapshot['status'], snapshot['progress'])
+                if last_sent.get(job_id) != state:
+                    last_sent[job_id] = state
+                    yield format_sse(snapshot, event='status', event_id=f"{job_id}:{snapshot['progress']}")
+                    last_write = time.time()
+
+                if snapshot['status'] in TERMINAL_STATUSES:
+                    remaining.remove(job_id)
+
+            if not remaining:
+                break
+            if max_duration is not None and time.time() - started > max_duration:
+                break
+            if time.time() - last_write >= heartbeat_interval:
+                # Comment frames keep proxies from closing idle connections
+                yield ': keep-alive\n\n'
+                last_write = time.time()
+
+            changed.wait(poll_interval)
+
+    yield format_sse({'job_ids': list(dict.fromkeys(job_ids))}, event='end')
@@ -0,0 +1,447 @@
+"""
+Compressed GLB output.
+
+Three levels, each falling back to the one below it:
+
+    meshopt    quantized attributes, then EXT_meshopt_compression: vertex
+               streams are byte-delta encoded into 2/4/8-bit groups and the
+               index buffer goes through the edge/vertex FIFO triangle codec
+               (bitstream version 0 for attributes, 1 for triangles)
+    quantize   KHR_mesh_quantization only: int16 positions dequantized by
+               the node transform, octahedral int8 normals (meshopt
+               OCTAHEDRAL filter) or plain int8 normals without meshopt,
+               uint16 UVs when they lie in [0, 1]
+    none       float32 GLB from Mesh.save
+
+Both compressed levels list their extensions in extensionsRequired (the
+meshopt fallback buffer carries no data), so loaders without them cannot
+open the file; hunyuan3d writes plain GLB unless a request opts in.
+
+Triangles are sorted by lowest vertex and vertices renumbered in first-use
+order before encoding, which keeps shared edges in the codec's FIFOs, index
+deltas small and consecutive vertices similar (about 2 bytes per triangle
+for a regular grid, against 6 for uint16 indices). The vertex codec is
+vectorised; the triangle codec is a Python loop (about 200k
+triangles per second) since every triangle depends on the FIFO
+state left by the previous one.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+
+from .mesh import _GLTF_COMPONENT_CODES, GLTFBuilder, Mesh, _pad4, write_glb
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MODES = ('meshopt', 'quantize', 'none')
+
+_MESHOPT = 'EXT_meshopt_compression'
+_QUANTIZATION = 'KHR_mesh_quantization'
+
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+# --- quantization ---
+
+def _quantize_snorm(values, bits):
+    scale = (1 << (bits - 1)) - 1
+    return np.trunc(np.clip(values, -1.0, 1.0) * scale + np.where(values >= 0, 0.5, -0.5)).astype(np.int32)
+
+
+def _quantize_positions(vertices, bits):
+    """int16 positions plus the (translation, scale) that restores them"""
+    lo, hi = vertices.min(axis=0).astype(np.float64), vertices.max(axis=0).astype(np.float64)
+    center = (lo + hi) * 0.5
+    # One scale for all axes so normals are unaffected by the node transform
+    extent = float((hi - lo).max()) * 0.5 or 1.0
+    steps = (1 << (bits - 1)) - 1
+    quantized = np.rint((vertices - center) * (steps / extent)).astype(np.int16)
+    padded = np.zeros((len(vertices), 4), dtype=np.int16)  # 8-byte stride keeps elements 4-byte aligned
+    padded[:, :3] = quantized
+    return padded, center.tolist(), extent / steps
+
+
+def _encode_octahedral(normals):
+    """meshopt_encodeFilterOct with 8 bits: (u, v, 127, 0) per normal"""
+    n = normals.astype(np.float64)
+    length = np.abs(n).sum(axis=1)
+    n = n / np.where(length > 0, length, 1.0)[:, None]
+    x, y, z = n[:, 0], n[:, 1], n[:, 2]
+    u = np.where(z >= 0, x, (1.0 - np.abs(y)) * np.where(x >= 0, 1.0, -1.0))
+    v = np.where(z >= 0, y, (1.0 - np.abs(x)) * np.where(y >= 0, 1.0, -1.0))
+    encoded = np.zeros((len(normals), 4), dtype=np.int8)
+    encoded[:, 0] = _quantize_snorm(u, 8)
+    encoded[:, 1] = _quantize_snorm(v, 8)
+    encoded[:, 2] = 127
+    return encoded
+
+
+def _optimize_order(mesh):
+    """
+    Cheap locality pass: sort triangles by their lowest then highest vertex
+    index, so neighbours tend to follow each other and share edges, then
+    renumber vertices in first-use order (dropping unused ones)
+    """
+    faces = mesh.faces[np.lexsort((mesh.faces.max(axis=1), mesh.faces.min(axis=1)))]
+    flat = faces.reshape(-1)
+    _, first = np.unique(flat, return_index=True)
+    order = flat[np.sort(first)]
+    remap = np.empty(mesh.vertex_count, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    return Mesh(mesh.vertices[order], remap[faces],
+                normals=mesh.normals[order] if mesh.normals is not None else None,
+                uvs=mesh.uvs[order] if mesh.uvs is not None else None)
+
+
+# --- meshopt vertex codec (attributes, version 0) ---
+
+_BYTE_GROUP = 16
+_TAIL_SIZE = 32
+
+
+def _vertex_block_size(stride):
+    return min((8192 // stride) & ~(_BYTE_GROUP - 1), 256)
+
+
+def _encode_groups(groups):
+    """Encode (M, 16) zigzagged byte groups; returns (modes, rows (M, 24), lengths)"""
+    over2, over4 = groups >= 3, groups >= 15
+    sizes = np.stack([np.where(groups.any(axis=1), 1 << 30, 0),
+                      4 + over2.sum(axis=1), 8 + over4.sum(axis=1),
+                      np.full(len(groups), _BYTE_GROUP)])
+    modes = sizes.argmin(axis=0).astype(np.uint8)
+    lengths = sizes[modes, np.arange(len(groups))]
+
+    rows = np.zeros((len(groups), 24), dtype=np.uint8)
+    for mode, bits, over in ((1, 2, over2), (2, 4, over4)):
+        selected = modes == mode
+        if not selected.any():
+            continue
+        group, exceeds = groups[selected], over[selected]
+        sentinel = (1 << bits) - 1
+        clipped = np.minimum(group, sentinel)
+        per_byte = 8 // bits
+        packed = np.zeros((len(group), _BYTE_GROUP // per_byte), dtype=np.uint8)
+        for k in range(per_byte):  # first value in the high bits
+            packed = (packed << bits) | clipped[:, k::per_byte]
+        # Values at or above the sentinel follow the packed bits in order
+        order = np.argsort(~exceeds, axis=1, kind='stable')
+        block = np.zeros((len(group), 24), dtype=np.uint8)
+        block[:, :packed.shape[1]] = packed
+        block[:, packed.shape[1]:packed.shape[1] + _BYTE_GROUP] = np.take_along_axis(group, order, axis=1)
+        rows[selected] = block
+    rows[modes == 3, :_BYTE_GROUP] = groups[modes == 3]
+    return modes, rows, lengths
+
+
+def _encode_blocks(deltas):
+    """Encode (blocks, count, stride) zigzagged deltas; count is padded to whole groups"""
+    blocks, count, stride = deltas.shape
+    aligned = -(-count // _BYTE_GROUP) * _BYTE_GROUP
+    padded = np.zeros((blocks, stride, aligned), dtype=np.uint8)
+    padded[:, :, :count] = deltas.transpose(0, 2, 1)
+    group_count = aligned // _BYTE_GROUP
+    modes, rows, lengths = _encode_groups(padded.reshape(-1, _BYTE_GROUP))
+    modes = modes.reshape(blocks * stride, group_count)
+
+    # Each byte channel is a header (2 bits per group) followed by its groups
+    header_size = (group_count + 3) // 4
+    shifted = np.zeros((blocks * stride, header_size * 4), dtype=np.uint8)
+    shifted[:, :group_count] = modes
+    shifted = shifted.reshape(-1, header_size, 4) << np.array([0, 2, 4, 6], dtype=np.uint8)
+    headers = np.bitwise_or.reduce(shifted, axis=2)
+
+    channel_rows = np.zeros((blocks * stride, 1 + group_count, 24), dtype=np.uint8)
+    channel_rows[:, 0, :header_size] = headers
+    channel_rows[:, 1:] = rows.reshape(blocks * stride, group_count, 24)
+    channel_lengths = np.empty((blocks * stride, 1 + group_count), dtype=np.int64)
+    channel_lengths[:, 0] = header_size
+    channel_lengths[:, 1:] = lengths.reshape(blocks * stride, group_count)
+    return channel_rows[np.arange(24) < channel_lengths[..., None]]
+
+
+def encode_vertex_buffer(data):
+    """meshopt_encodeVertexBuffer for an (N, stride) uint8 array"""
+    count, stride = data.shape
+    out = [b'\xa0']
+    if count:
+        # Deltas chain across blocks; the first vertex is its own predecessor
+        previous = np.vstack([data[:1], data[:-1]])
+        delta = (data.astype(np.int16) - previous).astype(np.uint8)
+        zigzag = (delta << 1) ^ (delta.view(np.int8) >> 7).view(np.uint8)
+
+        block_size = _vertex_block_size(stride)
+        full = count // block_size * block_size
+        if full:
+            out.append(_encode_blocks(zigzag[:full].reshape(-1, block_size, stride)).tobytes())
+        if full < count:
+            out.append(_encode_blocks(zigzag[full:][None]).tobytes())
+    first = data[0].tobytes() if count else bytes(stride)
+    out.append(bytes(max(0, _TAIL_SIZE - stride)))
+    out.append(first)
+    return b''.join(out)
+
+
+# --- meshopt index codec (triangles, version 1) ---
+
+_TRIANGLE_ORDER = ((0, 1, 2), (1, 2, 0), (2, 0, 1))
+_CODEAUX_TABLE = bytes([0x00, 0x76, 0x87, 0x56, 0x67, 0x78, 0xa9, 0x86,
+                        0x65, 0x89, 0x68, 0x98, 0x01, 0x69, 0x00, 0x00])
+_CODEAUX_INDEX = {value: index for index, value in reversed(list(enumerate(_CODEAUX_TABLE[:14])))}
+
+
+def _append_index(data, index, last):
+    d = (index - last) & 0xFFFFFFFF
+    v = ((d << 1) ^ (0xFFFFFFFF if d >> 31 else 0)) & 0xFFFFFFFF
+    while v >= 128:
+        data.append((v & 127) | 128)
+        v >>= 7
+    data.append(v)
+
+
+def encode_index_buffer(faces):
+    """meshopt_encodeIndexBuffer (version 1) for an (M, 3) index array"""
+    triangles = faces.reshape(-1, 3).tolist()
+    codes = bytearray()
+    data = bytearray()
+    edge_fifo = [(-1, -1)] * 16
+    vertex_fifo = [-1] * 16
+    edge_offset = vertex_offset = 0
+    next_index = last = 0
+
+    def vertex_slot(v):
+        for i in range(16):
+            if vertex_fifo[(vertex_offset - 1 - i) & 15] == v:
+                return i
+        return -1
+
+    for tri in triangles:
+        i0, i1, i2 = tri
+        fer = -1
+        for i in range(15):
+            e0, e1 = edge_fifo[(edge_offset - 1 - i) & 15]
+            if e0 == i0 and e1 == i1:
+                fer = i << 2
+            elif e0 == i1 and e1 == i2:
+                fer = (i << 2) | 1
+            elif e0 == i2 and e1 == i0:
+                fer = (i << 2) | 2
+            else:
+                continue
+            break
+
+        if fer >= 0:
+            order = _TRIANGLE_ORDER[fer & 3]
+            a, b, c = tri[order[0]], tri[order[1]], tri[order[2]]
+            fc = vertex_slot(c)
+            if 1 <= fc < 13:
+                fec = fc
+            elif c == next_index:
+                fec, next_index = 0, next_index + 1
+            else:
+                fec = 15
+                if c + 1 == last:
+                    fec, last = 13, c
+                elif c == last + 1:
+                    fec, last = 14, c
+            codes.append(((fer >> 2) << 4) | fec)
+            if fec == 15:
+                _append_index(data, c, last)
+                last = c
+            if fec == 0 or fec >= 13:
+                vertex_fifo[vertex_offset] = c
+                vertex_offset = (vertex_offset + 1) & 15
+            edge_fifo[edge_offset] = (c, b)
+            edge_fifo[(edge_offset + 1) & 15] = (a, c)
+            edge_offset = (edge_offset + 2) & 15
+            continue
+
+        rotation = 1 if i1 == next_index else 2 if i2 == next_index else 0
+        order = _TRIANGLE_ORDER[rotation]
+        a, b, c = tri[order[0]], tri[order[1]], tri[order[2]]
+        reset = a == 0 and b == 1 and c == 2 and next_index > 0
+        if reset:
+            next_index = 0
+            vertex_fifo = [-1] * 16
+        fb, fc = vertex_slot(b), vertex_slot(c)
+        if a == next_index:
+            fea, next_index = 0, next_index + 1
+        else:
+            fea = 15
+        if 0 <= fb < 14:
+            feb = fb + 1
+        elif b == next_index:
+            feb, next_index = 0, next_index + 1
+        else:
+            feb = 15
+        if 0 <= fc < 14:
+            fec = fc + 1
+        elif c == next_index:
+            fec, next_index = 0, next_index + 1
+        else:
+            fec = 15
+
+        codeaux = (feb << 4) | fec
+        aux_index = _CODEAUX_INDEX.get(codeaux)
+        if fea == 0 and aux_index is not None and not reset:
+            codes.append(0xF0 | aux_index)
+        else:
+            codes.append(0xF0 | 14 | (fea & 1))
+            data.append(codeaux)
+        for fe, v in ((fea, a), (feb, b), (fec, c)):
+            if fe == 15:
+                _append_index(data, v, last)
+                last = v
+        for fe, v in ((fea, a), (feb, b), (fec, c)):
+            if fe == 0 or fe == 15:
+                vertex_fifo[vertex_offset] = v
+                vertex_offset = (vertex_offset + 1) & 15
+        edge_fifo[edge_offset] = (b, a)
+        edge_fifo[(edge_offset + 1) & 15] = (c, b)
+        edge_fifo[(edge_offset + 2) & 15] = (a, c)
+        edge_offset = (edge_offset + 3) & 15
+
+    # The aux table doubles as the padding the decoder relies on
+    return b'\xe1' + bytes(codes) + bytes(data) + _CODEAUX_TABLE
+
+
+# --- GLB writer ---
+
+class _MeshoptBuilder(GLTFBuilder):
+    """
+    GLTFBuilder whose buffer views are stored meshopt-encoded in the BIN
+    chunk. The views themselves point into a fallback buffer that has a
+    length but no data, as EXT_meshopt_compression prescribes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fallback_length = 0
+
+    def add_accessor(self, array, accessor_type, target=None, byte_stride=None, mode='ATTRIBUTES',
+                     filter_name=None, **extra):
+        array = np.ascontiguousarray(array)
+        if mode == 'TRIANGLES':
+            count, stride = array.size, array.dtype.itemsize
+            encoded = encode_index_buffer(array)
+        else:
+            count, stride = len(array), array.nbytes // max(len(array), 1)
+            encoded = encode_vertex_buffer(array.view(np.uint8).reshape(count, stride))
+        if self.offset % 4:
+            padding = _pad4(self.offset)
+            self.buffers.append(b'\0' * padding)
+            self.offset += padding
+
+        extension = {'buffer': 0, 'byteOffset': self.offset, 'byteLength': len(encoded),
+                     'byteStride': stride, 'count': count, 'mode': mode}
+        if filter_name:
+            extension['filter'] = filter_name
+        view = {'buffer': 1, 'byteOffset': self.fallback_length, 'byteLength': count * stride,
+                'extensions': {_MESHOPT: extension}}
+        if mode == 'ATTRIBUTES':
+            view['byteStride'] = stride
+        if target:
+            view['target'] = target
+        self.gltf['bufferViews'].append(view)
+        self.buffers.append(encoded)
+        self.offset += len(encoded)
+        self.fallback_length += count * stride + _pad4(count * stride)
+
+        accessor = {'bufferView': len(self.gltf['bufferViews']) - 1,
+                    'componentType': _GLTF_COMPONENT_CODES[array.dtype],
+                    'count': count, 'type': accessor_type}
+        accessor.update(extra)
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def write(self, path):
+        fallback = {'byteLength': self.fallback_length, 'extensions': {_MESHOPT: {'fallback': True}}}
+        write_glb(path, self.gltf, self.buffers, extra_buffers=[fallback])
+
+
+def _write_quantized(mesh, path, meshopt, position_bits):
+    mesh = _optimize_order(mesh)
+    builder = _MeshoptBuilder() if meshopt else GLTFBuilder()
+    extensions = [_QUANTIZATION] + ([_MESHOPT] if meshopt else [])
+
+    positions, translation, scale = _quantize_positions(mesh.vertices, position_bits)
+    attributes = {'POSITION': builder.add_accessor(positions, 'VEC3', target=_ARRAY_BUFFER, byte_stride=8,
+                                                   min=positions[:, :3].min(axis=0).tolist(),
+                                                   max=positions[:, :3].max(axis=0).tolist())}
+    if mesh.normals is not None:
+        if meshopt:
+            normals = _encode_octahedral(mesh.normals)
+            attributes['NORMAL'] = builder.add_accessor(normals, 'VEC3', target=_ARRAY_BUFFER, byte_stride=4,
+                                                        filter_name='OCTAHEDRAL', normalized=True)
+        else:
+            normals = np.zeros((mesh.vertex_count, 4), dtype=np.int8)
+            normals[:, :3] = _quantize_snorm(mesh.normals, 8)
+            attributes['NORMAL'] = builder.add_accessor(normals, 'VEC3', target=_ARRAY_BUFFER, byte_stride=4,
+                                                        normalized=True)
+    if mesh.uvs is not None:
+        if mesh.uvs.min() >= 0.0 and mesh.uvs.max() <= 1.0:
+            uvs = np.rint(mesh.uvs * 65535.0).astype(np.uint16)
+            attributes['TEXCOORD_0'] = builder.add_accessor(uvs, 'VEC2', target=_ARRAY_BUFFER, normalized=True)
+        else:
+            attributes['TEXCOORD_0'] = builder.add_accessor(mesh.uvs, 'VEC2', target=_ARRAY_BUFFER)
+
+    index_type = np.uint16 if mesh.vertex_count <= 0xFFFF else np.uint32
+    indices = mesh.faces.astype(index_type).reshape(-1)
+    if meshopt:
+        index_accessor = builder.add_accessor(indices, 'SCALAR', target=_ELEMENT_ARRAY_BUFFER, mode='TRIANGLES')
+    else:
+        index_accessor = builder.add_accessor(indices, 'SCALAR', target=_ELEMENT_ARRAY_BUFFER)
+
+    builder.gltf.update({
+        'extensionsUsed': extensions,
+        'extensionsRequired': extensions,
+        'meshes': [{'primitives': [{'attributes': attributes, 'indices': index_accessor, 'mode': 4}]}],
+        # Dequantization lives in the node transform, per KHR_mesh_quantization
+        'nodes': [{'mesh': 0, 'translation': translation, 'scale': [scale] * 3}],
+        'scenes': [{'nodes': [0]}],
+        'scene': 0
+    })
+    builder.write(path)
+
+
+def uncompressed_size(mesh):
+    """Bytes of attribute and index data in the float32 GLB Mesh.save writes"""
+    index_size = 2 if mesh.vertex_count <= 0xFFFF else 4
+    return mesh.nbytes - mesh.faces.nbytes + mesh.faces.size * index_size
+
+
+def write_compressed_glb(mesh, path, compression='meshopt', position_bits=16):
+    """
+    Write mesh as GLB with the given compression ('meshopt', 'quantize' or
+    'none'). Falls back to a plain GLB when encoding fails or does not make
+    the file smaller. Returns a report with the mode actually used, sizes,
+    ratio and encode time.
+    """
+    if compression not in COMPRESSION_MODES:
+        raise ValueError(f"Unknown GLB compression: {compression}")
+    started = time.perf_counter()
+    raw_size = uncompressed_size(mesh)
+    used = compression if mesh.face_count else 'none'
+
+    if used != 'none':
+        try:
+            _write_quantized(mesh, path, used == 'meshopt', position_bits)
+            if os.path.getsize(path) >= raw_size:
+                used = 'none'
+        except Exception as e:
+            logger.warning(f"{compression} GLB encoding failed, writing uncompressed: {str(e)}")
+            used = 'none'
+    if used == 'none':
+        mesh.save(path, 'glb')
+
+    size = os.path.getsize(path)
+    return {
+        'compression': used,
+        'size': size,
+        'raw_size': raw_size,
+        'ratio': round(raw_size / size, 2) if size else None,
+        'encode_time': round(time.perf_counter() - started, 4)
+    }
@@ -0,0 +1,71 @@
+"""
+Content digests used for cache keys, request coalescing, upload ids and
+HTTP ETags.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+REMOTE_SCHEMES = ('http://', 'https://')
+
+
+def hash_file(path, digest=None):
+    """Feed a file into digest in fixed-size chunks and return the digest"""
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+
+def is_remote(ref):
+    return isinstance(ref, str) and ref.lower().startswith(REMOTE_SCHEMES)
+
+
+def within_dirs(path, dirs):
+    """Whether path resolves (symlinks included) to somewhere inside one of dirs"""
+    real = os.path.realpath(path)
+    for directory in dirs:
+        root = os.path.realpath(directory)
+        if os.path.commonpath([real, root]) == root:
+            return True
+    return False
+
+
+def digest_inputs(refs, params=None, input_dirs=()):
+    """
+    SHA-256 over input file bytes plus JSON-normalised params.
+
+    Files inside input_dirs are hashed by content. Everything else (remote
+    URLs, content ids, names, paths outside input_dirs) is hashed by
+    reference and never opened: the request thread must not reach out to
+    hosts a client names (SSRF), and the services treat a URL as opaque.
+    """
+    digest = hashlib.sha256()
+    for ref in refs:
+        if isinstance(ref, str) and not is_remote(ref) and within_dirs(ref, input_dirs) and os.path.isfile(ref):
+            digest.update(b'file:%d:' % os.path.getsize(ref))
+            hash_file(ref, digest)
+        else:
+            digest.update(b'ref:' + str(ref).encode('utf-8'))
+        digest.update(b'\0')
+    if params is not None:
+        digest.update(json.dumps(params, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _content_etag(path, size, mtime_ns):
+    return hash_file(path).hexdigest()[:32]
+
+
+def file_etag(path):
+    """
+    Strong ETag from the file's content hash. Hashes are memoised per
+    (path, size, mtime), so a file is read once until it changes.
+    """
+    stat = os.stat(path)
+    return _content_etag(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,338 @@
+"""
+Pluggable job stores.
+
+MemoryJobStore keeps everything in-process (single worker, tests).
+SQLiteJobStore persists jobs to a WAL-mode database so job state survives
+restarts and is visible to every gunicorn worker sharing the jobs directory.
+Progress updates are buffered and written in one transaction per flush
+interval rather than one commit per percent.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .sqlite_util import ThreadLocalConnection
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'queued', 'processing')
+
+# (column, SQL type, JSON-encoded)
+_COLUMNS = [
+    ('id', 'TEXT PRIMARY KEY', False),
+    ('status', 'TEXT NOT NULL', False),
+    ('progress', 'INTEGER NOT NULL DEFAULT 0', False),
+    ('input_data', 'TEXT', True),
+    ('result', 'TEXT', True),
+    ('error', 'TEXT', False),
+    ('created_at', 'REAL', False),
+    ('started_at', 'REAL', False),
+    ('completed_at', 'REAL', False),
+    ('updated_at', 'REAL', False),
+    ('owner', 'TEXT', False),
+    ('dedupe_key', 'TEXT', False),
+]
+_COLUMN_NAMES = [name for name, _, _ in _COLUMNS]
+_JSON_COLUMNS = {name for name, _, is_json in _COLUMNS if is_json}
+
+
+def process_owner():
+    """Identify the current process so interrupted jobs can be recovered"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    """Interface shared by all job store backends"""
+
+    def create(self, record):
+        raise NotImplementedError
+
+    def create_or_attach(self, record):
+        """
+        Create record unless an active job with the same dedupe_key exists.
+
+        Returns None when the record was created, otherwise the id of the
+        in-flight job the caller should attach to.
+        """
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        raise NotImplementedError
+
+    def set_progress(self, job_id, progress):
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        raise NotImplementedError
+
+    def list(self, status=None, limit=100):
+        raise NotImplementedError
+
+    def recover_interrupted(self):
+        """Fail active jobs whose owning process is gone; returns the count"""
+        return 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, record):
+        record = dict(record)
+        record.setdefault('updated_at', time.time())
+        with self._lock:
+            self._jobs[record['id']] = record
+
+    def create_or_attach(self, record):
+        record = dict(record)
+        record.setdefault('updated_at', time.time())
+        key = record.get('dedupe_key')
+        with self._lock:
+            if key is not None:
+                for existing in self._jobs.values():
+                    if existing.get('dedupe_key') == key and existing['status'] in ACTIVE_STATUSES:
+                        return existing['id']
+            self._jobs[record['id']] = record
+        return None
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record else None
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def set_progress(self, job_id, progress):
+        self.update(job_id, progress=progress)
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def list(self, status=None, limit=100):
+        with self._lock:
+            records = [dict(r) for r in self._jobs.values()
+                       if status is None or r['status'] == status]
+        records.sort(key=lambda r: r.get('created_at') or 0, reverse=True)
+        return records[:limit]
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, path, flush_interval=1.0):
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self._conn = ThreadLocalConnection(self.path)
+        self._pending_progress = {}
+        self._pending_lock = threading.Lock()
+        # Serialises flushes against status updates from this process so a
+        # stale buffered progress value never lands after a final update
+        self._write_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+        self._stop = threading.Event()
+        self._init_schema()
+
+    def _connect(self):
+        return self._conn.get()
+
+    def _init_schema(self):
+        conn = self._connect()
+        columns = ', '.join(f"{name} {sql_type}" for name, sql_type, _ in _COLUMNS)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS jobs ({columns})")
+        # Add columns introduced after the database was first created
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        for name, sql_type, _ in _COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type.replace('PRIMARY KEY', '')}")
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)')
+        # At most one in-flight job per dedupe key, enforced across processes
+        active = ', '.join(f"'{status}'" for status in ACTIVE_STATUSES)
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe ON jobs(dedupe_key) '
+                     f"WHERE dedupe_key IS NOT NULL AND status IN ({active})")
+
+    @staticmethod
+    def _encode(name, value):
+        if name in _JSON_COLUMNS and value is not None:
+            return json.dumps(value)
+        return value
+
+    def _decode_row(self, row):
+        record = {}
+        for name in row.keys():
+            value = row[name]
+            if name in _JSON_COLUMNS and value is not None:
+                value = json.loads(value)
+            record[name] = value
+        return record
+
+    def create(self, record):
+        record = dict(record)
+        record.setdefault('updated_at', time.time())
+        record.setdefault('owner', process_owner())
+        names = [name for name in _COLUMN_NAMES if name in record]
+        placeholders = ', '.join('?' for _ in names)
+        values = [self._encode(name, record[name]) for name in names]
+        with self._write_lock:
+            self._connect().execute(
+                f"INSERT INTO jobs ({', '.join(names)}) VALUES ({placeholders})", values)
+
+    def create_or_attach(self, record):
+        key = record.get('dedupe_key')
+        if key is None:
+            self.create(record)
+            return None
+        placeholders = ', '.join('?' for _ in ACTIVE_STATUSES)
+        while True:
+            try:
+                self.create(record)
+                return None
+            except sqlite3.IntegrityError:
+                row = self._connect().execute(
+                    f"SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ({placeholders})",
+                    (key, *ACTIVE_STATUSES)).fetchone()
+                if row is not None:
+                    return row['id']
+                # The other job finished in between; try inserting again
+
+    def get(self, job_id):
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        record = self._decode_row(row)
+        with self._pending_lock:
+            if job_id in self._pending_progress:
+                record['progress'] = self._pending_progress[job_id]
+        return record
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        names = [name for name in fields if name in _COLUMN_NAMES]
+        assignments = ', '.join(f"{name} = ?" for name in names)
+        values = [self._encode(name, fields[name]) for name in names]
+        with self._write_lock:
+            with self._pending_lock:
+                pending = self._pending_progress.pop(job_id, None)
+            if pending is not None and 'progress' not in fields:
+                assignments += ', progress = ?'
+                values.append(pending)
+            self._connect().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", values + [job_id])
+
+    def set_progress(self, job_id, progress):
+        with self._pending_lock:
+            self._pending_progress[job_id] = progress
+        self._ensure_flusher()
+
+    def delete(self, job_id):
+        with self._pending_lock:
+            self._pending_progress.pop(job_id, None)
+        with self._write_lock:
+            self._connect().execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def list(self, status=None, limit=100):
+        conn = self._connect()
+        if status is None:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+        else:
+            rows = conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?',
+                                (status, limit))
+        return [self._decode_row(row) for row in rows]
+
+    def recover_interrupted(self):
+        host = socket.gethostname()
+        conn = self._connect()
+        placeholders = ', '.join('?' for _ in ACTIVE_STATUSES)
+        rows = conn.execute(f"SELECT id, owner FROM jobs WHERE status IN ({placeholders})",
+                            ACTIVE_STATUSES).fetchall()
+        interrupted = []
+        for row in rows:
+            owner_host, _, owner_pid = (row['owner'] or '').rpartition(':')
+            if owner_host != host or not owner_pid.isdigit():
+                continue
+            if not _pid_alive(int(owner_pid)):
+                interrupted.append(row['id'])
+        now = time.time()
+        with self._write_lock:
+            for job_id in interrupted:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, completed_at = ?, updated_at = ? "
+                             "WHERE id = ?", ('Interrupted by service restart', now, now, job_id))
+        return len(interrupted)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._pending_lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name='job-store-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to flush job progress: {str(e)}")
+
+    def flush(self):
+        """Write all buffered progress updates in a single transaction"""
+        with self._write_lock:
+            with self._pending_lock:
+                if not self._pending_progress:
+                    return
+                batch = list(self._pending_progress.items())
+                self._pending_progress.clear()
+            now = time.time()
+            conn = self._connect()
+            conn.execute('BEGIN')
+            try:
+                conn.executemany('UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?',
+                                 [(progress, now, job_id) for job_id, progress in batch])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        self._conn.close()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_job_store(backend, path=None, flush_interval=1.0):
+    """Build a job store from configuration ('sqlite' or 'memory')"""
+    if backend == 'memory':
+        return MemoryJobStore()
+    if backend == 'sqlite':
+        return SQLiteJobStore(path, flush_interval=flush_interval)
+    raise ValueError(f"Unknown job store backend: {backend}")
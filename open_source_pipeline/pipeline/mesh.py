@@ -0,0 +1,533 @@
+"""
+Array-backed triangle mesh and OBJ/STL/GLB I/O.
+
+Mesh keeps geometry in contiguous NumPy arrays (float32 (N, 3) vertices,
+int32 (M, 3) faces, optional float32 (N, 3) normals and (N, 2) UVs) so a
+million-triangle model costs tens of megabytes instead of millions of
+Python objects. Binary STL is read through mmap and GLB through views over
+the file bytes; ASCII STL and OBJ are tokenized a chunk at a time with
+NumPy's C number parser rather than line by line, so extra memory stays
+bounded by the chunk size. Writers hand array buffers straight to the file.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import warnings
+
+import numpy as np
+
+# glTF component types
+_GLTF_COMPONENT_TYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16,
+    5123: np.uint16, 5125: np.uint32, 5126: np.float32
+}
+_GLTF_COMPONENT_CODES = {np.dtype(v): k for k, v in _GLTF_COMPONENT_TYPES.items()}
+_GLTF_TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT4': 16}
+
+_GLB_MAGIC = 0x46546C67
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+STL_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+
+
+class Mesh:
+    __slots__ = ('vertices', 'faces', 'normals', 'uvs')
+
+    def __init__(self, vertices, faces, normals=None, uvs=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.faces = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1, 3)
+        self.normals = None if normals is None else np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+        self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 3), np.float32), np.empty((0, 3), np.int32))
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.vertices, self.faces, self.normals, self.uvs) if a is not None)
+
+    def bounds(self):
+        if not len(self.vertices):
+            return None
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    def face_normals(self):
+        tri = self.vertices[self.faces]
+        normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return normals / np.where(lengths > 0, lengths, 1.0)
+
+    def compute_normals(self):
+        """Area-weighted vertex normals"""
+        tri = self.vertices[self.faces]
+        weighted = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        normals = np.zeros_like(self.vertices)
+        for corner in range(3):
+            np.add.at(normals, self.faces[:, corner], weighted)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.normals = (normals / np.where(lengths > 0, lengths, 1.0)).astype(np.float32)
+        return self.normals
+
+    def stats(self):
+        bounds = self.bounds()
+        return {
+            'vertices': self.vertex_count,
+            'faces': self.face_count,
+            'has_normals': self.normals is not None,
+            'has_uvs': self.uvs is not None,
+            'bounds': [bounds[0].tolist(), bounds[1].tolist()] if bounds else None
+        }
+
+    def save(self, path, file_format=None):
+        file_format = (file_format or os.path.splitext(str(path))[1].lstrip('.')).lower()
+        writer = _WRITERS.get(file_format)
+        if writer is None:
+            raise ValueError(f"Unsupported mesh format: {file_format}")
+        writer(self, path)
+        return str(path)
+
+    def __repr__(self):
+        return f"Mesh(vertices={self.vertex_count}, faces={self.face_count})"
+
+
+def uv_sphere(segments=32, rings=16, radius=1.0):
+    """Placeholder geometry with a controllable triangle count"""
+    theta = np.linspace(0.0, np.pi, rings + 1, dtype=np.float32)
+    phi = np.linspace(0.0, 2.0 * np.pi, segments + 1, dtype=np.float32)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    normals = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1).reshape(-1, 3)
+    uvs = np.stack([p / (2.0 * np.pi), 1.0 - t / np.pi], axis=-1).reshape(-1, 2)
+
+    row = segments + 1
+    r, s = np.meshgrid(np.arange(rings), np.arange(segments), indexing='ij')
+    a = (r * row + s).ravel()
+    b, c, d = a + row, a + 1, a + row + 1
+    faces = np.concatenate([np.stack([a, c, b], axis=1)[a >= row],  # skip degenerate pole triangles
+                            np.stack([c, d, b], axis=1)[b < row * rings]])
+    return Mesh(normals * radius, faces, normals=normals, uvs=uvs)
+
+
+# --- text tokenizing ---
+
+READ_CHUNK_SIZE = 16 * 1024 * 1024
+
+_STL_VERTEX = re.compile(rb'^[ \t]*vertex[ \t]+([^\r\n]*)', re.M)
+# Bytes looked at to tell ASCII from binary STL; float data is never all text this long
+_STL_SNIFF_BYTES = 512
+_STL_CONTROL_BYTES = bytes(b for b in range(32) if b not in b'\t\n\x0b\x0c\r')
+_OBJ_V = re.compile(rb'^v[ \t]+([^\r\n#]*)', re.M)
+_OBJ_VT = re.compile(rb'^vt[ \t]+([^\r\n#]*)', re.M)
+_OBJ_VN = re.compile(rb'^vn[ \t]+([^\r\n#]*)', re.M)
+_OBJ_F = re.compile(rb'^f[ \t]+([^\r\n#]*)', re.M)
+
+
+def _iter_line_chunks(path, chunk_size=READ_CHUNK_SIZE):
+    """Yield blocks of whole lines of roughly chunk_size bytes"""
+    with open(path, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            if not cut:
+                tail = block
+                continue
+            tail = block[cut:]
+            yield block[:cut]
+        if tail:
+            yield tail + b'\n'
+
+
+def _fromstring(text, dtype):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        return np.fromstring(text, dtype=dtype, sep=' ')
+
+
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\n\r\x0b\x0c')] = True
+_DIGITS = b'0123456789'
+
+
+def _tokens_per_line(text):
+    """Whitespace-separated token count of every line of text, vectorised"""
+    data = np.frombuffer(text, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(1, dtype=np.intp)
+    space = _WHITESPACE[data]
+    starts = np.flatnonzero(space[:-1] & ~space[1:]) + 1
+    if not space[0]:
+        starts = np.concatenate(([0], starts))
+    ends = np.concatenate((np.flatnonzero(data == 10), [len(data)]))
+    return np.diff(np.searchsorted(starts, ends), prepend=0)
+
+
+def _parse_rows(lines, width, dtype=np.float32):
+    """Parse matched lines into a (len(lines), width) array in one C-level pass"""
+    if not lines:
+        return np.empty((0, width), dtype)
+    per_line = len(lines[0].split())
+    text = b'\n'.join(lines)
+    values = _fromstring(text, dtype)
+    # The total alone can hide ragged rows (4 + 3 + 5 == 3 * 4), so check every line
+    if (per_line >= width and values.size == len(lines) * per_line
+            and (_tokens_per_line(text) == per_line).all()):
+        return values.reshape(-1, per_line)[:, :width]
+    # Ragged rows (optional w / vertex colours on some lines only)
+    return np.array([line.split()[:width] for line in lines], dtype=dtype).reshape(-1, width)
+
+
+# --- STL ---
+
+def _read_stl(path):
+    """
+    ASCII when the file starts with 'solid' and reads as text; some exporters
+    put 'solid' in binary headers too, but the triangle data that follows has
+    control bytes. A binary file whose size does not match its triangle count
+    is truncated or padded and raises ValueError.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(_STL_SNIFF_BYTES)
+    if head.lstrip().startswith(b'solid') and not any(b in _STL_CONTROL_BYTES for b in head):
+        return _read_ascii_stl(path)
+    if size < 84:
+        raise ValueError(f"Binary STL is {size} bytes, shorter than its 84-byte header")
+    count = struct.unpack_from('<I', head, 80)[0]
+    expected = 84 + count * STL_DTYPE.itemsize
+    if expected != size:
+        raise ValueError(f"Binary STL declares {count} triangles ({expected} bytes) but is {size} bytes")
+    return _read_binary_stl(path, count)
+
+
+def _read_binary_stl(path, count):
+    if not count:
+        return Mesh.empty()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Record view over the mapped file; only the vertex block is copied out
+        triangles = np.frombuffer(mm, dtype=STL_DTYPE, count=count, offset=84)
+        vertices = np.ascontiguousarray(triangles['vertices']).reshape(-1, 3)
+        del triangles
+    return Mesh(vertices, np.arange(len(vertices), dtype=np.int32))
+
+
+def _read_ascii_stl(path):
+    blocks = [_parse_rows(_STL_VERTEX.findall(chunk), 3) for chunk in _iter_line_chunks(path)]
+    vertices = np.concatenate(blocks) if blocks else np.empty((0, 3), np.float32)
+    vertices = vertices[:len(vertices) - len(vertices) % 3]
+    return Mesh(vertices, np.arange(len(vertices), dtype=np.int32))
+
+
+def _write_stl(mesh, path):
+    triangles = np.zeros(mesh.face_count, dtype=STL_DTYPE)
+    triangles['vertices'] = mesh.vertices[mesh.faces]
+    triangles['normal'] = mesh.face_normals()
+    with open(path, 'wb') as f:
+        f.write(b'binary STL'.ljust(80, b' '))
+        f.write(struct.pack('<I', mesh.face_count))
+        f.write(memoryview(triangles).cast('B'))
+
+
+# --- OBJ ---
+
+def _obj_corner(token, counts):
+    # 'v', 'v/vt', 'v//vn' or 'v/vt/vn' -> absolute 1-based (v, vt, vn), 0 = absent
+    corner = [0, 0, 0]
+    for slot, part in enumerate(token.split(b'/')[:3]):
+        if part:
+            index = int(part)
+            corner[slot] = index if index > 0 else counts[slot] + index + 1
+    return corner
+
+
+def _obj_faces_slow(chunk, counts):
+    """Line-by-line fallback for mixed polygons and relative indices"""
+    corners = []
+    for line in chunk.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        tag = parts[0]
+        if tag == b'v':
+            counts[0] += 1
+        elif tag == b'vt':
+            counts[1] += 1
+        elif tag == b'vn':
+            counts[2] += 1
+        elif tag == b'f':
+            polygon = [_obj_corner(token, counts) for token in parts[1:]]
+            for i in range(1, len(polygon) - 1):
+                corners.extend((polygon[0], polygon[i], polygon[i + 1]))
+    return np.array(corners, dtype=np.int32).reshape(-1, 3)
+
+
+def _obj_faces_fast(lines):
+    """Vectorised parse of uniform face lines; None if the chunk is not uniform"""
+    first = lines[0].split()
+    sides = len(first)
+    slots = [i for i, part in enumerate(first[0].split(b'/')[:3]) if part]
+    text = b'\n'.join(lines)
+    # Without the digits every line must read exactly like the first: same
+    # corner count, same v/vt/vn slash layout (a matching total is not enough)
+    layout = lines[0].translate(None, _DIGITS)
+    if text.translate(None, _DIGITS) != b'\n'.join([layout] * len(lines)):
+        return None
+    values = _fromstring(text.replace(b'/', b' '), np.int64)
+    if sides < 3 or values.size != len(lines) * sides * len(slots) or (values < 0).any():
+        return None
+    polygons = values.reshape(len(lines), sides, len(slots))
+    # Fan-triangulate: (0, i, i + 1) for every polygon at once
+    fan = np.stack([np.zeros(sides - 2, dtype=np.intp), np.arange(1, sides - 1), np.arange(2, sides)], axis=1)
+    triangles = polygons[:, fan].reshape(-1, len(slots))
+    corners = np.zeros((len(triangles), 3), dtype=np.int32)
+    corners[:, slots] = triangles
+    return corners
+
+
+def _read_obj(path):
+    positions, texcoords, normals, corners = [], [], [], []
+    counts = [0, 0, 0]
+    for chunk in _iter_line_chunks(path):
+        chunk_v = _parse_rows(_OBJ_V.findall(chunk), 3)
+        chunk_vt = _parse_rows(_OBJ_VT.findall(chunk), 2)
+        chunk_vn = _parse_rows(_OBJ_VN.findall(chunk), 3)
+        face_lines = _OBJ_F.findall(chunk)
+        chunk_corners = _obj_faces_fast(face_lines) if face_lines else None
+        if chunk_corners is None and face_lines:
+            chunk_corners = _obj_faces_slow(chunk, list(counts))
+        positions.append(chunk_v)
+        texcoords.append(chunk_vt)
+        normals.append(chunk_vn)
+        if chunk_corners is not None:
+            corners.append(chunk_corners)
+        counts = [counts[0] + len(chunk_v), counts[1] + len(chunk_vt), counts[2] + len(chunk_vn)]
+
+    positions = np.concatenate(positions) if positions else np.empty((0, 3), np.float32)
+    corners = np.concatenate(corners) if corners else np.empty((0, 3), np.int32)
+    if not len(corners):
+        return Mesh(positions, np.empty((0, 3), np.int32))
+
+    texcoords = np.concatenate(texcoords)
+    normals = np.concatenate(normals)
+    use_uvs = len(texcoords) and (corners[:, 1] > 0).all()
+    use_normals = len(normals) and (corners[:, 2] > 0).all()
+    if not use_uvs and not use_normals:
+        return Mesh(positions, corners[:, 0] - 1)
+
+    # Each distinct v/vt/vn combination becomes one output vertex
+    keys = corners * np.array([1, 1 if use_uvs else 0, 1 if use_normals else 0], dtype=np.int32)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return Mesh(positions[unique[:, 0] - 1], inverse.reshape(-1),
+                normals=normals[unique[:, 2] - 1] if use_normals else None,
+                uvs=texcoords[unique[:, 1] - 1] if use_uvs else None)
+
+
+def _write_obj(mesh, path):
+    with open(path, 'w') as f:
+        f.write(f"# {mesh.vertex_count} vertices, {mesh.face_count} faces\n")
+        np.savetxt(f, mesh.vertices, fmt='v %.6g %.6g %.6g')
+        has_uvs, has_normals = mesh.uvs is not None, mesh.normals is not None
+        if has_uvs:
+            np.savetxt(f, mesh.uvs, fmt='vt %.6g %.6g')
+        if has_normals:
+            np.savetxt(f, mesh.normals, fmt='vn %.6g %.6g %.6g')
+        if not mesh.face_count:
+            return
+        # OBJ indices are 1-based; v/vt/vn share the same index here
+        faces = mesh.faces.astype(np.int64) + 1
+        if has_uvs and has_normals:
+            fmt = 'f %d/%d/%d %d/%d/%d %d/%d/%d'
+            faces = np.repeat(faces, 3, axis=1)
+        elif has_uvs or has_normals:
+            fmt = 'f %d/%d %d/%d %d/%d' if has_uvs else 'f %d//%d %d//%d %d//%d'
+            faces = np.repeat(faces, 2, axis=1)
+        else:
+            fmt = 'f %d %d %d'
+        np.savetxt(f, faces, fmt=fmt)
+
+
+# --- GLB ---
+
+def _read_glb(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if magic != _GLB_MAGIC or version != 2:
+        raise ValueError('Not a glTF 2.0 binary file')
+
+    gltf, binary = None, b''
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = memoryview(data)[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == _CHUNK_JSON:
+            gltf = json.loads(bytes(chunk))
+        elif chunk_type == _CHUNK_BIN:
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ValueError('GLB has no JSON chunk')
+    if gltf.get('extensionsRequired'):
+        raise ValueError(f"GLB requires unsupported extensions: {', '.join(gltf['extensionsRequired'])}")
+
+    def accessor(index):
+        acc = gltf['accessors'][index]
+        view = gltf['bufferViews'][acc['bufferView']]
+        dtype = np.dtype(_GLTF_COMPONENT_TYPES[acc['componentType']])
+        width = _GLTF_TYPE_SIZES[acc['type']]
+        start = view.get('byteOffset', 0) + acc.get('byteOffset', 0)
+        stride = view.get('byteStride')
+        if stride and stride != dtype.itemsize * width:
+            raw = np.frombuffer(binary, dtype=np.uint8, count=stride * (acc['count'] - 1) + dtype.itemsize * width,
+                                offset=start)
+            return np.lib.stride_tricks.as_strided(raw.view(dtype), shape=(acc['count'], width),
+                                                   strides=(stride, dtype.itemsize))
+        # Zero-copy view over the BIN chunk
+        return np.frombuffer(binary, dtype=dtype, count=acc['count'] * width, offset=start).reshape(-1, width)
+
+    vertices, faces, normals, uvs = [], [], [], []
+    base = 0
+    for gltf_mesh in gltf.get('meshes', []):
+        for primitive in gltf_mesh['primitives']:
+            if primitive.get('mode', 4) != 4:
+                continue
+            attributes = primitive['attributes']
+            positions = accessor(attributes['POSITION'])
+            if 'indices' in primitive:
+                indices = accessor(primitive['indices']).reshape(-1, 3)
+            else:
+                indices = np.arange(len(positions)).reshape(-1, 3)
+            vertices.append(positions)
+            faces.append(indices.astype(np.int32) + base)
+            normals.append(accessor(attributes['NORMAL']) if 'NORMAL' in attributes else None)
+            uvs.append(accessor(attributes['TEXCOORD_0']) if 'TEXCOORD_0' in attributes else None)
+            base += len(positions)
+
+    if not vertices:
+        return Mesh.empty()
+    if len(vertices) == 1:
+        # Single primitive: keep the views as they are
+        return Mesh(vertices[0], faces[0], normals=normals[0], uvs=uvs[0])
+    return Mesh(np.concatenate(vertices), np.concatenate(faces),
+                normals=np.concatenate(normals) if all(n is not None for n in normals) else None,
+                uvs=np.concatenate(uvs) if all(u is not None for u in uvs) else None)
+
+
+def _pad4(length):
+    return (4 - length % 4) % 4
+
+
+def write_glb(path, gltf, buffers, extra_buffers=()):
+    """
+    Write a GLB from a glTF dict and the list of arrays/bytes making up its
+    BIN chunk. extra_buffers are appended after the BIN buffer as-is.
+    """
+    bin_length = sum(memoryview(b).nbytes for b in buffers)
+    bin_length += _pad4(bin_length)
+    if buffers:
+        gltf['buffers'] = [{'byteLength': bin_length}] + list(extra_buffers)
+    json_bytes = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_bytes += b' ' * _pad4(len(json_bytes))
+    total = 12 + 8 + len(json_bytes) + (8 + bin_length if buffers else 0)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<III', _GLB_MAGIC, 2, total))
+        f.write(struct.pack('<II', len(json_bytes), _CHUNK_JSON))
+        f.write(json_bytes)
+        if buffers:
+            f.write(struct.pack('<II', bin_length, _CHUNK_BIN))
+            written = 0
+            for buffer in buffers:
+                view = memoryview(buffer).cast('B')
+                f.write(view)
+                written += view.nbytes
+            f.write(b'\0' * (bin_length - written))
+
+
+class GLTFBuilder:
+    """Collects 4-byte aligned accessors for write_glb"""
+
+    def __init__(self):
+        self.gltf = {'asset': {'version': '2.0', 'generator': '3d-pipeline'},
+                     'bufferViews': [], 'accessors': []}
+        self.buffers = []
+        self.offset = 0
+
+    def add_accessor(self, array, accessor_type, target=None, byte_stride=None, **extra):
+        array = np.ascontiguousarray(array)
+        if self.offset % 4:
+            padding = _pad4(self.offset)
+            self.buffers.append(b'\0' * padding)
+            self.offset += padding
+        view = {'buffer': 0, 'byteOffset': self.offset, 'byteLength': array.nbytes}
+        if byte_stride:
+            view['byteStride'] = byte_stride
+        if target:
+            view['target'] = target
+        self.gltf['bufferViews'].append(view)
+        self.buffers.append(array)
+        self.offset += array.nbytes
+
+        accessor = {'bufferView': len(self.gltf['bufferViews']) - 1,
+                    'componentType': _GLTF_COMPONENT_CODES[array.dtype],
+                    'count': len(array), 'type': accessor_type}
+        accessor.update(extra)
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def write(self, path):
+        write_glb(path, self.gltf, self.buffers)
+
+
+def _write_glb(mesh, path):
+    builder = GLTFBuilder()
+    attributes = {}
+    if mesh.vertex_count:
+        lo, hi = mesh.bounds()
+        attributes['POSITION'] = builder.add_accessor(mesh.vertices, 'VEC3', target=34962,
+                                                      min=lo.tolist(), max=hi.tolist())
+    if mesh.normals is not None:
+        attributes['NORMAL'] = builder.add_accessor(mesh.normals, 'VEC3', target=34962)
+    if mesh.uvs is not None:
+        attributes['TEXCOORD_0'] = builder.add_accessor(mesh.uvs, 'VEC2', target=34962)
+
+    primitive = {'attributes': attributes, 'mode': 4}
+    if mesh.face_count:
+        index_type = np.uint16 if mesh.vertex_count <= 0xFFFF else np.uint32
+        primitive['indices'] = builder.add_accessor(mesh.faces.astype(index_type).reshape(-1), 'SCALAR',
+                                                    target=34963)
+    if attributes:
+        builder.gltf['meshes'] = [{'primitives': [primitive]}]
+        builder.gltf['nodes'] = [{'mesh': 0}]
+        builder.gltf['scenes'] = [{'nodes': [0]}]
+        builder.gltf['scene'] = 0
+    builder.write(path)
+
+
+_READERS = {'stl': _read_stl, 'obj': _read_obj, 'glb': _read_glb}
+_WRITERS = {'stl': _write_stl, 'obj': _write_obj, 'glb': _write_glb}
+
+MESH_FORMATS = tuple(_READERS)
+
+
+def load_mesh(path, file_format=None):
+    file_format = (file_format or os.path.splitext(str(path))[1].lstrip('.')).lower()
+    reader = _READERS.get(file_format)
+    if reader is None:
+        raise ValueError(f"Unsupported mesh format: {file_format}")
+    return reader(path)
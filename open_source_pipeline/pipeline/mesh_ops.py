@@ -0,0 +1,119 @@
+"""
+Mesh clean-up stages.
+
+CAD tessellators and STL exporters emit triangle soups: every triangle
+carries its own copy of each corner, so a shared edge stores its vertices
+two or more times. weld() merges vertices that fall in the same cell of a
+tolerance-sized grid, then drops faces that collapsed (repeated index or
+zero area) or that repeat another face. Everything is a handful of sorts
+over flat arrays, O(N log N) in the vertex and face counts.
+"""
+
+import numpy as np
+
+from .mesh import Mesh
+
+# Tolerance relative to the bounding-box diagonal when none is given
+DEFAULT_RELATIVE_TOLERANCE = 1e-6
+
+_KEY_BITS = 21  # three 21-bit cell coordinates pack into one int64
+
+
+def _pack_rows(rows):
+    """Pack non-negative (N, 3) integer rows into one int64 key each where they fit"""
+    rows = rows.astype(np.int64, copy=False)
+    if len(rows) and rows.max() < (1 << _KEY_BITS):
+        return (rows[:, 0] << (2 * _KEY_BITS)) | (rows[:, 1] << _KEY_BITS) | rows[:, 2]
+    return rows
+
+
+def _grid_keys(points, tolerance, origin):
+    """Quantize points to integer grid cells"""
+    return _pack_rows(np.floor((points - origin) / tolerance + 0.5))
+
+
+def _unique_rows(keys):
+    if keys.ndim == 1:
+        return np.unique(keys, return_index=True, return_inverse=True)
+    return np.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+
+def weld(mesh, tolerance=None, drop_degenerate=True, drop_duplicates=True):
+    """
+    Merge coincident vertices and remove collapsed/repeated faces.
+
+    Vertices whose positions round to the same tolerance-sized cell are
+    merged into the first of them. Where the mesh has UVs they are part of
+    the key, so texture seams stay split. Returns (mesh, report).
+    """
+    vertices, faces = mesh.vertices, mesh.faces
+    report = {
+        'vertices_before': mesh.vertex_count,
+        'faces_before': mesh.face_count,
+        'bytes_before': mesh.nbytes
+    }
+    if not mesh.vertex_count:
+        report.update({'vertices_after': 0, 'faces_after': 0, 'bytes_after': mesh.nbytes,
+                       'degenerate_faces': 0, 'duplicate_faces': 0, 'tolerance': tolerance,
+                       'vertex_reduction': 0.0, 'face_reduction': 0.0, 'size_reduction': 0.0})
+        return mesh, report
+
+    lo, hi = mesh.bounds()
+    if tolerance is None:
+        diagonal = float(np.linalg.norm(hi - lo))
+        tolerance = (diagonal or 1.0) * DEFAULT_RELATIVE_TOLERANCE
+
+    keys = _grid_keys(vertices.astype(np.float64), tolerance, lo)
+    if mesh.uvs is not None:
+        uv_cells = np.floor(mesh.uvs.astype(np.float64) / 1e-6 + 0.5).astype(np.int64)
+        keys = np.column_stack([keys.reshape(len(keys), -1), uv_cells])
+
+    _, first, inverse = _unique_rows(keys)
+    # Keep representatives in original order so output stays stable
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    remap = rank[inverse.reshape(-1)]
+    representatives = first[order]
+    faces = remap[faces].astype(np.int32)
+    welded_vertices = vertices[representatives]
+
+    degenerate = 0
+    if drop_degenerate and len(faces):
+        collapsed = (faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 0] == faces[:, 2])
+        tri = welded_vertices[faces]
+        area2 = np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1)
+        keep = ~collapsed & (area2 > 0)
+        degenerate = int(len(faces) - keep.sum())
+        faces = faces[keep]
+
+    duplicates = 0
+    if drop_duplicates and len(faces):
+        # Same three vertices in any order or winding count as one face
+        _, first_face, _ = _unique_rows(_pack_rows(np.sort(faces, axis=1)))
+        duplicates = len(faces) - len(first_face)
+        faces = faces[np.sort(first_face)]
+
+    # Drop vertices no remaining face references
+    used = np.zeros(len(welded_vertices), dtype=bool)
+    used[faces.reshape(-1)] = True
+    compact = np.cumsum(used) - 1
+    faces = compact[faces].astype(np.int32)
+    keep_vertices = representatives[used]
+
+    welded = Mesh(vertices[keep_vertices], faces,
+                  normals=mesh.normals[keep_vertices] if mesh.normals is not None else None,
+                  uvs=mesh.uvs[keep_vertices] if mesh.uvs is not None else None)
+
+    report.update({
+        'vertices_after': welded.vertex_count,
+        'faces_after': welded.face_count,
+        'bytes_after': welded.nbytes,
+        'degenerate_faces': degenerate,
+        'duplicate_faces': int(duplicates),
+        'tolerance': tolerance,
+        'vertex_reduction': 1.0 - welded.vertex_count / mesh.vertex_count,
+        'face_reduction': 1.0 - welded.face_count / mesh.face_count if mesh.face_count else 0.0,
+        'size_reduction': 1.0 - welded.nbytes / mesh.nbytes if mesh.nbytes else 0.0
+    })
+    return welded, report
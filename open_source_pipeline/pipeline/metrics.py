@@ -0,0 +1,155 @@
+"""
+Prometheus metrics shared by the pipeline services.
+
+Every metric carries a 'service' label, so cad_processor and hunyuan3d can
+use the same definitions (and the same process, in tests) without clashing.
+
+Under gunicorn each worker process keeps its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set (it must exist and be emptied before the
+workers start; gunicorn.conf.py does both), prometheus_client writes every
+sample to per-process files in that directory and render() merges them, so
+any worker answering /metrics reports the totals of all of them. Queue gauges are summed over
+live processes. The result cache hit ratio is read from the cache's
+sqlite counters at scrape time, which every worker already shares.
+
+prometheus_client is optional: without it the metric objects are no-ops
+and render() returns None.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                                   Histogram, REGISTRY, generate_latest)
+    from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+    from prometheus_client.multiprocess import MultiProcessCollector
+except ImportError:
+    CollectorRegistry = None
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR') or os.getenv('prometheus_multiproc_dir')
+
+# Request latency buckets: fast JSON endpoints up to long uploads/downloads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Stage buckets: sub-second validation up to multi-minute conversions
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, amount):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+if CollectorRegistry is not None:
+    REQUEST_LATENCY = Histogram('pipeline_http_request_duration_seconds',
+                                'HTTP request latency by route',
+                                ['service', 'method', 'route', 'status'], buckets=LATENCY_BUCKETS)
+    REQUEST_BYTES = Counter('pipeline_http_request_bytes',
+                            'Request body bytes received', ['service', 'route'])
+    RESPONSE_BYTES = Counter('pipeline_http_response_bytes',
+                             'Response body bytes sent (responses of known length)', ['service', 'route'])
+    STAGE_DURATION = Histogram('pipeline_stage_duration_seconds',
+                               'Time spent in each processing stage',
+                               ['service', 'stage'], buckets=STAGE_BUCKETS)
+    QUEUE_DEPTH = Gauge('pipeline_queue_depth', 'Jobs waiting for a worker',
+                        ['service', 'pool'], multiprocess_mode='livesum')
+    ACTIVE_WORKERS = Gauge('pipeline_active_workers', 'Workers running a job',
+                           ['service', 'pool'], multiprocess_mode='livesum')
+    JOBS_REJECTED = Counter('pipeline_jobs_rejected', 'Jobs refused because the queue was full',
+                            ['service', 'pool'])
+else:
+    REQUEST_LATENCY = REQUEST_BYTES = RESPONSE_BYTES = STAGE_DURATION = _NoopMetric()
+    QUEUE_DEPTH = ACTIVE_WORKERS = JOBS_REJECTED = _NoopMetric()
+
+_caches = {}
+
+
+def enabled():
+    return CollectorRegistry is not None
+
+
+@contextmanager
+def stage(service, name):
+    """Time the enclosed block as processing stage name"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(service, name).observe(time.perf_counter() - started)
+
+
+def observe_stage(service, name, seconds):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)"""
+    STAGE_DURATION.labels(service, name).observe(seconds)
+
+
+def observe_request(service, method, route, status, duration, bytes_in=None, bytes_out=None):
+    REQUEST_LATENCY.labels(service, method, route, str(status)).observe(duration)
+    if bytes_in:
+        REQUEST_BYTES.labels(service, route).inc(bytes_in)
+    if bytes_out:
+        RESPONSE_BYTES.labels(service, route).inc(bytes_out)
+
+
+def pool_observer(service):
+    """WorkerPool on_change callback that mirrors its queue into gauges"""
+    def observe(pool, rejected=False):
+        QUEUE_DEPTH.labels(service, pool.name).set(pool.queue_depth())
+        ACTIVE_WORKERS.labels(service, pool.name).set(pool.active_count())
+        if rejected:
+            JOBS_REJECTED.labels(service, pool.name).inc()
+    return observe
+
+
+def register_cache(service, cache):
+    """Report cache.stats() hit/miss counters and hit ratio at scrape time"""
+    _caches[service] = cache
+
+
+class _CacheCollector:
+    def collect(self):
+        hits = CounterMetricFamily('pipeline_cache_hits', 'Result cache hits', labels=['service'])
+        misses = CounterMetricFamily('pipeline_cache_misses', 'Result cache misses', labels=['service'])
+        ratio = GaugeMetricFamily('pipeline_cache_hit_ratio', 'Result cache hits / lookups',
+                                  labels=['service'])
+        for service, cache in list(_caches.items()):
+            stats = cache.stats()
+            hits.add_metric([service], stats['hits'])
+            misses.add_metric([service], stats['misses'])
+            ratio.add_metric([service], stats['hit_ratio'])
+        return [hits, misses, ratio]
+
+
+_cache_collector = _CacheCollector() if enabled() else None
+if enabled() and not MULTIPROC_DIR:
+    REGISTRY.register(_cache_collector)
+
+
+def render():
+    """(body, content type) for a /metrics response, or None without prometheus_client"""
+    if not enabled():
+        return None
+    registry = REGISTRY
+    if MULTIPROC_DIR:
+        # Samples live in the shared directory, not this process's registry
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(_cache_collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """gunicorn child_exit hook: drop a dead worker's live gauges"""
+    if enabled() and MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
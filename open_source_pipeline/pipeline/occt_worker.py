@@ -0,0 +1,218 @@
+"""
+Long-lived OpenCascade DRAWEXE workers.
+
+Spawning DRAWEXE per file pays the interpreter start-up and OCCT shared
+library load every time. DrawWorker keeps one interpreter running and feeds
+it Tcl commands over stdin; each command is wrapped in `catch` and followed
+by a sentinel line so the caller knows when (and whether) it finished.
+Workers are recycled after a number of jobs or when their resident memory
+passes a ceiling, and killed if a command exceeds its timeout.
+"""
+
+import logging
+import os
+import queue
+import re
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+OK_MARKER = '__OCCT_OK__'
+ERR_MARKER = '__OCCT_ERR__'
+
+
+class DrawTimeoutError(Exception):
+    """Raised when a DRAWEXE command does not finish within its timeout"""
+
+
+class DrawCommandError(Exception):
+    """Raised when a DRAWEXE command reports a Tcl error"""
+
+
+def default_command():
+    return shlex.split(os.getenv('DRAWEXE_COMMAND', 'DRAWEXE'))
+
+
+def tcl_quote(value):
+    """Quote a path as a single Tcl word"""
+    value = str(value).replace('\\', '/')
+    if '{' not in value and '}' not in value:
+        return '{' + value + '}'
+    return '"' + re.sub(r'([\\"\[\]${}])', r'\\\1', value) + '"'
+
+
+def conversion_script(input_path, output_path):
+    return f"read {tcl_quote(input_path)}; write {tcl_quote(output_path)}"
+
+
+def spawn_convert(input_path, output_path, command=None, timeout=None):
+    """Convert one file with a fresh DRAWEXE process (the pre-pool path)"""
+    cmd = list(command or default_command()) + ['-c', f"{conversion_script(input_path, output_path)}; exit"]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise DrawCommandError(result.stderr.strip() or f"DRAWEXE exited with {result.returncode}")
+    return result.stdout
+
+
+class DrawWorker:
+    def __init__(self, command=None, max_jobs=200, max_rss_mb=2048):
+        self.command = list(command or default_command())
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.jobs_run = 0
+        self._proc = None
+        self._lines = None
+        self.started_at = None
+
+    def start(self):
+        self._proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_output, args=(self._proc, self._lines),
+                         name=f"drawexe-{self._proc.pid}", daemon=True).start()
+        self.started_at = time.time()
+        self.jobs_run = 0
+
+    @staticmethod
+    def _read_output(proc, lines):
+        for line in proc.stdout:
+            lines.put(line.rstrip('\n'))
+        lines.put(None)
+
+    @property
+    def pid(self):
+        return self._proc.pid if self._proc else None
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def rss_bytes(self):
+        """Resident set size of the interpreter, or None where unavailable"""
+        if not self.alive():
+            return None
+        try:
+            with open(f"/proc/{self._proc.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def needs_recycle(self):
+        if not self.alive() or self.jobs_run >= self.max_jobs:
+            return True
+        rss = self.rss_bytes()
+        return bool(self.max_rss_bytes and rss and rss > self.max_rss_bytes)
+
+    def run(self, script, timeout=300):
+        """Execute a Tcl script; returns the output lines it printed"""
+        if not self.alive():
+            self.start()
+        token = uuid.uuid4().hex
+        wrapped = (f"if {{[catch {{{script}}} __occt_err]}} "
+                   f"{{puts \"{ERR_MARKER} {token} $__occt_err\"}} "
+                   f"else {{puts \"{OK_MARKER} {token}\"}}; flush stdout\n")
+        try:
+            self._proc.stdin.write(wrapped)
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.stop(force=True)
+            raise DrawCommandError(f"DRAWEXE worker exited: {e}")
+
+        self.jobs_run += 1
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stop(force=True)
+                raise DrawTimeoutError(f"DRAWEXE command timed out after {timeout}s")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                self.stop(force=True)
+                raise DrawCommandError('DRAWEXE worker exited: ' + ' '.join(output[-5:]))
+            if line.startswith(f"{OK_MARKER} {token}"):
+                return output
+            if line.startswith(f"{ERR_MARKER} {token}"):
+                raise DrawCommandError(line[len(ERR_MARKER) + len(token) + 2:] or 'DRAWEXE command failed')
+            output.append(line)
+
+    def stop(self, force=False):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if not force and proc.poll() is None:
+            try:
+                proc.stdin.write('exit\n')
+                proc.stdin.flush()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+class DrawWorkerPool:
+    """Fixed number of persistent DRAWEXE workers shared by callers"""
+
+    def __init__(self, size=1, command=None, max_jobs=200, max_rss_mb=2048):
+        self.size = max(1, size)
+        self._worker_args = {'command': command, 'max_jobs': max_jobs, 'max_rss_mb': max_rss_mb}
+        self._idle = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(None)  # placeholder, started on first use
+        self.recycled = 0
+
+    def run(self, script, timeout=300):
+        worker = self._idle.get()
+        try:
+            if worker is None:
+                worker = DrawWorker(**self._worker_args)
+            try:
+                return worker.run(script, timeout=timeout)
+            except DrawTimeoutError:
+                worker = None  # already killed; a fresh one starts next time
+                raise
+            finally:
+                if worker is not None and worker.needs_recycle():
+                    logger.info(f"Recycling DRAWEXE worker {worker.pid} after {worker.jobs_run} job(s)")
+                    worker.stop()
+                    self.recycled += 1
+                    worker = None
+        finally:
+            self._idle.put(worker)
+
+    def convert(self, input_path, output_path, timeout=300):
+        started = time.perf_counter()
+        self.run(conversion_script(input_path, output_path), timeout=timeout)
+        return {'output_file': str(output_path), 'elapsed': time.perf_counter() - started}
+
+    def shutdown(self):
+        for _ in range(self.size):
+            worker = self._idle.get()
+            if worker is not None:
+                worker.stop()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_draw_pool():
+    """Per-process pool configured from DRAWEXE_* environment variables"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = DrawWorkerPool(
+                size=int(os.getenv('DRAWEXE_WORKERS', '1')),
+                max_jobs=int(os.getenv('DRAWEXE_MAX_JOBS', '200')),
+                max_rss_mb=int(os.getenv('DRAWEXE_MAX_RSS_MB', '2048')))
+            _pool_pid = os.getpid()
+        return _pool
@@ -0,0 +1,181 @@
+"""
+Ordered fan-out of per-file work onto a process pool.
+
+Results come back in input order with per-item wall time, and a failure in
+one item (an exception, or a crashed worker process) is reported for that
+item without cancelling the rest. A crash takes down every item in flight
+on the pool, so those are rerun one by one to find the one that caused it.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Times an item caught in a worker crash is rerun on its own before it is blamed
+CRASH_RETRIES = 1
+
+
+def process_context():
+    """
+    Start method for worker processes. The services call into pools from
+    multithreaded Flask processes, where fork() can copy a lock held by
+    another thread; forkserver (or spawn) starts workers from a clean process.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def in_pool_worker(module_name):
+    """
+    True while a service module is being imported by a pool worker (or the
+    forkserver) to unpickle its functions, rather than to serve requests.
+    Guards start-up side effects such as recovering interrupted jobs.
+    """
+    return module_name == '__mp_main__' or multiprocessing.parent_process() is not None
+
+
+def default_workers():
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _timed_call(fn, item):
+    started_at = time.time()
+    started = time.perf_counter()
+    try:
+        value = fn(item)
+        return {'value': value, 'error': None, 'elapsed': time.perf_counter() - started,
+                'started_at': started_at}
+    except Exception as e:
+        return {'value': None, 'error': str(e), 'elapsed': time.perf_counter() - started,
+                'started_at': started_at}
+
+
+class ProcessPool:
+    """Lazily created process pool that is rebuilt if a worker dies"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_workers()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=process_context())
+            return self._executor
+
+    def reset(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def run_ordered(fn, items, pool=None, max_in_flight=None, on_result=None):
+    """
+    Apply fn to each item, returning [{'value', 'error', 'elapsed'}] in order
+    (plus the item's wall-clock 'started_at' when it actually ran).
+
+    Without a pool the items run sequentially in the calling process.
+    max_in_flight caps how many items of this call occupy pool workers at
+    once, so one large request cannot monopolise a shared pool.
+    on_result(index, outcome) is called as each item finishes.
+
+    A dying worker breaks the whole executor, failing every item in flight
+    on it. Those items are then retried one at a time on a fresh pool, up to
+    CRASH_RETRIES times each, so only an item that crashes a worker on its
+    own is reported as 'Worker process crashed'.
+    """
+    items = list(items)
+    if pool is None or len(items) <= 1:
+        results = []
+        for index, item in enumerate(items):
+            results.append(_timed_call(fn, item))
+            if on_result:
+                on_result(index, results[index])
+        return results
+
+    executor = pool.executor()
+    limit = max(1, min(max_in_flight or pool.max_workers, pool.max_workers))
+    results = [None] * len(items)
+    queued = deque(range(len(items)))
+    # Items caught in a crash; each is rerun alone to find out whether it caused it
+    suspects = deque()
+    crashes = [0] * len(items)
+    pending = {}
+
+    def finish(index, outcome):
+        results[index] = outcome
+        if on_result:
+            on_result(index, outcome)
+
+    while queued or suspects or pending:
+        while (suspects and not pending) or (queued and not suspects and len(pending) < limit):
+            index = suspects.popleft() if suspects else queued.popleft()
+            try:
+                future = executor.submit(_timed_call, fn, items[index])
+            except BrokenProcessPool:
+                # Broken by an earlier crash; start a fresh pool and resubmit
+                pool.reset(executor)
+                executor = pool.executor()
+                (suspects if crashes[index] else queued).appendleft(index)
+                continue
+            except RuntimeError as e:
+                finish(index, {'value': None, 'error': f"Worker pool unavailable: {e}", 'elapsed': 0.0})
+                continue
+            pending[future] = (index, executor)
+
+        if not pending:
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future not in pending:
+                continue  # already collected with its broken executor
+            index, used_executor = pending.pop(future)
+            try:
+                finish(index, future.result())
+                continue
+            except BrokenProcessPool:
+                pass
+            except Exception as e:
+                finish(index, {'value': None, 'error': str(e), 'elapsed': 0.0})
+                continue
+
+            # Everything else in flight on that executor went down with it
+            caught = [index]
+            for other, (other_index, other_executor) in list(pending.items()):
+                if other_executor is not used_executor:
+                    continue
+                del pending[other]
+                if other.done() and other.exception() is None:
+                    finish(other_index, other.result())
+                else:
+                    caught.append(other_index)
+            pool.reset(used_executor)
+            executor = pool.executor()
+
+            # Only an item that was the sole one on the broken executor is known to have caused it
+            alone = len(caught) == 1
+            for crashed_index in caught:
+                crashes[crashed_index] += 1
+                if alone or crashes[crashed_index] > CRASH_RETRIES:
+                    logger.error(f"Worker process died while processing item {crashed_index}")
+                    finish(crashed_index, {'value': None, 'error': 'Worker process crashed', 'elapsed': 0.0})
+                else:
+                    suspects.append(crashed_index)
+
+    return results
@@ -0,0 +1,127 @@
+"""
+Streaming, page-parallel PDF rasterization.
+
+Pages are split into small chunks rendered on a process pool, written to a
+directory owned by the caller's job, and yielded in page order as soon as
+each page is ready, so downstream stages can start on page 1 while later
+pages are still rendering.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .parallel import process_context
+
+DEFAULT_DPI = 150
+
+
+def _open_pdf(file_path):
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF < 1.24
+    return fitz, fitz.open(file_path)
+
+
+def page_count(file_path):
+    _, doc = _open_pdf(file_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def parse_page_range(spec, total_pages):
+    """
+    Turn a 1-based range spec such as "1-3,7,10-" into sorted 0-based indices.
+
+    None or an empty spec selects every page; out-of-range pages are dropped.
+    """
+    if spec is None or str(spec).strip() in ('', 'all'):
+        return list(range(total_pages))
+    if isinstance(spec, (list, tuple)):
+        parts = [str(p) for p in spec]
+    else:
+        parts = str(spec).split(',')
+
+    selected = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, _, end = part.partition('-')
+            start = int(start) if start.strip() else 1
+            end = int(end) if end.strip() else total_pages
+        else:
+            start = end = int(part)
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part}")
+        selected.update(range(start - 1, min(end, total_pages)))
+    return sorted(selected)
+
+
+def render_pages(file_path, page_numbers, out_dir, dpi=DEFAULT_DPI, image_format='png'):
+    """Render the given 0-based pages of one document; runs inside pool workers"""
+    fitz, doc = _open_pdf(file_path)
+    zoom = dpi / 72.0
+    matrix = fitz.Matrix(zoom, zoom)
+    rendered = []
+    try:
+        for page_num in page_numbers:
+            started = time.perf_counter()
+            page = doc.load_page(page_num)
+            pix = page.get_pixmap(matrix=matrix, alpha=False)
+            img_path = os.path.join(out_dir, f"page_{page_num + 1:04d}.{image_format}")
+            pix.save(img_path)
+            rendered.append({
+                'page': page_num + 1,
+                'image': img_path,
+                'width': pix.width,
+                'height': pix.height,
+                'dpi': dpi,
+                'render_time': time.perf_counter() - started
+            })
+            pix = None
+    finally:
+        doc.close()
+    return rendered
+
+
+def _chunks(pages, chunk_size):
+    for i in range(0, len(pages), chunk_size):
+        yield pages[i:i + chunk_size]
+
+
+def iter_pdf_pages(file_path, out_dir, dpi=DEFAULT_DPI, pages=None, max_workers=None,
+                   chunk_size=2, image_format='png'):
+    """
+    Rasterize a PDF into out_dir, yielding one dict per page in page order.
+
+    pages is a range spec accepted by parse_page_range. With max_workers <= 1
+    pages are rendered in-process one at a time.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    selected = parse_page_range(pages, page_count(file_path))
+    if not selected:
+        return
+
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    if max_workers <= 1 or len(selected) <= chunk_size:
+        for page_num in selected:
+            yield from render_pages(file_path, [page_num], out_dir, dpi, image_format)
+        return
+
+    # Chunks are submitted in page order, so collecting futures in order
+    # yields early pages first while later chunks are still rendering
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=process_context()) as executor:
+        futures = [executor.submit(render_pages, file_path, chunk, out_dir, dpi, image_format)
+                   for chunk in _chunks(selected, chunk_size)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Consumer stopped early or a chunk failed: drop unstarted work
+            for future in futures:
+                future.cancel()
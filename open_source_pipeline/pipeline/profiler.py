@@ -0,0 +1,163 @@
+"""
+Sampling profiler for individual jobs.
+
+A StackSampler runs on its own daemon thread and, every interval seconds,
+reads one target thread's current stack from sys._current_frames(). Equal
+stacks are counted, and the result is written in the collapsed ("folded")
+format that flamegraph.pl, speedscope and inferno read directly:
+
+    worker.py:_run;app.py:Job.process;decimate.py:decimate 412
+
+Sampling only costs the target thread the GIL hand-offs to the sampler, so
+unlike cProfile it is cheap enough to switch on in production, and it can be
+started partway through a job.
+
+JobProfiler wraps a job's processing on its worker thread: it samples from
+the start when the job asked to be profiled, otherwise it arms a timer and
+starts sampling only once the job has run for longer than slow_after.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+PROFILE_FILENAME = 'profile.folded'
+
+
+def _frame_label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled every interval seconds"""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"stack-sampler-{thread_id}",
+                                        daemon=True)
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.stopped_at = time.time()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break  # target thread exited
+            self.sample(frame)
+
+    def sample(self, frame):
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _frame_label(code).replace(';', ':').replace(' ', '_')
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[';'.join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Collapsed-stack lines, heaviest stack first"""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for line in self.collapsed():
+                f.write(line + '\n')
+        os.replace(tmp_path, path)
+
+
+class JobProfiler:
+    """
+    Context manager that samples the calling thread into
+    out_dir/profile.folded: for the whole block when enabled, otherwise only
+    once the block has run for slow_after seconds (None never profiles).
+    After the block, report describes the profile, or is None if none was taken.
+    """
+
+    def __init__(self, out_dir, enabled=False, slow_after=None, interval=DEFAULT_INTERVAL):
+        self.path = os.path.join(out_dir, PROFILE_FILENAME)
+        self.enabled = enabled
+        self.slow_after = slow_after
+        self.interval = interval
+        self.report = None
+        self._sampler = None
+        self._timer = None
+        self._trigger = None
+        self._entered_at = None
+        self._lock = threading.Lock()
+        self._done = False
+
+    def __enter__(self):
+        self._entered_at = time.time()
+        thread_id = threading.get_ident()
+        if self.enabled:
+            self._start(thread_id, 'requested')
+        elif self.slow_after is not None:
+            self._timer = threading.Timer(self.slow_after, self._start, (thread_id, 'slow'))
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def _start(self, thread_id, trigger):
+        with self._lock:
+            if self._done:
+                return
+            self._trigger = trigger
+            self._sampler = StackSampler(thread_id, self.interval).start()
+        if trigger == 'slow':
+            logger.info(f"Job still running after {self.slow_after:.1f}s, profiling into {self.path}")
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self._done = True
+            sampler = self._sampler
+        if self._timer is not None:
+            self._timer.cancel()
+        if sampler is None:
+            return False
+        sampler.stop()
+        try:
+            sampler.write(self.path)
+        except OSError as e:
+            logger.warning(f"Could not write profile {self.path}: {str(e)}")
+            return False
+        self.report = {
+            'trigger': self._trigger,
+            'started_after': round(sampler.started_at - self._entered_at, 3),
+            'duration': round(sampler.stopped_at - sampler.started_at, 3),
+            'samples': sampler.samples,
+            'interval': self.interval
+        }
+        return False
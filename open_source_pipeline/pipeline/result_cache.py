@@ -0,0 +1,186 @@
+"""
+Content-addressed cache of generated models.
+
+Entries are keyed by a digest of the input file bytes plus the normalised
+generation options, stored as <key>.<ext> next to a SQLite index, and evicted
+least-recently-used first once the cache exceeds its size budget. Hit/miss
+counters live in the index so they are shared by every worker process.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+
+from .hashing import digest_inputs
+from .sqlite_util import ThreadLocalConnection
+
+logger = logging.getLogger(__name__)
+
+# Defaults mirrored from Hunyuan3DClient.generate_3d_model so omitted and
+# explicit default values hash the same
+DEFAULT_OPTIONS = {
+    'mesh_resolution': 'high',
+    'texture_quality': 'high',
+    'coordinate_system': 'right_handed',
+    'unit_scale': 'millimeters'
+}
+
+# Options that change how a request is served, not what gets generated
+NON_KEY_OPTIONS = {'use_cache', 'wait_for_model', 'profile'}
+
+
+def normalize_options(data):
+    """Reduce a /generate payload to the fields that determine its output"""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(data.get('options') or {})
+    for name in NON_KEY_OPTIONS:
+        options.pop(name, None)
+    return {
+        'output_format': (data.get('output_format') or 'glb').lower(),
+        'quality': data.get('quality') or 'high',
+        'options': options
+    }
+
+
+def compute_cache_key(input_files, data, input_dirs=()):
+    """Digest of the input file bytes (or references) plus normalised options"""
+    return digest_inputs(input_files, normalize_options(data), input_dirs)
+
+
+class ResultCache:
+    def __init__(self, root, max_bytes):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._conn = ThreadLocalConnection(os.path.join(self.root, 'index.db'))
+        self._init_schema()
+
+    def _init_schema(self):
+        conn = self._conn.get()
+        conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                     'key TEXT PRIMARY KEY, filename TEXT NOT NULL, size INTEGER NOT NULL, '
+                     'result TEXT, created_at REAL, last_access REAL)')
+        # Side files stored with an entry (e.g. levels of detail), added later
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(entries)')}
+        if 'variants' not in columns:
+            conn.execute('ALTER TABLE entries ADD COLUMN variants TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)')
+        conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        conn.execute("INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute('UPDATE stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def path_for(self, filename):
+        return os.path.join(self.root, filename)
+
+    def get(self, key):
+        """Return the cached entry for key (bumping its recency) or None"""
+        conn = self._conn.get()
+        row = conn.execute('SELECT * FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is not None and not os.path.exists(self.path_for(row['filename'])):
+            # File removed behind our back; treat as a miss and drop the row
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            row = None
+        if row is None:
+            self._bump(conn, 'misses')
+            return None
+
+        conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        self._bump(conn, 'hits')
+        return {
+            'key': key,
+            'filename': row['filename'],
+            'path': self.path_for(row['filename']),
+            'size': row['size'],
+            'variants': json.loads(row['variants']) if row['variants'] else [],
+            'result': json.loads(row['result']) if row['result'] else None
+        }
+
+    def _store(self, source_path, filename):
+        target = self.path_for(filename)
+        tmp_target = f"{target}.{os.getpid()}.tmp"
+        try:
+            # A hard link shares the bytes with the job's own output
+            os.link(source_path, tmp_target)
+        except OSError:
+            shutil.copyfile(source_path, tmp_target)
+        os.replace(tmp_target, target)
+        return os.path.getsize(target)
+
+    def put(self, key, source_path, result=None, variants=None):
+        """
+        Add source_path to the cache under key and evict down to budget.
+
+        variants maps a name to a side file stored as <key>_<name><ext> and
+        evicted together with the entry.
+        """
+        ext = os.path.splitext(source_path)[1]
+        filename = f"{key}{ext}"
+        size = self._store(source_path, filename)
+        variant_files = []
+        for name, path in (variants or {}).items():
+            variant = f"{key}_{name}{os.path.splitext(path)[1]}"
+            size += self._store(path, variant)
+            variant_files.append(variant)
+
+        now = time.time()
+        self._conn.get().execute(
+            'INSERT OR REPLACE INTO entries (key, filename, size, result, created_at, last_access, variants) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, filename, size, json.dumps(result) if result is not None else None, now, now,
+             json.dumps(variant_files) if variant_files else None))
+        self.evict()
+        return self.path_for(filename)
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes"""
+        conn = self._conn.get()
+        removed = []
+        evicted = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total > self.max_bytes:
+                rows = conn.execute('SELECT key, filename, size, variants FROM entries '
+                                    'ORDER BY last_access ASC').fetchall()
+                for row in rows:
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute('DELETE FROM entries WHERE key = ?', (row['key'],))
+                    removed.append(row['filename'])
+                    removed.extend(json.loads(row['variants']) if row['variants'] else [])
+                    total -= row['size']
+                    evicted += 1
+                if evicted:
+                    self._bump(conn, 'evictions', evicted)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        for filename in removed:
+            try:
+                os.remove(self.path_for(filename))
+            except FileNotFoundError:
+                pass
+        if evicted:
+            logger.info(f"Evicted {evicted} cached model(s)")
+        return evicted
+
+    def stats(self):
+        conn = self._conn.get()
+        counters = {row['name']: row['value'] for row in conn.execute('SELECT name, value FROM stats')}
+        entries, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        lookups = counters.get('hits', 0) + counters.get('misses', 0)
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'hit_ratio': counters.get('hits', 0) / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes
+        }
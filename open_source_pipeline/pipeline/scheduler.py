@@ -0,0 +1,149 @@
+"""
+Bounded worker pool with admission control.
+
+A fixed number of worker threads drain a bounded pending queue. When the
+queue is full, submit() raises QueueFullError instead of growing without
+limit, so callers can shed load (HTTP 429) rather than oversubscribing the box.
+
+Both limits hold for one process only, which is why gunicorn.conf.py runs a
+single worker process per service.
+"""
+
+import logging
+import math
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the pending queue cannot accept more work"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    def __init__(self, max_workers, max_queue, name='worker', on_change=None):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+        self.name = name
+        # Called as on_change(pool, rejected=False) whenever queue or activity moves
+        self.on_change = on_change
+        # maxsize=0 would mean unbounded for queue.Queue, so a zero-length
+        # queue is modelled as "only hand work to an idle worker"; the hand-off
+        # queue still needs room for one item per idle worker
+        self._queue = queue.Queue(maxsize=self.max_queue or self.max_workers)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_duration = None
+        self._shutdown = False
+
+    def _ensure_workers(self):
+        if len(self._threads) >= self.max_workers:
+            return
+        for i in range(len(self._threads), self.max_workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            fn, args, kwargs = item
+            with self._lock:
+                self._active += 1
+            self._notify()
+            started = time.time()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Unhandled error in {self.name} task")
+            finally:
+                duration = time.time() - started
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    if self._avg_duration is None:
+                        self._avg_duration = duration
+                    else:
+                        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+                self._queue.task_done()
+                self._notify()
+
+    def _notify(self, rejected=False):
+        if self.on_change is not None:
+            try:
+                self.on_change(self, rejected=rejected)
+            except Exception:
+                logger.exception(f"{self.name} on_change callback failed")
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn for execution, raising QueueFullError when saturated"""
+        try:
+            self._submit(fn, args, kwargs)
+        except QueueFullError:
+            self._notify(rejected=True)
+            raise
+        self._notify()
+
+    def _submit(self, fn, args, kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name} pool is shut down")
+            self._ensure_workers()
+            if self.max_queue == 0 and self._active + self._queue.qsize() >= self.max_workers:
+                self._rejected += 1
+                raise QueueFullError('No idle workers available', self.retry_after())
+            try:
+                self._queue.put_nowait((fn, args, kwargs))
+            except queue.Full:
+                self._rejected += 1
+                raise QueueFullError('Job queue is full', self.retry_after())
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def active_count(self):
+        return self._active
+
+    def retry_after(self):
+        """Estimate in seconds until a queue slot frees up"""
+        if not self._avg_duration:
+            return 1
+        # One queued item drains per (average duration / workers)
+        return max(1, math.ceil(self._avg_duration / self.max_workers))
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'active_workers': self._active,
+            'queue_depth': self.queue_depth(),
+            'completed': self._completed,
+            'rejected': self._rejected,
+            'avg_duration': self._avg_duration
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
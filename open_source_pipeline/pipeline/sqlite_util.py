@@ -0,0 +1,37 @@
+"""
+SQLite helpers shared by the job store and the result cache.
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class ThreadLocalConnection:
+    """One WAL-mode connection per thread, reopened after a fork"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL only fsyncs at checkpoints, not on every commit
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,369 @@
+"""
+Lightweight request/job tracing.
+
+A trace follows one model through the services: the caller's W3C
+traceparent header (or a fresh trace id) names the trace, each HTTP request
+and each processing stage records a span with its start, duration and
+parent, and jobs carry {'trace_id', 'span_id'} in their input so work on a
+worker thread joins the trace of the request that queued it.
+
+Finished spans go to an exporter:
+- JsonlExporter appends one JSON object per line to a file. Each span is
+  a single O_APPEND write, so several services and worker processes can
+  share one file. Past max_bytes the file is rotated to <path>.1 (one
+  generation is kept), which also bounds the scan read_trace() does to
+  find a trace id.
+- OtlpExporter batches spans on a background thread and POSTs them as
+  OTLP/HTTP JSON (/v1/traces) to a collector. from_otlp() turns such a
+  payload back into span records, so a service can act as the local
+  stand-in collector.
+
+waterfall() lays a trace's spans out against the trace start.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+OTLP_BATCH_SIZE = 100
+OTLP_FLUSH_INTERVAL = 1.0
+JSONL_MAX_BYTES = 64 * 1024 * 1024
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def new_trace_id():
+    return secrets.token_hex(16)
+
+
+def new_span_id():
+    return secrets.token_hex(8)
+
+
+def parse_traceparent(header):
+    """(trace_id, parent span id) from a W3C traceparent header, or (None, None)"""
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16)
+    except ValueError:
+        return None, None
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None, None
+    return trace_id, span_id
+
+
+def format_traceparent(trace_id, span_id):
+    return f"00-{trace_id}-{span_id}-01"
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'service', 'start', 'end',
+                 'attributes', 'error')
+
+    def __init__(self, name, service, trace_id, parent_id=None, start=None, attributes=None):
+        self.name = name
+        self.service = service
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def context(self):
+        """What a job stores to continue this trace elsewhere"""
+        return {'trace_id': self.trace_id, 'span_id': self.span_id}
+
+    def to_record(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'service': self.service,
+            'start': self.start,
+            'duration': (self.end or time.time()) - self.start,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Tracer:
+    def __init__(self, service, exporter=None):
+        self.service = service
+        self.exporter = exporter
+
+    def start_span(self, name, trace_id=None, parent_id=None, start=None, **attributes):
+        """
+        Open a span. Without an explicit trace it continues the span current
+        in this context, and failing that starts a new trace.
+        """
+        if trace_id is None:
+            current = _current_span.get()
+            if current is not None:
+                trace_id, parent_id = current.trace_id, current.span_id
+            else:
+                trace_id = new_trace_id()
+        return Span(name, self.service, trace_id, parent_id, start, attributes)
+
+    def end_span(self, span, error=None):
+        if span.end is not None:
+            return
+        span.end = time.time()
+        if error is not None:
+            span.error = str(error)
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span.to_record())
+            except Exception as e:
+                logger.warning(f"Could not export span {span.name}: {str(e)}")
+
+    @contextmanager
+    def span(self, name, context=None, **attributes):
+        """
+        Time the enclosed block. context is a Span.context() dict (e.g. a
+        job's input) to attach to; nested spans pick this one up as parent.
+        """
+        context = context or {}
+        span = self.start_span(name, context.get('trace_id'), context.get('span_id'), **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def record(self, name, start, duration, context=None, **attributes):
+        """Export a span measured elsewhere (e.g. in a worker process)"""
+        context = context or {}
+        span = self.start_span(name, context.get('trace_id'), context.get('span_id'),
+                               start=start, **attributes)
+        span.end = start + duration
+        if self.exporter is not None:
+            self.exporter.export(span.to_record())
+        return span
+
+
+class JsonlExporter:
+    def __init__(self, path, max_bytes=JSONL_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, record):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            if self.max_bytes and os.fstat(fd).st_size > self.max_bytes:
+                self._rotate(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self, fd):
+        # Only rotate the file just written; another process may have got there first
+        try:
+            if os.stat(self.path).st_ino == os.fstat(fd).st_ino:
+                os.replace(self.path, f"{self.path}.1")
+        except FileNotFoundError:
+            pass
+
+    def export_many(self, records):
+        for record in records:
+            self.export(record)
+
+    def read_trace(self, trace_id):
+        """Every span of trace_id in the rotated and current file, in write order"""
+        needle = f'"trace_id":"{trace_id}"'
+        spans = []
+        for path in (f"{self.path}.1", self.path):
+            try:
+                f = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    # Cheap substring test before paying for json.loads
+                    if needle in line:
+                        try:
+                            spans.append(json.loads(line))
+                        except ValueError:
+                            continue  # torn line from a crashed writer
+        return spans
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(records):
+    """OTLP/HTTP JSON ExportTraceServiceRequest for span records, grouped by service"""
+    by_service = {}
+    for record in records:
+        by_service.setdefault(record['service'], []).append(record)
+    resource_spans = []
+    for service, spans in by_service.items():
+        resource_spans.append({
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'pipeline.tracing'},
+                'spans': [{
+                    'traceId': s['trace_id'],
+                    'spanId': s['span_id'],
+                    'parentSpanId': s['parent_id'] or '',
+                    'name': s['name'],
+                    'kind': 1,
+                    'startTimeUnixNano': str(int(s['start'] * 1e9)),
+                    'endTimeUnixNano': str(int((s['start'] + s['duration']) * 1e9)),
+                    'attributes': [{'key': k, 'value': _otlp_value(v)}
+                                   for k, v in (s['attributes'] or {}).items()],
+                    'status': {'code': 2, 'message': s['error']} if s['error'] else {}
+                } for s in spans]
+            }]
+        })
+    return {'resourceSpans': resource_spans}
+
+
+def from_otlp(payload):
+    """Span records from an OTLP/HTTP JSON trace export"""
+    records = []
+    for resource_spans in payload.get('resourceSpans') or []:
+        resource = {a['key']: a.get('value', {}) for a in
+                    (resource_spans.get('resource') or {}).get('attributes') or []}
+        service = resource.get('service.name', {}).get('stringValue', 'unknown')
+        for scope_spans in resource_spans.get('scopeSpans') or []:
+            for s in scope_spans.get('spans') or []:
+                start = int(s['startTimeUnixNano']) / 1e9
+                attributes = {a['key']: next(iter(a.get('value', {}).values()), None)
+                              for a in s.get('attributes') or []}
+                status = s.get('status') or {}
+                records.append({
+                    'trace_id': s['traceId'].lower(),
+                    'span_id': s['spanId'].lower(),
+                    'parent_id': s.get('parentSpanId') or None,
+                    'name': s['name'],
+                    'service': service,
+                    'start': start,
+                    'duration': int(s['endTimeUnixNano']) / 1e9 - start,
+                    'attributes': attributes,
+                    'error': status.get('message') if status.get('code') == 2 else None
+                })
+    return records
+
+
+class OtlpExporter:
+    """Batching OTLP/HTTP JSON exporter; spans are dropped, not queued, when the collector lags"""
+
+    def __init__(self, endpoint, batch_size=OTLP_BATCH_SIZE, flush_interval=OTLP_FLUSH_INTERVAL,
+                 max_queue=10000, token=None):
+        self.endpoint = endpoint
+        self.headers = {'Content-Type': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f"Bearer {token}"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def export_many(self, records):
+        for record in records:
+            self.export(record)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    def _send(self, batch):
+        body = json.dumps(to_otlp(batch)).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=body, method='POST', headers=self.headers)
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                response.read()
+        except Exception as e:
+            logger.warning(f"Dropped {len(batch)} span(s), OTLP export failed: {str(e)}")
+
+
+def create_span_exporter(kind, path=None, endpoint=None, max_bytes=JSONL_MAX_BYTES, token=None):
+    """Exporter for TRACE_EXPORTER: 'jsonl', 'otlp' or 'none'"""
+    kind = (kind or 'none').lower()
+    if kind == 'jsonl':
+        return JsonlExporter(path, max_bytes)
+    if kind == 'otlp':
+        if not endpoint:
+            raise ValueError('TRACE_OTLP_ENDPOINT is required for the otlp exporter')
+        return OtlpExporter(endpoint, token=token)
+    if kind == 'none':
+        return None
+    raise ValueError(f"Unknown span exporter: {kind}")
+
+
+def waterfall(records):
+    """
+    Spans of one trace ordered by start, each with its offset from the trace
+    start and its depth below the root, plus per-stage totals.
+    """
+    if not records:
+        return {'spans': [], 'stages': {}, 'start': None, 'duration': 0.0}
+    records = sorted(records, key=lambda r: r['start'])
+    parents = {r['span_id']: r['parent_id'] for r in records}
+    origin = records[0]['start']
+    end = max(r['start'] + r['duration'] for r in records)
+
+    def depth(span_id):
+        level, seen = 0, set()
+        parent = parents.get(span_id)
+        while parent in parents and parent not in seen:
+            seen.add(parent)
+            level += 1
+            parent = parents[parent]
+        return level
+
+    spans = []
+    stages = {}
+    for r in records:
+        spans.append({**r, 'offset': r['start'] - origin, 'depth': depth(r['span_id'])})
+        stage = stages.setdefault(f"{r['service']}:{r['name']}", {'count': 0, 'total': 0.0})
+        stage['count'] += 1
+        stage['total'] += r['duration']
+    return {'spans': spans, 'stages': stages, 'start': origin, 'duration': end - origin}
@@ -0,0 +1,98 @@
+"""
+Content-addressed upload storage.
+
+UploadWriter is a write-only file object: bytes go straight to a temporary
+file in the upload directory while a SHA-256 digest and a byte count are
+updated, so the body never sits in memory and the size limit trips as soon
+as it is crossed rather than after the upload finishes. finish() renames
+the file to <sha256><ext>; that hex digest is the content id callers pass
+to later requests (and which cache keys hash by reference). The server path
+is never handed out: find_upload() rebuilds it from the id and the
+extensions the service accepts.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_ID = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit):
+        super().__init__(f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+        self.limit = limit
+
+
+class UploadWriter:
+    def __init__(self, upload_dir, max_bytes=None):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(dir=upload_dir, prefix='.upload-', delete=False)
+        self._finished = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.discard()
+            raise UploadTooLarge(self.max_bytes)
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset, whence=0):
+        # The multipart parser rewinds finished parts; nothing reads them back
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def discard(self):
+        """Drop the partial file (no-op once finished)"""
+        if self._finished:
+            return
+        self._finished = True
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
+
+    def finish(self, extension=''):
+        """Move the upload to its content-addressed path and describe it"""
+        self._file.close()
+        self._finished = True
+        content_id = self._digest.hexdigest()
+        path = os.path.join(self.upload_dir, f"{content_id}{extension.lower()}")
+        duplicate = os.path.exists(path)
+        if duplicate:
+            os.unlink(self._file.name)
+        else:
+            os.replace(self._file.name, path)
+        return {'content_id': content_id, 'size': self.size, 'duplicate': duplicate}
+
+
+def copy_stream(stream, writer, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Copy a readable stream into writer chunk by chunk"""
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        writer.write(chunk)
+    return writer
+
+
+def is_content_id(ref):
+    return isinstance(ref, str) and bool(_CONTENT_ID.match(ref))
+
+
+def find_upload(upload_dir, content_id, extensions):
+    """Path of a stored upload by content id, or None (extensions without the dot)"""
+    if not is_content_id(content_id):
+        return None
+    for extension in sorted(extensions):
+        path = os.path.join(upload_dir, f"{content_id}.{extension}")
+        if os.path.isfile(path):
+            return path
+    return None
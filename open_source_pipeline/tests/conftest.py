@@ -0,0 +1,28 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope='session')
+def hunyuan_app(tmp_path_factory):
+    """
+    The hunyuan3d service module, imported inside a scratch directory.
+    Its models/ and jobs/ paths are relative to the working directory,
+    so the session stays there until the last test using it is done.
+    """
+    workdir = tmp_path_factory.mktemp('hunyuan3d')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(workdir)
+        mp.setenv('TRACE_EXPORTER', 'none')
+        spec = importlib.util.spec_from_file_location('hunyuan3d_app', ROOT / 'hunyuan3d' / 'app.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.app.testing = True
+        yield module
+        module.job_pool.shutdown(wait=False)
+        module.job_store.close()
@@ -0,0 +1,141 @@
+"""
+Hunyuan3DClient.download_model() as generated by local_setup.py, against
+the real hunyuan3d /models route: ETag skips, .part resume with If-Range,
+and recovery from a stale or already complete partial file.
+
+    pytest tests/test_client_download.py
+"""
+
+import importlib.util
+import os
+import threading
+import uuid
+
+import pytest
+from werkzeug.serving import make_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SIZE = 256 * 1024
+
+
+@pytest.fixture(scope='module')
+def client_module(tmp_path_factory):
+    setup_dir = tmp_path_factory.mktemp('local_pipeline')
+    spec = importlib.util.spec_from_file_location('local_setup', os.path.join(REPO_ROOT, 'local_setup.py'))
+    local_setup = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(local_setup)
+    setup = local_setup.Local3DPipelineSetup()
+    setup.setup_dir = setup_dir
+    setup.create_hunyuan3d_client()
+
+    spec = importlib.util.spec_from_file_location('hunyuan3d_client', setup_dir / 'hunyuan3d_client.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='module')
+def server_url(hunyuan_app):
+    server = make_server('127.0.0.1', 0, hunyuan_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+
+
+@pytest.fixture
+def model(hunyuan_app, server_url):
+    name = f"{uuid.uuid4()}.glb"
+    data = os.urandom(SIZE)
+    path = os.path.join(hunyuan_app.MODELS_DIR, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    etag = f'"{hunyuan_app.file_etag(path)}"'
+    yield f"{server_url}/models/{name}", data, etag
+    os.remove(path)
+
+
+@pytest.fixture
+def client(client_module, server_url):
+    client = client_module.Hunyuan3DClient(base_url=server_url)
+    yield client
+    client.session.close()
+
+
+class Paths:
+    def __init__(self, directory):
+        self.output = directory / 'model.glb'
+        self.etag = directory / 'model.glb.etag'
+        self.part = directory / 'model.glb.part'
+        self.part_etag = directory / 'model.glb.part.etag'
+
+    def leftovers(self):
+        return [path for path in (self.part, self.part_etag) if path.exists()]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return Paths(tmp_path)
+
+
+def test_fresh_download_records_the_etag(client, model, paths):
+    url, data, etag = model
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == data
+    assert paths.etag.read_text() == etag
+    assert paths.leftovers() == []
+
+
+def test_unchanged_model_is_not_downloaded_again(client, model, paths):
+    url, _, etag = model
+    # If the body were fetched again this marker would be overwritten
+    paths.output.write_bytes(b'local copy')
+    paths.etag.write_text(etag)
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == b'local copy'
+
+
+def test_changed_model_replaces_the_local_copy(client, model, paths):
+    url, data, etag = model
+    paths.output.write_bytes(b'old model')
+    paths.etag.write_text('"old"')
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == data
+    assert paths.etag.read_text() == etag
+
+
+def test_partial_download_resumes_from_its_offset(client, model, paths):
+    url, data, etag = model
+    offset = SIZE // 3
+    # Zeros instead of the real prefix show that only the tail was requested
+    paths.part.write_bytes(bytes(offset))
+    paths.part_etag.write_text(etag)
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == bytes(offset) + data[offset:]
+    assert paths.etag.read_text() == etag
+    assert paths.leftovers() == []
+
+
+def test_partial_download_of_an_older_file_starts_over(client, model, paths):
+    url, data, etag = model
+    paths.part.write_bytes(b'\xff' * 1000)
+    paths.part_etag.write_text('"old"')
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == data
+    assert paths.etag.read_text() == etag
+
+
+def test_complete_partial_file_is_kept(client, model, paths):
+    url, data, etag = model
+    # Interrupted after the last byte but before the rename: the server answers 416
+    paths.part.write_bytes(data)
+    paths.part_etag.write_text(etag)
+    assert client.download_model(url, str(paths.output))
+    assert paths.output.read_bytes() == data
+    assert paths.leftovers() == []
+
+
+def test_missing_model_fails(client, server_url, paths):
+    assert not client.download_model(f"{server_url}/models/{uuid.uuid4()}.glb", str(paths.output))
+    assert not paths.output.exists()
@@ -0,0 +1,271 @@
+"""
+Round-trip tests for the meshopt codecs in pipeline/glb_codec.py.
+
+The decoders below are straight ports of meshoptimizer's decodeIndexBuffer
+(version 1) and decodeVertexBuffer (version 0), kept deliberately literal
+so that any change to the encoder's FIFO, codeaux table or byte-group logic
+that a real glTF loader would misread fails here too.
+
+    pytest tests/test_glb_codec.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline.glb_codec import (_encode_octahedral, _optimize_order, _quantize_positions,
+                                _vertex_block_size, encode_index_buffer, encode_vertex_buffer)
+from pipeline.mesh import uv_sphere
+
+# --- reference decoders ---
+
+def _decode_vbyte(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 127) << shift
+        shift += 7
+        if byte < 128:
+            return result, pos
+
+
+def decode_index_buffer(encoded, index_count):
+    """meshopt_decodeIndexBuffer, version 1 only"""
+    assert encoded[0] == 0xe1
+    triangle_count = index_count // 3
+    codes = encoded[1:1 + triangle_count]
+    pos = 1 + triangle_count
+    codeaux_table = encoded[-16:]
+    edge_fifo = [(-1, -1)] * 16
+    vertex_fifo = [-1] * 16
+    edge_offset = vertex_offset = 0
+    next_index = last = 0
+    out = []
+
+    def push_vertex(v, cond=True):
+        nonlocal vertex_offset
+        vertex_fifo[vertex_offset] = v
+        vertex_offset = (vertex_offset + cond) & 15
+
+    def push_edge(a, b):
+        nonlocal edge_offset
+        edge_fifo[edge_offset] = (a, b)
+        edge_offset = (edge_offset + 1) & 15
+
+    def decode_index():
+        nonlocal pos
+        v, pos = _decode_vbyte(encoded, pos)
+        d = (v >> 1) ^ -(v & 1)
+        return (last + d) & 0xFFFFFFFF
+
+    for codetri in codes:
+        if codetri < 0xf0:
+            a, b = edge_fifo[(edge_offset - 1 - (codetri >> 4)) & 15]
+            fec = codetri & 15
+            if fec < 13:
+                c = next_index if fec == 0 else vertex_fifo[(vertex_offset - 1 - fec) & 15]
+                next_index += fec == 0
+                push_vertex(c, fec == 0)
+            else:
+                c = (last + (fec - (fec ^ 3))) & 0xFFFFFFFF if fec != 15 else decode_index()
+                last = c
+                push_vertex(c)
+            out.extend((a, b, c))
+            push_edge(c, b)
+            push_edge(a, c)
+            continue
+
+        if codetri < 0xfe:
+            codeaux = codeaux_table[codetri & 15]
+            feb, fec = codeaux >> 4, codeaux & 15
+            a = next_index
+            next_index += 1
+            b = next_index if feb == 0 else vertex_fifo[(vertex_offset - feb) & 15]
+            next_index += feb == 0
+            c = next_index if fec == 0 else vertex_fifo[(vertex_offset - fec) & 15]
+            next_index += fec == 0
+            out.extend((a, b, c))
+            push_vertex(a)
+            push_vertex(b, feb == 0)
+            push_vertex(c, fec == 0)
+        else:
+            codeaux = encoded[pos]
+            pos += 1
+            fea = 0 if codetri == 0xfe else 15
+            feb, fec = codeaux >> 4, codeaux & 15
+            if codeaux == 0:
+                next_index = 0  # fifo reset
+            a = b = c = 0
+            if fea == 0:
+                a, next_index = next_index, next_index + 1
+            if feb == 0:
+                b, next_index = next_index, next_index + 1
+            else:
+                b = vertex_fifo[(vertex_offset - feb) & 15]
+            if fec == 0:
+                c, next_index = next_index, next_index + 1
+            else:
+                c = vertex_fifo[(vertex_offset - fec) & 15]
+            if fea == 15:
+                a = last = decode_index()
+            if feb == 15:
+                b = last = decode_index()
+            if fec == 15:
+                c = last = decode_index()
+            out.extend((a, b, c))
+            push_vertex(a)
+            push_vertex(b, feb == 0 or feb == 15)
+            push_vertex(c, fec == 0 or fec == 15)
+        push_edge(b, a)
+        push_edge(c, b)
+        push_edge(a, c)
+
+    # Everything up to the trailing aux table must have been consumed
+    assert pos == len(encoded) - 16
+    return np.array(out, dtype=np.int64)
+
+
+def _decode_group(data, pos, mode):
+    if mode == 0:
+        return [0] * 16, pos
+    if mode == 3:
+        return list(data[pos:pos + 16]), pos + 16
+    bits = 2 if mode == 1 else 4
+    per_byte, sentinel = 8 // bits, (1 << bits) - 1
+    packed = data[pos:pos + 16 // per_byte]
+    extra = pos + len(packed)
+    values = []
+    for byte in packed:
+        for k in range(per_byte):
+            value = (byte >> (8 - bits * (k + 1))) & sentinel
+            if value == sentinel:
+                value = data[extra]
+                extra += 1
+            values.append(value)
+    return values, extra
+
+
+def decode_vertex_buffer(encoded, count, stride):
+    """meshopt_decodeVertexBuffer, version 0 only"""
+    assert encoded[0] == 0xa0
+    tail = max(32, stride)
+    last = list(encoded[len(encoded) - stride:])
+    out = bytearray(count * stride)
+    block_size = _vertex_block_size(stride)
+    pos = 1
+    for start in range(0, count, block_size):
+        block_count = min(block_size, count - start)
+        group_count = -(-block_count // 16)
+        header_size = (group_count + 3) // 4
+        for k in range(stride):
+            header = encoded[pos:pos + header_size]
+            pos += header_size
+            values = []
+            for i in range(group_count):
+                mode = (header[i // 4] >> (i % 4 * 2)) & 3
+                group, pos = _decode_group(encoded, pos, mode)
+                values.extend(group)
+            p = last[k]
+            for i in range(block_count):
+                v = values[i]
+                p = (p + ((v >> 1) ^ -(v & 1))) & 255
+                out[(start + i) * stride + k] = p
+            last[k] = p
+    assert pos == len(encoded) - tail
+    return np.frombuffer(bytes(out), dtype=np.uint8).reshape(count, stride)
+
+
+# --- index codec ---
+
+def _canonical(faces):
+    """Rotate each triangle to start at its smallest index; the codec keeps winding, not rotation"""
+    faces = faces.reshape(-1, 3)
+    shift = faces.argmin(axis=1)[:, None]
+    return np.take_along_axis(faces, (np.arange(3) + shift) % 3, axis=1)
+
+
+def _roundtrip_indices(faces):
+    decoded = decode_index_buffer(encode_index_buffer(faces), faces.size)
+    np.testing.assert_array_equal(_canonical(decoded), _canonical(faces))
+
+
+def _sphere(rows=40, cols=60):
+    return _optimize_order(uv_sphere(rows, cols))
+
+
+def test_index_roundtrip_sphere():
+    faces = _sphere().faces.astype(np.int64)
+    _roundtrip_indices(faces)
+    # Locality from _optimize_order should keep a regular grid near 2 bytes per triangle
+    assert len(encode_index_buffer(faces)) < 3 * len(faces)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('vertex_count', [20, 300])
+def test_index_roundtrip_random(seed, vertex_count):
+    # 20 vertices keep hitting every depth of the 16-entry FIFOs; 300 mostly misses them
+    rng = np.random.default_rng(seed)
+    faces = np.array([rng.choice(vertex_count, 3, replace=False) for _ in range(2000)], dtype=np.int64)
+    _roundtrip_indices(faces)
+
+
+def test_index_roundtrip_large_indices():
+    rng = np.random.default_rng(3)
+    # Deltas beyond 2**31 exercise the 32-bit wrap of the zigzag vbyte encoding
+    faces = rng.integers(0, 2 ** 32, size=(500, 3), dtype=np.int64)
+    faces = np.vstack([faces, _sphere().faces.astype(np.int64) + 0xFFFF0000])
+    _roundtrip_indices(faces)
+
+
+def test_index_roundtrip_fifo_reset():
+    # (0, 1, 2) after other vertices were introduced resets next and the vertex FIFO
+    sphere = _sphere(8, 12).faces.astype(np.int64)
+    faces = np.vstack([sphere, [[0, 1, 2], [2, 1, 3]], sphere])
+    _roundtrip_indices(faces)
+
+
+def test_index_roundtrip_empty():
+    _roundtrip_indices(np.zeros((0, 3), dtype=np.int64))
+
+
+# --- vertex codec ---
+
+def _roundtrip_vertices(data):
+    count, stride = data.shape
+    decoded = decode_vertex_buffer(encode_vertex_buffer(data), count, stride)
+    np.testing.assert_array_equal(decoded, data)
+
+
+def test_vertex_roundtrip_sphere():
+    mesh = _sphere()
+    positions, _, _ = _quantize_positions(mesh.vertices, 16)
+    _roundtrip_vertices(positions.view(np.uint8).reshape(len(positions), -1))
+    normals = _encode_octahedral(mesh.normals)
+    _roundtrip_vertices(normals.view(np.uint8).reshape(len(normals), -1))
+
+
+@pytest.mark.parametrize('stride', [4, 8, 12, 16, 20, 64])
+@pytest.mark.parametrize('count', [1, 15, 17, 255, 1000])
+def test_vertex_roundtrip_random(stride, count):
+    rng = np.random.default_rng(count * 100 + stride)
+    _roundtrip_vertices(rng.integers(0, 256, size=(count, stride), dtype=np.uint8))
+
+
+def test_vertex_roundtrip_mixed_groups():
+    # Small, medium and large deltas so every group mode (0, 2-bit, 4-bit, raw) is hit
+    rng = np.random.default_rng(4)
+    count = 3000
+    data = np.zeros((count, 8), dtype=np.uint8)
+    data[:, 1] = np.cumsum(rng.integers(-1, 2, count)).astype(np.uint8)
+    data[:, 2] = np.cumsum(rng.integers(-7, 8, count)).astype(np.uint8)
+    data[:, 3] = rng.integers(0, 256, count)
+    data[::37, 4] = 200
+    _roundtrip_vertices(data)
+
+
+def test_vertex_roundtrip_empty():
+    _roundtrip_vertices(np.zeros((0, 12), dtype=np.uint8))
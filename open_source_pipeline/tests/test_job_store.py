@@ -0,0 +1,121 @@
+"""
+SQLiteJobStore behaviour the services rely on across gunicorn restarts and
+between processes sharing one jobs database: dedupe-key coalescing,
+recovery of jobs whose owner died, and buffered progress writes.
+
+    pytest tests/test_job_store.py
+"""
+
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from pipeline.job_store import SQLiteJobStore, process_owner
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'jobs.db'
+
+
+@pytest.fixture
+def store(db_path):
+    store = SQLiteJobStore(db_path, flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def _record(dedupe_key=None, status='queued', **fields):
+    return {'id': str(uuid.uuid4()), 'status': status, 'progress': 0, 'created_at': time.time(),
+            'dedupe_key': dedupe_key, 'input_data': {'input_files': ['a.png']}, **fields}
+
+
+def _dead_pid():
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    return child.pid
+
+
+def test_identical_requests_attach_to_the_active_job(store, db_path):
+    first = _record('key-1')
+    assert store.create_or_attach(first) is None
+    # A second process on the same database sees the same in-flight job
+    other = SQLiteJobStore(db_path)
+    try:
+        assert other.create_or_attach(_record('key-1')) == first['id']
+    finally:
+        other.close()
+    assert store.create_or_attach(_record('key-2')) is None
+    assert len(store.list()) == 2
+
+
+def test_finished_job_no_longer_coalesces(store):
+    first = _record('key-1')
+    store.create_or_attach(first)
+    store.update(first['id'], status='failed', error='rejected: Job queue is full')
+    retry = _record('key-1')
+    assert store.create_or_attach(retry) is None
+    assert store.get(first['id'])['status'] == 'failed'
+    assert store.get(retry['id'])['status'] == 'queued'
+
+
+def test_records_without_a_key_never_coalesce(store):
+    assert store.create_or_attach(_record()) is None
+    assert store.create_or_attach(_record()) is None
+    assert len(store.list()) == 2
+
+
+def test_recover_interrupted_fails_only_jobs_of_dead_local_owners(store):
+    host = socket.gethostname()
+    orphan = _record(owner=f"{host}:{_dead_pid()}")
+    finished = _record(status='completed', owner=f"{host}:{_dead_pid()}")
+    ours = _record(status='processing', owner=process_owner())
+    remote = _record(owner='some-other-host:1')
+    for record in (orphan, finished, ours, remote):
+        store.create(record)
+
+    assert store.recover_interrupted() == 1
+    recovered = store.get(orphan['id'])
+    assert recovered['status'] == 'failed'
+    assert recovered['error'] == 'Interrupted by service restart'
+    assert recovered['completed_at'] is not None
+    assert store.get(finished['id'])['status'] == 'completed'
+    assert store.get(ours['id'])['status'] == 'processing'
+    assert store.get(remote['id'])['status'] == 'queued'
+    assert store.recover_interrupted() == 0
+
+
+def test_progress_is_buffered_then_flushed(store, db_path):
+    job = _record(status='processing')
+    store.create(job)
+    reader = SQLiteJobStore(db_path)
+    try:
+        store.set_progress(job['id'], 40)
+        store.set_progress(job['id'], 60)
+        # The writing process sees its own buffered value straight away
+        assert store.get(job['id'])['progress'] == 60
+
+        deadline = time.time() + 5
+        while reader.get(job['id'])['progress'] != 60:
+            assert time.time() < deadline, 'flusher never wrote the buffered progress'
+            time.sleep(0.02)
+    finally:
+        reader.close()
+
+
+def test_final_update_wins_over_buffered_progress(db_path):
+    store = SQLiteJobStore(db_path, flush_interval=60)
+    try:
+        job = _record(status='processing')
+        store.create(job)
+        store.set_progress(job['id'], 90)
+        store.update(job['id'], status='completed', progress=100)
+        store.flush()
+        assert store.get(job['id'])['progress'] == 100
+        assert store.get(job['id'])['status'] == 'completed'
+    finally:
+        store.close()
@@ -0,0 +1,75 @@
+"""
+STL format detection in pipeline/mesh.py: ASCII versus binary (including
+binary files whose header starts with 'solid'), and corrupt binary sizes.
+
+    pytest tests/test_mesh.py
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from pipeline.mesh import STL_DTYPE, load_mesh, uv_sphere
+
+ASCII_STL = b"""solid tri
+  facet normal 0 0 1
+    outer loop
+      vertex 0 0 0
+      vertex 1 0 0
+      vertex 0 1 0
+    endloop
+  endfacet
+endsolid tri
+"""
+
+
+@pytest.fixture
+def sphere():
+    return uv_sphere(16, 8)
+
+
+def _binary_stl(tmp_path, sphere, header=b'binary STL'):
+    path = tmp_path / 'model.stl'
+    sphere.save(path)
+    data = bytearray(path.read_bytes())
+    data[:80] = header.ljust(80, b' ')
+    path.write_bytes(bytes(data))
+    return path
+
+
+def test_binary_roundtrip(tmp_path, sphere):
+    mesh = load_mesh(_binary_stl(tmp_path, sphere))
+    assert mesh.face_count == sphere.face_count
+    np.testing.assert_array_equal(mesh.vertices, sphere.vertices[sphere.faces].reshape(-1, 3))
+
+
+def test_binary_with_solid_header_is_still_binary(tmp_path, sphere):
+    mesh = load_mesh(_binary_stl(tmp_path, sphere, header=b'solid exported by some CAD tool'))
+    assert mesh.face_count == sphere.face_count
+
+
+def test_ascii(tmp_path):
+    path = tmp_path / 'tri.stl'
+    path.write_bytes(ASCII_STL)
+    mesh = load_mesh(path)
+    assert mesh.face_count == 1
+    np.testing.assert_array_equal(mesh.vertices, [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+
+
+@pytest.mark.parametrize('change', [-STL_DTYPE.itemsize // 2, -STL_DTYPE.itemsize, 7, STL_DTYPE.itemsize])
+def test_binary_size_mismatch_raises(tmp_path, sphere, change):
+    path = _binary_stl(tmp_path, sphere, header=b'solid padded or truncated')
+    data = path.read_bytes()
+    path.write_bytes(data[:change] if change < 0 else data + b'\0' * change)
+    with pytest.raises(ValueError, match=f"declares {sphere.face_count} triangles"):
+        load_mesh(path)
+
+
+def test_header_only_file(tmp_path):
+    path = tmp_path / 'empty.stl'
+    path.write_bytes(b'binary STL'.ljust(80, b' ') + struct.pack('<I', 0))
+    assert load_mesh(path).face_count == 0
+    path.write_bytes(b'binary STL'.ljust(60, b' '))
+    with pytest.raises(ValueError, match='shorter than its 84-byte header'):
+        load_mesh(path)
@@ -0,0 +1,68 @@
+"""
+run_ordered() in pipeline/parallel.py: input order, per-item errors, and
+pinning a worker crash on the one item that caused it.
+
+The worker functions live at module level so forkserver workers can
+import them by name.
+
+    pytest tests/test_parallel.py
+"""
+
+import os
+import time
+
+import pytest
+
+from pipeline.parallel import ProcessPool, run_ordered
+
+CRASH = 'crash'
+
+
+def work(item):
+    if item == CRASH:
+        os._exit(1)
+    if isinstance(item, str):
+        raise ValueError(f"bad item {item}")
+    # Later items finish first, so completion order differs from input order
+    time.sleep(0.05 * (5 - item % 5))
+    return item * item
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = ProcessPool(max_workers=3)
+    yield pool
+    pool.shutdown()
+
+
+def test_results_keep_input_order(pool):
+    seen = []
+    results = run_ordered(work, range(10), pool=pool, on_result=lambda index, _: seen.append(index))
+    assert [r['value'] for r in results] == [i * i for i in range(10)]
+    assert all(r['error'] is None and r['elapsed'] > 0 for r in results)
+    assert sorted(seen) == list(range(10))
+    assert seen != list(range(10))
+
+
+def test_exception_fails_only_its_item(pool):
+    results = run_ordered(work, [1, 'oops', 3], pool=pool)
+    assert [r['value'] for r in results] == [1, None, 9]
+    assert results[1]['error'] == 'bad item oops'
+
+
+def test_crash_is_blamed_on_the_crashing_item(pool):
+    items = [0, 1, CRASH, 3, 4, 5]
+    results = run_ordered(work, items, pool=pool)
+    assert results[2] == {'value': None, 'error': 'Worker process crashed', 'elapsed': 0.0}
+    # Items that shared the broken executor were rerun and succeeded
+    for index in (0, 1, 3, 4, 5):
+        assert results[index]['error'] is None
+        assert results[index]['value'] == items[index] ** 2
+    # The pool recovers for the next caller
+    assert [r['value'] for r in run_ordered(work, [2, 3], pool=pool)] == [4, 9]
+
+
+def test_without_a_pool_items_run_inline():
+    results = run_ordered(work, [2, 'x'])
+    assert results[0]['value'] == 4
+    assert results[1]['error'] == 'bad item x'
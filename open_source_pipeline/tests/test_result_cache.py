@@ -0,0 +1,74 @@
+"""
+Size-budgeted LRU eviction in pipeline/result_cache.py.
+
+    pytest tests/test_result_cache.py
+"""
+
+import os
+import time
+
+from pipeline.result_cache import ResultCache
+
+ENTRY_BYTES = 100
+
+
+def _model(tmp_path, name, size=ENTRY_BYTES):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def _put(cache, tmp_path, key, **kwargs):
+    cache.put(key, _model(tmp_path, f"{key}.glb"), result={'key': key}, **kwargs)
+    # last_access decides eviction order, so keep successive entries apart
+    time.sleep(0.01)
+
+
+def test_least_recently_used_entry_goes_first(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_bytes=3 * ENTRY_BYTES)
+    for key in ('a', 'b', 'c'):
+        _put(cache, tmp_path, key)
+    assert cache.get('a')['result'] == {'key': 'a'}  # 'b' is now the oldest
+    time.sleep(0.01)
+
+    _put(cache, tmp_path, 'd')
+    assert cache.get('b') is None
+    assert not os.path.exists(cache.path_for('b.glb'))
+    for key in ('a', 'c', 'd'):
+        assert cache.get(key) is not None
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 3
+    assert stats['bytes'] == 3 * ENTRY_BYTES
+
+
+def test_variants_count_towards_the_budget_and_leave_together(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_bytes=4 * ENTRY_BYTES)
+    lods = {f"lod{level}": _model(tmp_path, f"lod{level}.glb") for level in (1, 2)}
+    _put(cache, tmp_path, 'a', variants=lods)
+    entry = cache.get('a')
+    assert entry['size'] == 3 * ENTRY_BYTES
+    assert entry['variants'] == ['a_lod1.glb', 'a_lod2.glb']
+
+    _put(cache, tmp_path, 'b')
+    _put(cache, tmp_path, 'c')
+    assert cache.get('a') is None
+    for filename in ('a.glb', 'a_lod1.glb', 'a_lod2.glb'):
+        assert not os.path.exists(cache.path_for(filename))
+    assert cache.stats()['bytes'] == 2 * ENTRY_BYTES
+
+
+def test_entry_larger_than_budget_is_not_kept(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_bytes=ENTRY_BYTES)
+    cache.put('big', _model(tmp_path, 'big.glb', 2 * ENTRY_BYTES))
+    assert cache.get('big') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_bytes=10 * ENTRY_BYTES)
+    _put(cache, tmp_path, 'a')
+    os.remove(cache.path_for('a.glb'))
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (0, 1, 0)
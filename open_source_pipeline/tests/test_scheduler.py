@@ -0,0 +1,91 @@
+"""
+Admission control in pipeline/scheduler.py and the 429 the services build
+from it.
+
+    pytest tests/test_scheduler.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from pipeline.scheduler import QueueFullError, WorkerPool
+
+
+def _occupy(pool, count=1):
+    """Park count workers on an event; returns the event that releases them"""
+    release = threading.Event()
+    for _ in range(count):
+        pool.submit(release.wait, 10)
+    deadline = time.time() + 5
+    while pool.active_count() < count:
+        assert time.time() < deadline, 'workers never picked up the blocking tasks'
+        time.sleep(0.01)
+    return release
+
+
+def test_full_queue_rejects_and_counts():
+    changes = []
+    pool = WorkerPool(1, 1, name='test', on_change=lambda p, rejected=False: changes.append(rejected))
+    release = _occupy(pool)
+    try:
+        pool.submit(lambda: None)
+        assert pool.queue_depth() == 1
+        with pytest.raises(QueueFullError, match='Job queue is full') as excinfo:
+            pool.submit(lambda: None)
+        assert excinfo.value.retry_after == 1  # nothing has finished yet to estimate from
+        assert pool.stats()['rejected'] == 1
+        assert changes[-1] is True
+    finally:
+        release.set()
+        pool.shutdown()
+    assert pool.stats()['completed'] == 2
+
+
+def test_zero_queue_only_hands_work_to_idle_workers():
+    pool = WorkerPool(2, 0)
+    release = _occupy(pool, 2)
+    try:
+        with pytest.raises(QueueFullError, match='No idle workers'):
+            pool.submit(lambda: None)
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_retry_after_follows_job_duration():
+    pool = WorkerPool(1, 1)
+    try:
+        assert pool.retry_after() == 1
+        pool.submit(time.sleep, 1.2)
+        pool._queue.join()
+        # One queued job drains per average duration on a single worker
+        assert pool.retry_after() == 2
+        release = _occupy(pool)
+        pool.submit(lambda: None)
+        with pytest.raises(QueueFullError) as excinfo:
+            pool.submit(lambda: None)
+        assert excinfo.value.retry_after == 2
+        release.set()
+    finally:
+        pool.shutdown()
+
+
+def test_generate_returns_429_with_retry_after(hunyuan_app, monkeypatch):
+    pool = WorkerPool(1, 0)
+    monkeypatch.setattr(hunyuan_app, 'job_pool', pool)
+    release = _occupy(pool)
+    try:
+        client = hunyuan_app.app.test_client()
+        response = client.post('/generate', json={'input_files': ['https://example.com/queue-full.png']})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+        assert response.get_json()['success'] is False
+        # The rejected job stays visible as failed to anyone who attached to it
+        rejected = [job for job in hunyuan_app.job_store.list()
+                    if (job.get('error') or '').startswith('rejected:')]
+        assert len(rejected) == 1 and rejected[0]['status'] == 'failed'
+    finally:
+        release.set()
+        pool.shutdown()
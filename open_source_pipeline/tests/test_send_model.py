@@ -0,0 +1,92 @@
+"""
+Conditional and ranged model downloads served by hunyuan3d's send_model():
+ETag / If-None-Match, single byte ranges, If-Range and 416.
+
+    pytest tests/test_send_model.py
+"""
+
+import os
+import uuid
+
+import pytest
+
+SIZE = 64 * 1024
+
+
+@pytest.fixture
+def model(hunyuan_app):
+    """A model file in MODELS_DIR: (url, bytes)"""
+    name = f"{uuid.uuid4()}.glb"
+    data = os.urandom(SIZE)
+    path = os.path.join(hunyuan_app.MODELS_DIR, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    yield f"/models/{name}", data
+    os.remove(path)
+
+
+@pytest.fixture
+def client(hunyuan_app):
+    return hunyuan_app.app.test_client()
+
+
+def test_full_download_carries_a_strong_etag(client, model):
+    url, data = model
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['Content-Type'] == 'model/gltf-binary'
+    etag = response.headers['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert client.get(url).headers['ETag'] == etag
+
+
+def test_matching_if_none_match_is_not_modified(client, model):
+    url, _ = model
+    etag = client.get(url).headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert client.get(url, headers={'If-None-Match': '"something-else"'}).status_code == 200
+
+
+@pytest.mark.parametrize('header, start, stop', [
+    ('bytes=1000-', 1000, SIZE),
+    ('bytes=0-99', 0, 100),
+    ('bytes=-10', SIZE - 10, SIZE),
+])
+def test_single_range_is_partial_content(client, model, header, start, stop):
+    url, data = model
+    response = client.get(url, headers={'Range': header})
+    assert response.status_code == 206
+    assert response.data == data[start:stop]
+    assert response.headers['Content-Range'] == f"bytes {start}-{stop - 1}/{SIZE}"
+    assert int(response.headers['Content-Length']) == stop - start
+
+
+def test_if_range_resumes_only_the_same_file(client, model):
+    url, data = model
+    etag = client.get(url).headers['ETag']
+    resumed = client.get(url, headers={'Range': 'bytes=500-', 'If-Range': etag})
+    assert resumed.status_code == 206
+    assert resumed.data == data[500:]
+
+    # The client's partial copy is of an older file: send the whole current one
+    stale = client.get(url, headers={'Range': 'bytes=500-', 'If-Range': '"stale"'})
+    assert stale.status_code == 200
+    assert stale.data == data
+    assert 'Content-Range' not in stale.headers
+
+
+def test_range_past_the_end_is_unsatisfiable(client, model):
+    url, _ = model
+    response = client.get(url, headers={'Range': f"bytes={SIZE}-"})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f"bytes */{SIZE}"
+
+
+def test_traversal_outside_models_dir_is_not_found(client, hunyuan_app):
+    assert client.get('/models/../jobs/jobs.glb').status_code == 404
+    assert client.get(f"/models/{uuid.uuid4()}.glb").status_code == 404
@@ -0,0 +1,73 @@
+"""
+Streaming, size-capped, content-addressed uploads (pipeline/uploads.py).
+
+    pytest tests/test_uploads.py
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+
+from pipeline.uploads import UploadTooLarge, UploadWriter, copy_stream, find_upload
+
+
+def _leftovers(upload_dir):
+    return [name for name in os.listdir(upload_dir) if name.startswith('.upload-')]
+
+
+def test_finish_names_the_file_by_its_digest(tmp_path):
+    data = b'solid cube\nendsolid cube\n'
+    writer = copy_stream(io.BytesIO(data), UploadWriter(str(tmp_path)), chunk_size=4)
+    info = writer.finish('.STL')
+
+    content_id = hashlib.sha256(data).hexdigest()
+    assert info == {'content_id': content_id, 'size': len(data), 'duplicate': False}
+    assert (tmp_path / f"{content_id}.stl").read_bytes() == data
+    assert _leftovers(tmp_path) == []
+
+
+def test_same_bytes_twice_is_a_duplicate(tmp_path):
+    first = UploadWriter(str(tmp_path))
+    first.write(b'same bytes')
+    first_info = first.finish('.pdf')
+
+    second = UploadWriter(str(tmp_path))
+    second.write(b'same ')
+    second.write(b'bytes')
+    second_info = second.finish('.pdf')
+
+    assert second_info['duplicate'] is True
+    assert second_info['content_id'] == first_info['content_id']
+    assert os.listdir(tmp_path) == [f"{first_info['content_id']}.pdf"]
+
+
+def test_crossing_max_bytes_aborts_and_removes_the_partial_file(tmp_path):
+    writer = UploadWriter(str(tmp_path), max_bytes=10)
+    writer.write(b'x' * 10)
+    with pytest.raises(UploadTooLarge) as excinfo:
+        writer.write(b'y')
+    assert excinfo.value.limit == 10
+    assert os.listdir(tmp_path) == []
+    writer.discard()  # idempotent; the request teardown calls it again
+
+
+def test_copy_stream_stops_at_the_limit(tmp_path):
+    stream = io.BytesIO(b'z' * (3 * 1024 * 1024))
+    with pytest.raises(UploadTooLarge, match='1 MB'):
+        copy_stream(stream, UploadWriter(str(tmp_path), max_bytes=1024 * 1024), chunk_size=256 * 1024)
+    # Only the chunks up to the one that crossed the limit were read
+    assert stream.tell() == 1024 * 1024 + 256 * 1024
+    assert os.listdir(tmp_path) == []
+
+
+def test_find_upload_only_accepts_content_ids(tmp_path):
+    writer = UploadWriter(str(tmp_path))
+    writer.write(b'drawing')
+    content_id = writer.finish('.dxf')['content_id']
+
+    assert find_upload(str(tmp_path), content_id, {'pdf', 'dxf'}) == str(tmp_path / f"{content_id}.dxf")
+    assert find_upload(str(tmp_path), content_id, {'pdf'}) is None
+    assert find_upload(str(tmp_path), content_id.upper(), {'dxf'}) is None
+    assert find_upload(str(tmp_path), f"../{content_id}", {'dxf'}) is None
@@ -470,6 +470,8 @@ MODELS_FOLDER=models
 # Processing Configuration
 MAX_FILE_SIZE=52428800  # 50MB
 MAX_CONCURRENT_JOBS=5
+MAX_QUEUED_JOBS=20
+JOB_STORE=sqlite
 PROCESSING_TIMEOUT=3600  # 1 hour
 EOF
 